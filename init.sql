@@ -19,38 +19,161 @@ CREATE TABLE clients (
     UNIQUE(tenant_id, email)
 );
 
--- Documents
+-- Documents, notes and their chunks are LIST-partitioned by tenant_id: each tenant gets its
+-- own partitions (see create_tenant_partitions below) with their own GIN and vector indexes,
+-- so a query filtered on tenant_id is pruned to one partition and approximate vector search
+-- only walks that tenant's graph. Keys include tenant_id, as partitioned tables require.
 CREATE TABLE documents (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     tenant_id INT NOT NULL REFERENCES tenants(id),
     client_id INT NOT NULL REFERENCES clients(id),
     title TEXT NOT NULL,
     content TEXT NOT NULL,
     summary TEXT,
+    summary_status TEXT NOT NULL DEFAULT 'ready' CHECK (summary_status IN ('ready', 'pending', 'failed')),
     created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
     content_embedding vector(384),
-    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
-);
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    content_hash BYTEA,  -- SHA-256 of the normalized content; NULL when DEDUPE_UPLOADS is off
+    idempotency_key TEXT,  -- Idempotency-Key header of the upload that created the row
+    PRIMARY KEY (tenant_id, id)
+) PARTITION BY LIST (tenant_id);
 
 -- Meeting Notes
 CREATE TABLE meeting_notes (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     tenant_id INT NOT NULL REFERENCES tenants(id),
     client_id INT NOT NULL REFERENCES clients(id),
     content TEXT NOT NULL,
     summary TEXT,
+    summary_status TEXT NOT NULL DEFAULT 'ready' CHECK (summary_status IN ('ready', 'pending', 'failed')),
     created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
     content_embedding vector(384),
-    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    content_hash BYTEA,  -- SHA-256 of the normalized content; NULL when DEDUPE_UPLOADS is off
+    idempotency_key TEXT,  -- Idempotency-Key header of the upload that created the row
+    PRIMARY KEY (tenant_id, id)
+) PARTITION BY LIST (tenant_id);
+
+-- Passage-level embeddings: each document/note is split into overlapping sentence windows
+-- so text past the embedder's 256-token limit is still searchable (VECTOR_GRANULARITY=chunk)
+CREATE TABLE document_chunks (
+    id BIGSERIAL,
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    document_id INT NOT NULL,
+    chunk_index INT NOT NULL,
+    content TEXT NOT NULL,
+    embedding vector(384) NOT NULL,
+    PRIMARY KEY (tenant_id, id),
+    UNIQUE (tenant_id, document_id, chunk_index),
+    FOREIGN KEY (tenant_id, document_id) REFERENCES documents (tenant_id, id) ON DELETE CASCADE
+) PARTITION BY LIST (tenant_id);
+
+CREATE TABLE note_chunks (
+    id BIGSERIAL,
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    note_id INT NOT NULL,
+    chunk_index INT NOT NULL,
+    content TEXT NOT NULL,
+    embedding vector(384) NOT NULL,
+    PRIMARY KEY (tenant_id, id),
+    UNIQUE (tenant_id, note_id, chunk_index),
+    FOREIGN KEY (tenant_id, note_id) REFERENCES meeting_notes (tenant_id, id) ON DELETE CASCADE
+) PARTITION BY LIST (tenant_id);
+
+-- Rows of tenants without their own partitions land here; create_tenant_partitions fails
+-- while the default partition holds rows of that tenant, so provision tenants before ingest
+CREATE TABLE documents_default PARTITION OF documents DEFAULT;
+CREATE TABLE meeting_notes_default PARTITION OF meeting_notes DEFAULT;
+CREATE TABLE document_chunks_default PARTITION OF document_chunks DEFAULT;
+CREATE TABLE note_chunks_default PARTITION OF note_chunks DEFAULT;
+
+-- Partitions for one tenant; indexes defined on the parents are created on them automatically
+CREATE OR REPLACE FUNCTION create_tenant_partitions(p_tenant_id INT) RETURNS void AS $$
+DECLARE
+    parent TEXT;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['documents', 'meeting_notes', 'document_chunks', 'note_chunks'] LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (%s)',
+            parent || '_t' || p_tenant_id, parent, p_tenant_id
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION tenants_create_partitions() RETURNS trigger AS $$
+BEGIN
+    PERFORM create_tenant_partitions(NEW.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tenants_create_partitions AFTER INSERT ON tenants
+    FOR EACH ROW EXECUTE FUNCTION tenants_create_partitions();
+
+-- Deferred summarization queue (SUMMARY_MODE=deferred); workers claim rows with SKIP LOCKED
+CREATE TABLE summary_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    item_type TEXT NOT NULL CHECK (item_type IN ('document', 'note')),
+    item_id INT NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (item_type, item_id)
 );
 
--- Indexes (FTS + vector)
+-- Summaries and chunk embeddings of content a tenant uploaded before, so re-uploads skip
+-- the summarizer and embedder; least recently used entries are evicted past a size budget
+CREATE TABLE content_cache (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    content_hash BYTEA NOT NULL,  -- SHA-256 of the normalized content
+    kind TEXT NOT NULL CHECK (kind IN ('summary', 'embedding')),
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    version TEXT NOT NULL,  -- prompt version, chunking parameters, ...
+    value BYTEA NOT NULL,  -- UTF-8 summary, or float32 chunk vectors
+    size_bytes INT NOT NULL,
+    cost_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,  -- time it took to compute the value
+    hits BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_used_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (tenant_id, content_hash, kind, provider, model, version)
+);
+
+-- Indexes (FTS + vector); on the partitioned tables each is a per-partition index
 CREATE INDEX idx_documents_tsv ON documents USING GIN(content_tsv);
 CREATE INDEX idx_notes_tsv     ON meeting_notes USING GIN(content_tsv);
+CREATE INDEX idx_summary_jobs_run_after ON summary_jobs (run_after);
+CREATE INDEX idx_content_cache_last_used ON content_cache (last_used_at);
+
+-- Client and date filters on /search: bounded counts and the parent lookups of filtered chunk
+-- searches are index-only scans (tenant_id leads so the default partition can use them too)
+CREATE INDEX idx_documents_client_created ON documents (tenant_id, client_id, created_at) INCLUDE (id);
+CREATE INDEX idx_documents_created ON documents (tenant_id, created_at) INCLUDE (id);
+CREATE INDEX idx_notes_client_created ON meeting_notes (tenant_id, client_id, created_at) INCLUDE (id);
+CREATE INDEX idx_notes_created ON meeting_notes (tenant_id, created_at) INCLUDE (id);
+
+-- Upload deduplication: a retried upload finds the row it created instead of inserting a copy
+-- (NULLs never conflict, so rows without a hash or key are not constrained)
+CREATE UNIQUE INDEX uq_documents_content_hash ON documents (tenant_id, client_id, content_hash);
+CREATE UNIQUE INDEX uq_documents_idempotency_key ON documents (tenant_id, client_id, idempotency_key);
+CREATE UNIQUE INDEX uq_notes_content_hash ON meeting_notes (tenant_id, client_id, content_hash);
+CREATE UNIQUE INDEX uq_notes_idempotency_key ON meeting_notes (tenant_id, client_id, idempotency_key);
 
--- Vector indexes for embeddings
-CREATE INDEX idx_documents_embedding ON documents USING ivfflat (content_embedding vector_l2_ops);
-CREATE INDEX idx_notes_embedding     ON meeting_notes USING ivfflat (content_embedding vector_l2_ops);
+-- Vector indexes for embeddings (HNSW needs no training, so it is safe on empty tables;
+-- embeddings are normalized, so cosine ops match the search queries)
+CREATE INDEX idx_documents_embedding ON documents
+    USING hnsw (content_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_notes_embedding     ON meeting_notes
+    USING hnsw (content_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_document_chunks_embedding ON document_chunks
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_note_chunks_embedding     ON note_chunks
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 
 -- Insert default tenant for MVP
 INSERT INTO tenants (id, name) VALUES (1, 'Default Tenant') ON CONFLICT (id) DO NOTHING;
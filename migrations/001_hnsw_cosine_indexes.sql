@@ -0,0 +1,18 @@
+-- ABOUTME: Replace untrained ivfflat/L2 vector indexes with HNSW cosine indexes
+-- ABOUTME: Embeddings are normalized, so cosine distance is the natural metric
+
+-- The original ivfflat indexes were built on empty tables, so their list
+-- centroids never reflected the data. HNSW needs no training step and keeps
+-- recall as the tables grow. To use a trained IVFFlat index or inner-product
+-- ops instead, run scripts/build_vector_index.py after loading data.
+
+DROP INDEX IF EXISTS idx_documents_embedding;
+DROP INDEX IF EXISTS idx_notes_embedding;
+
+CREATE INDEX idx_documents_embedding ON documents
+    USING hnsw (content_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_notes_embedding ON meeting_notes
+    USING hnsw (content_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+ANALYZE documents;
+ANALYZE meeting_notes;
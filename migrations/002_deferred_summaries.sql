@@ -0,0 +1,23 @@
+-- ABOUTME: Deferred summarization: per-row summary status and a Postgres-backed job queue
+-- ABOUTME: Workers claim jobs with FOR UPDATE SKIP LOCKED and retry with exponential backoff
+
+ALTER TABLE documents
+    ADD COLUMN IF NOT EXISTS summary_status TEXT NOT NULL DEFAULT 'ready'
+        CHECK (summary_status IN ('ready', 'pending', 'failed'));
+ALTER TABLE meeting_notes
+    ADD COLUMN IF NOT EXISTS summary_status TEXT NOT NULL DEFAULT 'ready'
+        CHECK (summary_status IN ('ready', 'pending', 'failed'));
+
+CREATE TABLE IF NOT EXISTS summary_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    item_type TEXT NOT NULL CHECK (item_type IN ('document', 'note')),
+    item_id INT NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (item_type, item_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_summary_jobs_run_after ON summary_jobs (run_after);
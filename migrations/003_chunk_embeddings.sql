@@ -0,0 +1,27 @@
+-- ABOUTME: Passage-level embeddings in document_chunks/note_chunks with their own HNSW indexes
+-- ABOUTME: Run scripts/backfill_chunks.py afterwards to chunk existing documents and notes
+
+CREATE TABLE IF NOT EXISTS document_chunks (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    document_id INT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    chunk_index INT NOT NULL,
+    content TEXT NOT NULL,
+    embedding vector(384) NOT NULL,
+    UNIQUE (document_id, chunk_index)
+);
+
+CREATE TABLE IF NOT EXISTS note_chunks (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    note_id INT NOT NULL REFERENCES meeting_notes(id) ON DELETE CASCADE,
+    chunk_index INT NOT NULL,
+    content TEXT NOT NULL,
+    embedding vector(384) NOT NULL,
+    UNIQUE (note_id, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_embedding ON document_chunks
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX IF NOT EXISTS idx_note_chunks_embedding ON note_chunks
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,141 @@
+-- ABOUTME: LIST-partition documents, meeting_notes and their chunk tables by tenant_id
+-- ABOUTME: Each tenant gets its own partitions with their own GIN and vector indexes
+
+-- Searches filter on tenant_id, but with global indexes approximate vector search
+-- walks every tenant's neighbours and filters them out afterwards. With one
+-- partition per tenant the planner prunes to that tenant's partition and its
+-- own HNSW graph. Rows are copied into new partitioned tables (ids and
+-- sequences are kept), so run this in a maintenance window; it takes an
+-- exclusive lock on all four tables for the duration.
+
+BEGIN;
+
+ALTER TABLE note_chunks RENAME TO note_chunks_unpartitioned;
+ALTER TABLE document_chunks RENAME TO document_chunks_unpartitioned;
+ALTER TABLE meeting_notes RENAME TO meeting_notes_unpartitioned;
+ALTER TABLE documents RENAME TO documents_unpartitioned;
+
+CREATE TABLE documents (
+    id INT NOT NULL DEFAULT nextval('documents_id_seq'),
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    client_id INT NOT NULL REFERENCES clients(id),
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    summary TEXT,
+    summary_status TEXT NOT NULL DEFAULT 'ready' CHECK (summary_status IN ('ready', 'pending', 'failed')),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    content_embedding vector(384),
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    PRIMARY KEY (tenant_id, id)
+) PARTITION BY LIST (tenant_id);
+
+CREATE TABLE meeting_notes (
+    id INT NOT NULL DEFAULT nextval('meeting_notes_id_seq'),
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    client_id INT NOT NULL REFERENCES clients(id),
+    content TEXT NOT NULL,
+    summary TEXT,
+    summary_status TEXT NOT NULL DEFAULT 'ready' CHECK (summary_status IN ('ready', 'pending', 'failed')),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    content_embedding vector(384),
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    PRIMARY KEY (tenant_id, id)
+) PARTITION BY LIST (tenant_id);
+
+CREATE TABLE document_chunks (
+    id BIGINT NOT NULL DEFAULT nextval('document_chunks_id_seq'),
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    document_id INT NOT NULL,
+    chunk_index INT NOT NULL,
+    content TEXT NOT NULL,
+    embedding vector(384) NOT NULL,
+    PRIMARY KEY (tenant_id, id),
+    UNIQUE (tenant_id, document_id, chunk_index),
+    FOREIGN KEY (tenant_id, document_id) REFERENCES documents (tenant_id, id) ON DELETE CASCADE
+) PARTITION BY LIST (tenant_id);
+
+CREATE TABLE note_chunks (
+    id BIGINT NOT NULL DEFAULT nextval('note_chunks_id_seq'),
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    note_id INT NOT NULL,
+    chunk_index INT NOT NULL,
+    content TEXT NOT NULL,
+    embedding vector(384) NOT NULL,
+    PRIMARY KEY (tenant_id, id),
+    UNIQUE (tenant_id, note_id, chunk_index),
+    FOREIGN KEY (tenant_id, note_id) REFERENCES meeting_notes (tenant_id, id) ON DELETE CASCADE
+) PARTITION BY LIST (tenant_id);
+
+CREATE TABLE documents_default PARTITION OF documents DEFAULT;
+CREATE TABLE meeting_notes_default PARTITION OF meeting_notes DEFAULT;
+CREATE TABLE document_chunks_default PARTITION OF document_chunks DEFAULT;
+CREATE TABLE note_chunks_default PARTITION OF note_chunks DEFAULT;
+
+CREATE OR REPLACE FUNCTION create_tenant_partitions(p_tenant_id INT) RETURNS void AS $$
+DECLARE
+    parent TEXT;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['documents', 'meeting_notes', 'document_chunks', 'note_chunks'] LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (%s)',
+            parent || '_t' || p_tenant_id, parent, p_tenant_id
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION tenants_create_partitions() RETURNS trigger AS $$
+BEGIN
+    PERFORM create_tenant_partitions(NEW.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tenants_create_partitions ON tenants;
+CREATE TRIGGER tenants_create_partitions AFTER INSERT ON tenants
+    FOR EACH ROW EXECUTE FUNCTION tenants_create_partitions();
+
+SELECT create_tenant_partitions(id) FROM tenants;
+
+-- Load before indexing: building each partition's indexes once is much faster than
+-- maintaining them row by row
+INSERT INTO documents (id, tenant_id, client_id, title, content, summary, summary_status, created_at, content_embedding)
+SELECT id, tenant_id, client_id, title, content, summary, summary_status, created_at, content_embedding
+FROM documents_unpartitioned;
+INSERT INTO meeting_notes (id, tenant_id, client_id, content, summary, summary_status, created_at, content_embedding)
+SELECT id, tenant_id, client_id, content, summary, summary_status, created_at, content_embedding
+FROM meeting_notes_unpartitioned;
+INSERT INTO document_chunks (id, tenant_id, document_id, chunk_index, content, embedding)
+SELECT id, tenant_id, document_id, chunk_index, content, embedding FROM document_chunks_unpartitioned;
+INSERT INTO note_chunks (id, tenant_id, note_id, chunk_index, content, embedding)
+SELECT id, tenant_id, note_id, chunk_index, content, embedding FROM note_chunks_unpartitioned;
+
+-- Keep the sequences when the old tables (and their indexes) are dropped
+ALTER SEQUENCE documents_id_seq OWNED BY documents.id;
+ALTER SEQUENCE meeting_notes_id_seq OWNED BY meeting_notes.id;
+ALTER SEQUENCE document_chunks_id_seq OWNED BY document_chunks.id;
+ALTER SEQUENCE note_chunks_id_seq OWNED BY note_chunks.id;
+
+DROP TABLE note_chunks_unpartitioned, document_chunks_unpartitioned;
+DROP TABLE meeting_notes_unpartitioned, documents_unpartitioned;
+
+-- Created on the parents, so every existing and future partition gets its own index
+SET LOCAL maintenance_work_mem = '1GB';
+CREATE INDEX idx_documents_tsv ON documents USING GIN(content_tsv);
+CREATE INDEX idx_notes_tsv ON meeting_notes USING GIN(content_tsv);
+CREATE INDEX idx_documents_embedding ON documents
+    USING hnsw (content_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_notes_embedding ON meeting_notes
+    USING hnsw (content_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_document_chunks_embedding ON document_chunks
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX idx_note_chunks_embedding ON note_chunks
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+COMMIT;
+
+-- Autovacuum analyzes the partitions but never the partitioned parents
+ANALYZE documents;
+ANALYZE meeting_notes;
+ANALYZE document_chunks;
+ANALYZE note_chunks;
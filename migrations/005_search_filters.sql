@@ -0,0 +1,15 @@
+-- ABOUTME: Composite B-tree indexes for client- and date-filtered /search requests
+-- ABOUTME: Requires pgvector >= 0.8 for iterative index scans (VECTOR_ITERATIVE_SCAN=off otherwise)
+
+-- Filtered searches first count the matching items (up to EXACT_SEARCH_THRESHOLD)
+-- to choose between exact and index search, and filtered chunk searches look up
+-- the matching parent ids; both are index-only scans with these indexes.
+-- Created on the partitioned parents, so every tenant partition gets them.
+
+CREATE INDEX IF NOT EXISTS idx_documents_client_created ON documents (tenant_id, client_id, created_at) INCLUDE (id);
+CREATE INDEX IF NOT EXISTS idx_documents_created ON documents (tenant_id, created_at) INCLUDE (id);
+CREATE INDEX IF NOT EXISTS idx_notes_client_created ON meeting_notes (tenant_id, client_id, created_at) INCLUDE (id);
+CREATE INDEX IF NOT EXISTS idx_notes_created ON meeting_notes (tenant_id, created_at) INCLUDE (id);
+
+ANALYZE documents;
+ANALYZE meeting_notes;
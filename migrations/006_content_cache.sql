@@ -0,0 +1,21 @@
+-- ABOUTME: Content-hash cache of summaries and chunk embeddings, so re-uploaded content skips inference
+-- ABOUTME: Entries are per tenant; the API evicts least recently used ones beyond CONTENT_CACHE_MAX_BYTES
+
+CREATE TABLE IF NOT EXISTS content_cache (
+    id BIGSERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL REFERENCES tenants(id),
+    content_hash BYTEA NOT NULL,  -- SHA-256 of the normalized content
+    kind TEXT NOT NULL CHECK (kind IN ('summary', 'embedding')),
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    version TEXT NOT NULL,  -- prompt version, chunking parameters, ...
+    value BYTEA NOT NULL,  -- UTF-8 summary, or float32 chunk vectors
+    size_bytes INT NOT NULL,
+    cost_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,  -- time it took to compute the value
+    hits BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_used_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (tenant_id, content_hash, kind, provider, model, version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_content_cache_last_used ON content_cache (last_used_at);
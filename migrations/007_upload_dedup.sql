@@ -0,0 +1,47 @@
+-- ABOUTME: Content-hash and Idempotency-Key columns on documents and meeting_notes, unique per (tenant, client)
+-- ABOUTME: Existing duplicates are kept; only the oldest copy of each content (and document title) gets a hash
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+ALTER TABLE meeting_notes ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+ALTER TABLE meeting_notes ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+
+-- Same normalization as src.utils.content_cache.content_hash (NFC, whitespace runs collapsed
+-- to one space, trimmed). Python also splits on non-ASCII whitespace such as U+00A0, so a
+-- legacy row containing it may not match a re-upload; that only costs one missed dedupe.
+-- Documents hash the title too, as src.utils.dedup.upload_hash does: sha256(title hash || content hash).
+-- Later copies of the same content keep a NULL hash, so the unique indexes can be built;
+-- search can still collapse them with ?collapse_duplicates=true.
+UPDATE documents d SET content_hash = h.content_hash
+FROM (
+    SELECT tenant_id, id, content_hash,
+           row_number() OVER (PARTITION BY tenant_id, client_id, content_hash ORDER BY id) AS copy
+    FROM (
+        SELECT tenant_id, id, client_id,
+               sha256(
+                   sha256(convert_to(btrim(regexp_replace(normalize(title, NFC), '\s+', ' ', 'g')), 'UTF8'))
+                   || sha256(convert_to(btrim(regexp_replace(normalize(content, NFC), '\s+', ' ', 'g')), 'UTF8'))
+               ) AS content_hash
+        FROM documents
+    ) hashed
+) h
+WHERE d.tenant_id = h.tenant_id AND d.id = h.id AND h.copy = 1;
+
+UPDATE meeting_notes n SET content_hash = h.content_hash
+FROM (
+    SELECT tenant_id, id, content_hash,
+           row_number() OVER (PARTITION BY tenant_id, client_id, content_hash ORDER BY id) AS copy
+    FROM (
+        SELECT tenant_id, id, client_id,
+               sha256(convert_to(btrim(regexp_replace(normalize(content, NFC), '\s+', ' ', 'g')), 'UTF8'))
+                   AS content_hash
+        FROM meeting_notes
+    ) hashed
+) h
+WHERE n.tenant_id = h.tenant_id AND n.id = h.id AND h.copy = 1;
+
+-- Created on the partitioned parents (tenant_id leads, as unique indexes there require)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_documents_content_hash ON documents (tenant_id, client_id, content_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_documents_idempotency_key ON documents (tenant_id, client_id, idempotency_key);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_notes_content_hash ON meeting_notes (tenant_id, client_id, content_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_notes_idempotency_key ON meeting_notes (tenant_id, client_id, idempotency_key);
@@ -0,0 +1,98 @@
+"""
+Chunk and embed existing documents and notes that have no rows in
+document_chunks / note_chunks yet (after migrations/003_chunk_embeddings.sql).
+
+Each batch of items is split into passages, all passages are embedded with one
+model call and loaded with binary COPY, and the item's own vector is replaced by the
+normalized mean of its chunk vectors, as new uploads do. Safe to re-run; items
+that already have chunks are skipped.
+
+Usage:
+    python scripts/backfill_chunks.py --batch-size 64
+    python scripts/backfill_chunks.py --type note --keep-item-vectors
+"""
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import bindparam, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import settings  # noqa: E402
+from src.database import SessionLocal, copy_rows  # noqa: E402
+from src.models.database import DocumentChunk, NoteChunk  # noqa: E402
+from src.utils.bulk import CHUNK_COPY_TYPES  # noqa: E402
+from src.utils.chunking import chunk_rows, embed_chunks_batch  # noqa: E402
+from src.utils.embedder import get_embedder  # noqa: E402
+from src.utils.vectors import BinaryVector  # noqa: E402
+
+TARGETS = {
+    "document": ("documents", DocumentChunk, "document_id"),
+    "note": ("meeting_notes", NoteChunk, "note_id"),
+}
+
+
+def backfill(db, embedder, kind: str, batch_size: int, update_item_vectors: bool) -> int:
+    table, chunk_model, parent = TARGETS[kind]
+    select_missing = text(
+        f"""
+        SELECT t.id, t.tenant_id, t.content FROM {table} t
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {chunk_model.__tablename__} c WHERE c.tenant_id = t.tenant_id AND c.{parent} = t.id
+        )
+        ORDER BY t.id LIMIT :limit
+    """
+    )
+    update_vector = text(
+        f"UPDATE {table} SET content_embedding = :embedding WHERE tenant_id = :tenant_id AND id = :id"
+    ).bindparams(bindparam("embedding", type_=BinaryVector(384)))
+
+    done = 0
+    while True:
+        items = db.execute(select_missing, {"limit": batch_size}).fetchall()
+        if not items:
+            return done
+        embedded = embed_chunks_batch(embedder, [item.content for item in items])
+        rows = [
+            (row["tenant_id"], item.id, row["chunk_index"], row["content"], row["embedding"])
+            for item, (chunks, vectors, _) in zip(items, embedded)
+            for row in chunk_rows(chunks, vectors, item.tenant_id)
+        ]
+        columns = ("tenant_id", parent, "chunk_index", "content", "embedding")
+        copy_rows(db, chunk_model.__tablename__, columns, CHUNK_COPY_TYPES, rows)
+        if update_item_vectors:
+            pooled_rows = [
+                {"tenant_id": item.tenant_id, "id": item.id, "embedding": pooled}
+                for item, (_, _, pooled) in zip(items, embedded)
+            ]
+            db.execute(update_vector, pooled_rows)
+        db.commit()
+        done += len(items)
+        print(f"  {kind}s: {done} backfilled ({len(rows)} chunks in last batch)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--type", choices=sorted(TARGETS), help="Only backfill this item type")
+    parser.add_argument("--batch-size", type=int, default=64, help="Items per embedding call and commit")
+    parser.add_argument(
+        "--keep-item-vectors", action="store_true", help="Don't replace content_embedding with the pooled vector"
+    )
+    args = parser.parse_args()
+
+    embedder = get_embedder(settings.embeddings_provider)
+    db = SessionLocal()
+    try:
+        for kind in [args.type] if args.type else list(TARGETS):
+            start = time.perf_counter()
+            count = backfill(db, embedder, kind, args.batch_size, not args.keep_item_vectors)
+            print(f"{kind}s: {count} items in {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
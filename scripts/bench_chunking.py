@@ -0,0 +1,165 @@
+"""
+Recall and index size of one-vector-per-item vs chunked embeddings on long documents.
+
+Generates long synthetic filings with one distinctive "needle" sentence at a
+random position, embeds them with the configured model and loads them into
+scratch tables in a ``bench_chunking`` schema with HNSW indexes. Each needle's
+query should retrieve its parent document; recall@k is reported for:
+
+  document-truncated  one vector from the full text (the model truncates at 256 tokens)
+  document-pooled     one vector, the normalized mean of the chunk vectors
+  chunk-max / -sum    nearest chunks pooled to parents by max / sum of similarity
+
+Usage (requires a database with the vector extension and the embedding model):
+    python scripts/bench_chunking.py --docs 500 --words 2000 --k 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import settings  # noqa: E402
+from src.database import engine  # noqa: E402
+from src.utils.chunking import embed_chunks_batch, pool_chunk_scores  # noqa: E402
+from src.utils.embedder import get_embedder  # noqa: E402
+
+FILLER = [
+    "The portfolio remained within its target allocation ranges for the quarter.",
+    "Management fees were assessed according to the advisory agreement on file.",
+    "Market volatility increased late in the period as rates moved higher.",
+    "No changes were made to the beneficiary designations during this review.",
+    "The client confirmed their risk tolerance and time horizon are unchanged.",
+    "Cash balances were swept into the money market fund at month end.",
+    "Dividend income was reinvested in accordance with standing instructions.",
+    "Tax lots were reviewed for harvesting opportunities but none were material.",
+]
+NAMES = ["Alvarez", "Brennan", "Chowdhury", "Dubois", "Eriksen", "Fujita", "Gallagher", "Haddad", "Ivanova", "Jensen"]
+ASSETS = ["municipal bonds", "a REIT", "gold futures", "a 529 plan", "an annuity", "farmland", "biotech options"]
+ACCOUNTS = ["Roth IRA", "SEP IRA", "trust account", "HSA", "joint brokerage account", "401(k)"]
+
+
+def make_corpus(rng, docs: int, words: int):
+    corpus, queries = [], []
+    for i in range(docs):
+        name, asset, account = rng.choice(NAMES), rng.choice(ASSETS), rng.choice(ACCOUNTS)
+        amount = int(rng.integers(10, 990)) * 1000
+        needle = f"{name} moved ${amount:,} into {asset} held in the {account}."
+        sentences = []
+        while sum(len(s.split()) for s in sentences) < words:
+            sentences.append(str(rng.choice(FILLER)))
+        sentences.insert(int(rng.integers(0, len(sentences))), needle)
+        corpus.append(" ".join(sentences))
+        queries.append((i, f"{name} ${amount:,} {asset} {account}"))
+    return corpus, queries
+
+
+SCHEMA = """
+    DROP SCHEMA IF EXISTS bench_chunking CASCADE;
+    CREATE SCHEMA bench_chunking;
+    CREATE TABLE bench_chunking.items_truncated (id INT PRIMARY KEY, embedding vector(384));
+    CREATE TABLE bench_chunking.items_pooled (id INT PRIMARY KEY, embedding vector(384));
+    CREATE TABLE bench_chunking.chunks (id BIGSERIAL PRIMARY KEY, item_id INT, embedding vector(384));
+"""
+INDEXED_TABLES = ["items_truncated", "items_pooled", "chunks"]
+
+
+def knn(table: str, column: str):
+    return text(
+        f"SELECT {column} AS id, embedding <=> :embedding AS distance "
+        f"FROM bench_chunking.{table} ORDER BY distance LIMIT :limit"
+    ).bindparams(bindparam("embedding", type_=Vector(384)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--words", type=int, default=2000, help="Approximate words per document")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Keep the bench_chunking schema afterwards")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    corpus, queries = make_corpus(rng, args.docs, args.words)
+    embedder = get_embedder(settings.embeddings_provider)
+
+    start = time.perf_counter()
+    truncated = embedder.encode_batch(corpus)
+    embedded = embed_chunks_batch(embedder, corpus)
+    chunk_count = sum(len(chunks) for chunks, _, _ in embedded)
+    print(
+        f"Embedded {args.docs} docs / {chunk_count} chunks "
+        f"({chunk_count / args.docs:.1f} per doc) in {time.perf_counter() - start:.1f}s"
+    )
+    query_vectors = embedder.encode_batch([q for _, q in queries])
+
+    vector = bindparam("embedding", type_=Vector(384))
+    with engine.begin() as conn:
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(text(statement))
+        conn.execute(
+            text("INSERT INTO bench_chunking.items_truncated VALUES (:id, :embedding)").bindparams(vector),
+            [{"id": i, "embedding": v} for i, v in enumerate(truncated)],
+        )
+        conn.execute(
+            text("INSERT INTO bench_chunking.items_pooled VALUES (:id, :embedding)").bindparams(vector),
+            [{"id": i, "embedding": pooled} for i, (_, _, pooled) in enumerate(embedded)],
+        )
+        conn.execute(
+            text("INSERT INTO bench_chunking.chunks (item_id, embedding) VALUES (:id, :embedding)").bindparams(vector),
+            [{"id": i, "embedding": v} for i, (_, vectors, _) in enumerate(embedded) for v in vectors],
+        )
+        for table in INDEXED_TABLES:
+            conn.execute(
+                text(
+                    f"CREATE INDEX {table}_hnsw ON bench_chunking.{table} "
+                    "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+                )
+            )
+        sizes = {
+            table: conn.execute(text(f"SELECT pg_relation_size('bench_chunking.{table}_hnsw')")).scalar()
+            for table in INDEXED_TABLES
+        }
+
+    layouts = {
+        "document-truncated": ("items_truncated", None),
+        "document-pooled": ("items_pooled", None),
+        "chunk-max": ("chunks", "max"),
+        "chunk-sum": ("chunks", "sum"),
+    }
+    print(f"{'layout':>18} | recall@{args.k} | mean latency | index size")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT set_config('hnsw.ef_search', :value, false)"), {"value": str(max(40, args.k * 8))})
+        for layout, (table, pooling) in layouts.items():
+            column = "item_id" if pooling else "id"
+            limit = args.k * settings.chunk_candidate_multiplier if pooling else args.k
+            statement = knn(table, column)
+            hits, latency = [], []
+            for (expected, _), query_vector in zip(queries, query_vectors):
+                began = time.perf_counter()
+                rows = conn.execute(statement, {"embedding": query_vector, "limit": limit}).fetchall()
+                latency.append(time.perf_counter() - began)
+                if pooling:
+                    ranked = [i for i, _ in pool_chunk_scores(((r.id, 1 - r.distance) for r in rows), pooling)]
+                else:
+                    ranked = [r.id for r in rows]
+                hits.append(expected in ranked[: args.k])
+            print(
+                f"{layout:>18} | {statistics.mean(hits):>9.3f} | {statistics.mean(latency) * 1000:>10.1f}ms | "
+                f"{sizes[table] / 1024 / 1024:.1f} MB"
+            )
+        if not args.keep:
+            conn.execute(text("DROP SCHEMA bench_chunking CASCADE"))
+            conn.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+CPU latency, throughput and parity of the embedding providers.
+
+For each provider, measures single-query latency (the search path) and
+batched throughput (the ingest path) on synthetic advisor text, and the
+cosine similarity of its vectors to the first provider listed (the PyTorch
+``local`` provider by default).
+
+Usage:
+    python scripts/bench_embedders.py --providers local onnx onnx_int8 --batch-size 32 --texts 512
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.embedder import get_embedder  # noqa: E402
+
+SENTENCES = [
+    "Client asked about Roth conversion timing and required minimum distributions.",
+    "Equities returned 7.2% against a 6.1% benchmark for the quarter.",
+    "The advisor recommended rebalancing bonds toward short duration treasuries.",
+    "Beneficiary designations on the rollover IRA need to be updated after the divorce.",
+    "Discussed funding the 529 plan and the impact on financial aid eligibility.",
+    "Estate attorney will draft a revocable trust; review titling of the brokerage account.",
+]
+
+
+def make_texts(count: int, rng) -> list:
+    # Mix short queries with paragraph-length notes
+    texts = []
+    for i in range(count):
+        sentences = rng.choice(SENTENCES, size=int(rng.integers(1, 8)))
+        texts.append(f"Item {i}. " + " ".join(sentences))
+    return texts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", nargs="+", default=["local", "onnx", "onnx_int8"])
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    texts = make_texts(args.texts, rng)
+    queries = [str(rng.choice(SENTENCES)) for _ in range(args.queries)]
+
+    reference = None
+    print(f"{'provider':>10} | load | query p50 | query p95 | batch texts/s | min cos | mean cos")
+    for provider in args.providers:
+        start = time.perf_counter()
+        embedder = get_embedder(provider)
+        embedder.warm_up()
+        load = time.perf_counter() - start
+
+        latency = []
+        for query in queries:
+            began = time.perf_counter()
+            embedder.encode(query)
+            latency.append(time.perf_counter() - began)
+        latency.sort()
+
+        began = time.perf_counter()
+        vectors = np.concatenate(
+            [embedder.encode_batch(texts[i : i + args.batch_size]) for i in range(0, len(texts), args.batch_size)]
+        )
+        throughput = len(texts) / (time.perf_counter() - began)
+
+        if reference is None:
+            reference = vectors
+        similarities = np.sum(reference * vectors, axis=1)
+        print(
+            f"{provider:>10} | {load:>4.1f}s | {statistics.median(latency) * 1000:>7.2f}ms | "
+            f"{latency[int(0.95 * (len(latency) - 1))] * 1000:>7.2f}ms | {throughput:>13.1f} | "
+            f"{similarities.min():.4f} | {similarities.mean():.4f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Recall and latency of filtered vector search: post-filtered ANN, iterative
+index scans, exact search over the filtered rows, and the automatic choice
+/search makes between them.
+
+Seeds a synthetic tenant whose documents are spread over --clients clients and
+the last --days days, then runs each strategy's statement (the one
+src.api.search uses for SEARCH_MODE=python, document granularity) with a
+client filter and with a client + date range filter:
+
+  post-filter  HNSW scan with iterative scans off; rows failing the filter are dropped
+  iterative    HNSW scan with hnsw.iterative_scan = relaxed_order
+  exact        distance computed for every filtered row, no vector index
+  auto         exact below EXACT_SEARCH_THRESHOLD matching rows, iterative above
+
+Recall@k is measured against the exact results. "rows" is the mean number of
+results returned; post-filtering often returns fewer than k.
+
+Usage (requires a database initialised with init.sql and migrations/005):
+    python scripts/bench_filtered_search.py --rows 200000 --clients 500
+    python scripts/bench_filtered_search.py --clients 50 --ef-search 40 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.api.search import (  # noqa: E402
+    EXACT_SEARCH,
+    SearchFilters,
+    _plan_filtered_search,
+    _vector_search_query,
+)
+from src.config import settings  # noqa: E402
+from src.database import SessionLocal  # noqa: E402
+
+STRATEGIES = ("post-filter", "iterative", "exact", "auto")
+SEED_CLIENTS_SQL = """
+    INSERT INTO clients (tenant_id, first_name, last_name, email)
+    SELECT :tenant_id, 'Bench', 'Client ' || g, 'bench-filtered-' || g || '@example.com'
+    FROM generate_series(1, :clients) g
+    ON CONFLICT (tenant_id, email) DO NOTHING
+"""
+SEED_DOCUMENTS_SQL = """
+    INSERT INTO documents (tenant_id, client_id, title, content, summary, created_at, content_embedding)
+    SELECT :tenant_id, (:client_ids)[1 + floor(random() * cardinality(:client_ids))::int],
+           'Synthetic document ' || g, 'Synthetic filtered benchmark row', 'Synthetic benchmark row',
+           now() - random() * make_interval(days => :days),
+           (SELECT array_agg(random() - 0.5 + g * 0) FROM generate_series(1, 384))::vector
+    FROM generate_series(1, :count) g
+"""
+
+
+def seed(db, args) -> list:
+    db.execute(
+        text("INSERT INTO tenants (id, name) VALUES (:t, 'Filtered Benchmark Tenant') ON CONFLICT (id) DO NOTHING"),
+        {"t": args.tenant_id},
+    )
+    db.execute(text(SEED_CLIENTS_SQL), {"tenant_id": args.tenant_id, "clients": args.clients})
+    client_ids = list(
+        db.execute(
+            text("SELECT id FROM clients WHERE tenant_id = :t AND email LIKE 'bench-filtered-%' ORDER BY id"),
+            {"t": args.tenant_id},
+        ).scalars()
+    )
+    existing = db.execute(text("SELECT count(*) FROM documents WHERE tenant_id = :t"), {"t": args.tenant_id}).scalar()
+    for offset in range(0, max(args.rows - existing, 0), 50000):
+        batch = min(50000, args.rows - existing - offset)
+        print(f"  seeding {batch} documents...")
+        db.execute(
+            text(SEED_DOCUMENTS_SQL),
+            {"tenant_id": args.tenant_id, "client_ids": client_ids, "days": args.days, "count": batch},
+        )
+        db.commit()
+    db.execute(text("ANALYZE documents"))
+    db.commit()
+    return client_ids
+
+
+def search(db, strategy: str, embedding, filters: SearchFilters, args) -> list:
+    db.execute(text("SELECT set_config('hnsw.ef_search', :ef, true)"), {"ef": str(args.current_ef_search)})
+    if strategy == "auto":
+        exact = "document" in _plan_filtered_search(db, args.tenant_id, filters)
+    else:
+        exact = strategy == "exact"
+        scan = "relaxed_order" if strategy == "iterative" else "off"
+        db.execute(text("SELECT set_config('hnsw.iterative_scan', :scan, true)"), {"scan": scan})
+    statement = _vector_search_query(
+        "document", settings.vector_metric, EXACT_SEARCH if exact else "none", "document", filters.columns
+    )
+    params = {"embedding": embedding, "tenant_id": args.tenant_id, "limit": args.k, **filters.params()}
+    return [row.id for row in db.execute(statement, params)]
+
+
+def run(db, strategy: str, cases: list, exact: list, args) -> tuple:
+    recalls, counts, samples = [], [], []
+    for (embedding, filters), truth in zip(cases, exact):
+        start = time.perf_counter()
+        ids = search(db, strategy, embedding, filters, args)
+        samples.append(time.perf_counter() - start)
+        db.rollback()
+        counts.append(len(ids))
+        recalls.append(len(set(ids) & truth) / len(truth) if truth else 1.0)
+    samples.sort()
+    return statistics.mean(recalls), statistics.mean(counts), statistics.median(samples), samples[
+        int(0.95 * (len(samples) - 1))
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--tenant-id", type=int, default=9002)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40])
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(20)
+    db = SessionLocal()
+    try:
+        client_ids = seed(db, args)
+        recent = datetime.now(timezone.utc) - timedelta(days=90)
+        shapes = {
+            "client": lambda client_id: SearchFilters(client_id=client_id),
+            "client+90d": lambda client_id: SearchFilters(client_id=client_id, created_after=recent),
+        }
+        print(f"{args.rows} documents over {len(client_ids)} clients and {args.days} days, {args.queries} queries")
+        print(f"{'filter':>10} | {'strategy':>11} | ef_search | recall@{args.k} | rows | p50 | p95")
+        for shape, make_filters in shapes.items():
+            cases = []
+            for client_id in rng.choice(client_ids, size=args.queries):
+                vector = rng.standard_normal(384).astype(np.float32)
+                cases.append((vector / np.linalg.norm(vector), make_filters(int(client_id))))
+            args.current_ef_search = args.ef_search[0]
+            exact = [set(search(db, "exact", embedding, filters, args)) for embedding, filters in cases]
+            db.rollback()
+            for ef_search in args.ef_search:
+                args.current_ef_search = ef_search
+                for strategy in args.strategies:
+                    recall, rows, p50, p95 = run(db, strategy, cases, exact, args)
+                    print(
+                        f"{shape:>10} | {strategy:>11} | {ef_search:>9} | {recall:>9.3f} | {rows:>4.1f} | "
+                        f"{p50 * 1000:.2f}ms | {p95 * 1000:.2f}ms"
+                    )
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Cold-start import time of the API entrypoints, with a regression threshold.
+
+Runs ``python -X importtime -c "import <module>"`` in fresh interpreters,
+reports the best total of ``--runs`` attempts and the entrypoint's slowest
+direct imports, and checks that the search-only entrypoint never loads the
+summarization or torch stacks. Exits 1 when a threshold or the import
+guard fails, so it can run in CI.
+
+Each entrypoint must import within --max-ms (default 2000ms; 0 disables the
+budget).
+
+Usage:
+    python scripts/bench_import_time.py
+    python scripts/bench_import_time.py --module src.search_main --max-ms 1500 --runs 5
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+# Import-time budget per entrypoint; a clean checkout imports in about 1.5s
+DEFAULT_MAX_MS = 2000.0
+# Modules a search-only replica must not import
+SEARCH_FORBIDDEN = ("torch", "transformers", "sentence_transformers", "nltk", "sumy", "src.utils.gemini")
+
+
+def measure(module: str):
+    """Return (total us, [(cumulative us, name)] for the entrypoint's direct imports, set of modules)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    total, direct, modules = 0, [], set()
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.add(name)
+        # Nesting is two spaces per level: 1 = imported by -c, 3 = imported by the entrypoint
+        if len(indent) == 1:
+            total += int(cumulative)
+        elif len(indent) == 3:
+            direct.append((int(cumulative), name))
+    return total, direct, modules
+
+
+def forbidden(modules) -> list:
+    return sorted(
+        name for name in modules if any(name == root or name.startswith(root + ".") for root in SEARCH_FORBIDDEN)
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", nargs="+", default=["src.search_main", "src.main"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=DEFAULT_MAX_MS,
+        help="Fail when the best total exceeds this (applies to each module; 0 disables)",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.module:
+        runs = [measure(module) for _ in range(args.runs)]
+        total, direct, modules = min(runs, key=lambda run: run[0])
+        print(f"{module}: {total / 1000:.0f}ms (best of {args.runs}), slowest imports:")
+        for us, name in sorted(direct, reverse=True)[: args.top]:
+            print(f"  {us / 1000:>8.1f}ms  {name}")
+
+        if module == "src.search_main":
+            leaked = forbidden(modules)
+            if leaked:
+                print(f"  FAIL: search entrypoint imported {', '.join(leaked[:10])}")
+                failed = True
+        if args.max_ms > 0 and total / 1000 > args.max_ms:
+            print(f"  FAIL: {total / 1000:.0f}ms exceeds --max-ms {args.max_ms:.0f}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Latency of deeper search pages served from a snapshot versus re-running the search.
+
+For each query the first page runs the configured search backend once
+(retrieval, fusion, first-page hydration) and keeps its SearchSnapshot, as
+GET /search does. Each later page is then timed two ways:
+
+  snapshot   hydrate only that page's rows from the kept ranking (what ?cursor= does)
+  rerun      run the whole backend again and hydrate up to that page (what an
+             offset-based client would cost without snapshots)
+
+Usage (requires a database with data, e.g. the tenant seeded by scripts/bench_search_modes.py):
+    TENANT_ID=9001 python scripts/bench_pagination.py --pages 5 --limit 20
+    TENANT_ID=9001 SEARCH_MODE=sql python scripts/bench_pagination.py --candidate-depth 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.api.search import SEARCH_BACKENDS, SearchOptions, _hydrate  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.database import SessionLocal  # noqa: E402
+
+QUERIES = ["retirement plan", "portfolio rebalancing", "Roth conversion", "tax deduction", "dividend income"]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--candidate-depth", type=int, default=None)
+    args = parser.parse_args()
+
+    backend = SEARCH_BACKENDS[settings.search_mode]
+    options = SearchOptions(candidate_depth=args.candidate_depth)
+    rng = np.random.default_rng(21)
+    first, snapshot_pages, rerun_pages = [], {}, {}
+    db = SessionLocal()
+    try:
+        for i in range(args.iterations + 5):
+            q = QUERIES[i % len(QUERIES)]
+            embedding = rng.standard_normal(384).astype(np.float32)
+            embedding /= np.linalg.norm(embedding)
+            start = time.perf_counter()
+            snapshot = backend(db, q, None, embedding, options, settings.tenant_id, None, args.limit)
+            elapsed = time.perf_counter() - start
+            db.rollback()
+            warm = i >= 5  # the first runs plan and prepare
+            if warm:
+                first.append(elapsed)
+            for page_number in range(2, args.pages + 1):
+                offset = (page_number - 1) * args.limit
+                page = snapshot.ranking[offset : offset + args.limit]
+                if not page:
+                    break
+                start = time.perf_counter()
+                _hydrate(db, page, settings.tenant_id)
+                snapshot_elapsed = time.perf_counter() - start
+                db.rollback()
+                start = time.perf_counter()
+                backend(db, q, None, embedding, options, settings.tenant_id, None, offset + args.limit)
+                rerun_elapsed = time.perf_counter() - start
+                db.rollback()
+                if warm:
+                    snapshot_pages.setdefault(page_number, []).append(snapshot_elapsed)
+                    rerun_pages.setdefault(page_number, []).append(rerun_elapsed)
+    finally:
+        db.close()
+
+    print(f"SEARCH_MODE={settings.search_mode}, limit={args.limit}, candidate_depth={options.depth}")
+    print(f"page 1: p50 {statistics.median(first) * 1000:.2f}ms, p95 {percentile(first, 0.95) * 1000:.2f}ms")
+    print(f"{'page':>4} | {'queries':>7} | snapshot p50 | snapshot p95 | rerun p50 | rerun p95")
+    for page_number, samples in snapshot_pages.items():
+        rerun = rerun_pages[page_number]
+        print(
+            f"{page_number:>4} | {len(samples):>7} | {statistics.median(samples) * 1000:>10.2f}ms | "
+            f"{percentile(samples, 0.95) * 1000:>10.2f}ms | {statistics.median(rerun) * 1000:>7.2f}ms | "
+            f"{percentile(rerun, 0.95) * 1000:>7.2f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Per-query overhead of the SEARCH_MODE=python statements with and without
+server-side prepared statements and binary vector parameters.
+
+Runs the FTS, vector and hydration statements of one search in a loop on a
+single connection, for each variant:
+
+  text        prepare_threshold=None, embedding sent as a '[0.1,...]' literal (the old path)
+  prepared    statements prepared on first use, embedding still text
+  binary      prepared, embedding sent in pgvector's binary format (the default path)
+
+Reported times are per search (6 statements) and include the round trips,
+so the difference between variants is parse/plan and serialization overhead.
+
+Usage (requires a database with data, e.g. the tenant seeded by scripts/bench_search_modes.py):
+    TENANT_ID=9001 python scripts/bench_prepared_statements.py --iterations 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.api.search import (  # noqa: E402
+    CANDIDATE_LIMIT,
+    FTS_SEARCH_QUERIES,
+    HYDRATE_QUERIES,
+    RESULT_LIMIT,
+    VECTOR_SEARCH_QUERIES,
+)
+from src.config import settings  # noqa: E402
+from src.database import create_db_engine  # noqa: E402
+
+VARIANTS = {
+    "text": {"prepare_threshold": None, "binary": False},
+    "prepared": {"prepare_threshold": 0, "binary": False},
+    "binary": {"prepare_threshold": 0, "binary": True},
+}
+QUERIES = ["retirement plan", "portfolio rebalancing", "Roth conversion", "tax deduction", "dividend income"]
+
+
+def vector_statement(kind: str, binary: bool):
+    statement = VECTOR_SEARCH_QUERIES[(kind, settings.vector_metric, settings.vector_quantization)]
+    # pgvector's own type formats the embedding as text in Python
+    return statement if binary else statement.bindparams(bindparam("embedding", type_=Vector(384)))
+
+
+def run_variant(variant: dict, iterations: int, rng) -> list:
+    config = settings.model_copy(update={"db_prepare_threshold": variant["prepare_threshold"], "db_pool_size": 1})
+    engine = create_db_engine(config)
+    vector = {kind: vector_statement(kind, variant["binary"]) for kind in FTS_SEARCH_QUERIES}
+    samples = []
+    with engine.connect() as conn:
+        for i in range(iterations + 20):
+            embedding = rng.standard_normal(384).astype(np.float32)
+            embedding /= np.linalg.norm(embedding)
+            params = {
+                "query": QUERIES[i % len(QUERIES)],
+                "tenant_id": settings.tenant_id,
+                "limit": CANDIDATE_LIMIT,
+                "rerank_multiplier": settings.binary_rerank_multiplier,
+            }
+            start = time.perf_counter()
+            for kind in ("document", "note"):
+                ids = [row.id for row in conn.execute(FTS_SEARCH_QUERIES[kind], params)]
+                ids += [row.id for row in conn.execute(vector[kind], {**params, "embedding": embedding})]
+                hydrate = {"ids": ids[:RESULT_LIMIT], "tenant_id": settings.tenant_id}
+                conn.execute(HYDRATE_QUERIES[kind], hydrate).fetchall()
+            conn.rollback()
+            if i >= 20:  # the first runs plan and prepare
+                samples.append(time.perf_counter() - start)
+    engine.dispose()
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=list(VARIANTS))
+    args = parser.parse_args()
+
+    print(f"{'variant':>9} | mean/search | p50/search | p95/search")
+    baseline = None
+    for name in args.variants:
+        samples = sorted(run_variant(VARIANTS[name], args.iterations, np.random.default_rng(5)))
+        mean = statistics.mean(samples)
+        baseline = baseline or mean
+        print(
+            f"{name:>9} | {mean * 1000:>9.3f}ms | {statistics.median(samples) * 1000:>8.3f}ms | "
+            f"{samples[int(0.95 * (len(samples) - 1))] * 1000:>8.3f}ms  ({mean / baseline:.2f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
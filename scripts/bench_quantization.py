@@ -0,0 +1,169 @@
+"""
+Index size, build time, recall and latency of float32, halfvec and binary-quantized
+HNSW indexes over the same embeddings.
+
+Vectors are loaded into a scratch schema (synthetic clustered unit vectors, or
+copied from --from-table), an HNSW index is built per quantization, and each
+query runs the statement src.api.search uses for that quantization. Recall@k is
+measured against an exact (sequential scan) search on the float32 vectors; the
+binary index re-ranks rerank-multiplier x k Hamming candidates with the float32
+vectors, so both multipliers and ef_search are worth sweeping.
+
+Usage:
+    python scripts/bench_quantization.py --rows 100000 --queries 200
+    python scripts/bench_quantization.py --from-table document_chunks --column embedding
+    python scripts/bench_quantization.py --rerank-multipliers 2 4 8 --ef-search 40 100
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.api.search import (  # noqa: E402
+    EMBEDDING_DIM,
+    VECTOR_OPERATORS,
+    VECTOR_QUANTIZATIONS,
+    _nearest_sql,
+    _with_embedding,
+)
+from src.database import SessionLocal, copy_rows  # noqa: E402
+from build_vector_index import index_key  # noqa: E402
+
+SCHEMA = "bench_quantization"
+TABLE = f"{SCHEMA}.items"
+
+
+def clustered_vectors(rows: int, clusters: int, rng) -> np.ndarray:
+    """Unit vectors around random centroids, closer to real embeddings than uniform noise"""
+    centroids = rng.standard_normal((clusters, EMBEDDING_DIM)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, rows)] + 0.35 * rng.standard_normal((rows, EMBEDDING_DIM))
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load(db, args, rng) -> np.ndarray:
+    db.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    db.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    db.execute(text(f"CREATE TABLE {TABLE} (id int PRIMARY KEY, embedding vector({EMBEDDING_DIM}) NOT NULL)"))
+    if args.from_table:
+        db.execute(
+            text(
+                f"INSERT INTO {TABLE} SELECT row_number() OVER (), {args.column} "
+                f"FROM {args.from_table} WHERE {args.column} IS NOT NULL LIMIT :rows"
+            ),
+            {"rows": args.rows},
+        )
+        sample = db.execute(text(f"SELECT embedding FROM {TABLE} ORDER BY random() LIMIT :n"), {"n": args.queries})
+        # Perturb stored vectors so queries aren't exact duplicates of a row
+        queries = np.stack([row.embedding for row in sample])
+        queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    else:
+        vectors = clustered_vectors(args.rows + args.queries, args.clusters, rng)
+        copy_rows(db, TABLE, ("id", "embedding"), ("int4", "vector"), enumerate(vectors[: args.rows], 1))
+        queries = vectors[args.rows :]
+    db.execute(text(f"ANALYZE {TABLE}"))
+    db.commit()
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def exact_neighbours(db, queries, operator: str, k: int) -> list:
+    # Runs before any index exists, so this is a sequential scan
+    statement = _with_embedding(_nearest_sql(TABLE, "id", "embedding", operator, "true", ":limit", "none"))
+    neighbours = [{row.id for row in db.execute(statement, {"embedding": q, "limit": k})} for q in queries]
+    db.rollback()
+    return neighbours
+
+
+def build_index(db, metric: str, quantization: str, args) -> tuple:
+    index = f"{SCHEMA}.items_embedding_idx"
+    db.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    db.execute(text(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'"))
+    start = time.perf_counter()
+    db.execute(
+        text(
+            f"CREATE INDEX items_embedding_idx ON {TABLE} USING hnsw {index_key('embedding', metric, quantization)} "
+            f"WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+        )
+    )
+    db.commit()
+    seconds = time.perf_counter() - start
+    size = db.execute(text("SELECT pg_relation_size(CAST(:index AS regclass))"), {"index": index}).scalar()
+    return seconds, size
+
+
+def run_queries(db, queries, exact, operator: str, quantization: str, ef_search: int, multiplier: int, k: int):
+    statement = _with_embedding(_nearest_sql(TABLE, "id", "embedding", operator, "true", ":limit", quantization))
+    # The first stage returns at most ef_search rows, so it must cover the candidate count
+    candidates = k * multiplier if quantization == "binary" else k
+    params = {"limit": k, "rerank_multiplier": multiplier}
+    recalls, samples = [], []
+    for query, truth in zip(queries, exact):
+        db.execute(text("SELECT set_config('hnsw.ef_search', :ef, true)"), {"ef": str(max(ef_search, candidates))})
+        start = time.perf_counter()
+        ids = {row.id for row in db.execute(statement, {**params, "embedding": query})}
+        samples.append(time.perf_counter() - start)
+        db.rollback()
+        recalls.append(len(ids & truth) / k)
+    samples.sort()
+    return statistics.mean(recalls), statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--from-table", help="Copy vectors from this table instead of generating them")
+    parser.add_argument("--column", default="embedding")
+    parser.add_argument("--metric", choices=sorted(VECTOR_OPERATORS), default="cosine")
+    parser.add_argument("--quantizations", nargs="+", choices=VECTOR_QUANTIZATIONS, default=list(VECTOR_QUANTIZATIONS))
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 100])
+    parser.add_argument("--rerank-multipliers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    parser.add_argument("--keep", action="store_true", help=f"Leave the {SCHEMA} schema in place")
+    args = parser.parse_args()
+
+    operator = VECTOR_OPERATORS[args.metric]
+    db = SessionLocal()
+    try:
+        queries = load(db, args, np.random.default_rng(18))
+        rows = db.execute(text(f"SELECT count(*) FROM {TABLE}")).scalar()
+        heap = db.execute(text(f"SELECT pg_table_size('{TABLE}')")).scalar()
+        shared_buffers = db.execute(text("SHOW shared_buffers")).scalar()
+        print(f"{rows} vectors, table {heap / 2**20:.1f} MiB, shared_buffers {shared_buffers}, {len(queries)} queries")
+        exact = exact_neighbours(db, queries, operator, args.k)
+
+        print(f"{'index':>8} | {'size':>9} | bytes/row | build | ef_search | rerank | recall@{args.k} | p50 | p95")
+        for quantization in args.quantizations:
+            seconds, size = build_index(db, args.metric, quantization, args)
+            multipliers = args.rerank_multipliers if quantization == "binary" else [1]
+            for ef_search in args.ef_search:
+                for multiplier in multipliers:
+                    recall, p50, p95 = run_queries(
+                        db, queries, exact, operator, quantization, ef_search, multiplier, args.k
+                    )
+                    rerank = f"{multiplier}x" if quantization == "binary" else "-"
+                    print(
+                        f"{quantization:>8} | {size / 2**20:>5.1f} MiB | {size / rows:>9.0f} | {seconds:>4.1f}s | "
+                        f"{ef_search:>9} | {rerank:>6} | {recall:>9.3f} | {p50 * 1000:.2f}ms | {p95 * 1000:.2f}ms"
+                    )
+    finally:
+        if not args.keep:
+            db.rollback()
+            db.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            db.commit()
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Response size and time-to-first-byte of /search with full results, ?fields=
+projections and NDJSON streaming.
+
+Each variant runs the same queries against a running API. The result cache is
+bypassed by giving every request a distinct candidate_depth (override with
+--cached to measure cache hits instead). Reported per variant: mean response
+bytes, TTFB (status line and headers plus the first body chunk) and total time.
+
+Usage (requires running API with data):
+    python scripts/bench_search_payload.py --limit 20 --iterations 50
+    python scripts/bench_search_payload.py --url http://localhost:8000 --tenant-id 9001 --limit 100
+"""
+import argparse
+import statistics
+import sys
+import time
+from typing import List
+
+import httpx
+
+QUERIES = ["retirement plan", "portfolio rebalancing", "Roth conversion", "tax deduction", "dividend income"]
+VARIANTS = {
+    "full": ({}, {}),
+    "no-content": ({"fields": "title,summary,client_id,created_at,score"}, {}),
+    "snippets": ({"fields": "title,snippet,score"}, {}),
+    "ndjson": ({}, {"Accept": "application/x-ndjson"}),
+    "ndjson-snippets": ({"fields": "title,snippet,score"}, {"Accept": "application/x-ndjson"}),
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(client: httpx.Client, params: dict, headers: dict) -> tuple:
+    start = time.perf_counter()
+    ttfb, size = None, 0
+    with client.stream("GET", "/search", params=params, headers=headers) as response:
+        response.raise_for_status()
+        for chunk in response.iter_raw():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            size += len(chunk)
+    return size, ttfb if ttfb is not None else time.perf_counter() - start, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--tenant-id", type=int, help="Sent as X-Tenant-ID")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--cached", action="store_true", help="Repeat identical requests so they hit the cache")
+    args = parser.parse_args()
+
+    base_headers = {"X-Tenant-ID": str(args.tenant_id)} if args.tenant_id else {}
+    print(f"{'variant':>15} | {'bytes':>9} | ttfb p50 | ttfb p95 | total p50 | total p95")
+    with httpx.Client(base_url=args.url, timeout=60.0, headers=base_headers) as client:
+        for depth_offset, name in enumerate(args.variants):
+            extra_params, headers = VARIANTS[name]
+            sizes, ttfbs, totals = [], [], []
+            for i in range(args.iterations):
+                params = {"q": QUERIES[i % len(QUERIES)], "limit": args.limit, **extra_params}
+                if not args.cached:
+                    # Distinct cache keys (depths within the API's bounds) without changing ranking much
+                    params["candidate_depth"] = 50 + (i + depth_offset * args.iterations) % 400
+                size, ttfb, total = measure(client, params, headers)
+                sizes.append(size)
+                ttfbs.append(ttfb)
+                totals.append(total)
+            print(
+                f"{name:>15} | {statistics.mean(sizes):>9.0f} | {percentile(ttfbs, 50) * 1000:>6.1f}ms | "
+                f"{percentile(ttfbs, 95) * 1000:>6.1f}ms | {percentile(totals, 50) * 1000:>7.1f}ms | "
+                f"{percentile(totals, 95) * 1000:>7.1f}ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
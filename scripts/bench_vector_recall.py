@@ -0,0 +1,96 @@
+"""
+Recall@k and latency of approximate vector search against exact search.
+
+For each ef_search (HNSW) or probes (IVFFlat) value, runs the same tenant-
+filtered nearest-neighbour query the API uses and compares it to an exact
+scan with index scans disabled.
+
+Usage (requires seeded data, e.g. from bench_search_modes.py):
+    python scripts/bench_vector_recall.py --tenant-id 9001 --k 10 --values 10 20 40 80 160
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import settings  # noqa: E402
+from src.database import SessionLocal  # noqa: E402
+
+OPERATORS = {"cosine": "<=>", "inner_product": "<#>"}
+KNOBS = {"hnsw": "hnsw.ef_search", "ivfflat": "ivfflat.probes"}
+
+
+def knn_query(table: str, operator: str):
+    return text(
+        f"""
+        SELECT id FROM {table}
+        WHERE tenant_id = :tenant_id
+        ORDER BY content_embedding {operator} :embedding
+        LIMIT :k
+    """
+    ).bindparams(bindparam("embedding", type_=Vector(384)))
+
+
+def run(db, statement, params, knob=None, value=None, exact=False):
+    # Each measurement runs in its own transaction so SET LOCAL stays scoped to it
+    db.rollback()
+    if exact:
+        db.execute(text("SET LOCAL enable_indexscan = off"))
+        db.execute(text("SET LOCAL enable_bitmapscan = off"))
+    elif knob:
+        db.execute(text("SELECT set_config(:name, :value, true)"), {"name": knob, "value": str(value)})
+    start = time.perf_counter()
+    ids = [row.id for row in db.execute(statement, params)]
+    return ids, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant-id", type=int, default=settings.tenant_id)
+    parser.add_argument("--table", choices=["documents", "meeting_notes"], default="documents")
+    parser.add_argument("--index", choices=sorted(KNOBS), default=settings.vector_index)
+    parser.add_argument("--metric", choices=sorted(OPERATORS), default=settings.vector_metric)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--values", type=int, nargs="+", default=[10, 20, 40, 80, 160, 320])
+    args = parser.parse_args()
+
+    statement = knn_query(args.table, OPERATORS[args.metric])
+    rng = np.random.default_rng(7)
+    db = SessionLocal()
+    try:
+        queries = []
+        for _ in range(args.queries):
+            vector = rng.standard_normal(384).astype(np.float32)
+            queries.append({"tenant_id": args.tenant_id, "embedding": vector / np.linalg.norm(vector), "k": args.k})
+
+        truth, exact_latency = [], []
+        for params in queries:
+            ids, elapsed = run(db, statement, params, exact=True)
+            truth.append(set(ids))
+            exact_latency.append(elapsed)
+        print(f"exact: mean={statistics.mean(exact_latency) * 1000:.1f}ms")
+
+        knob = KNOBS[args.index]
+        print(f"{knob:>16} | recall@{args.k} | mean latency")
+        for value in args.values:
+            recalls, latency = [], []
+            for params, expected in zip(queries, truth):
+                ids, elapsed = run(db, statement, params, knob=knob, value=value)
+                recalls.append(len(expected & set(ids)) / max(1, len(expected)))
+                latency.append(elapsed)
+            print(f"{value:>16} | {statistics.mean(recalls):>9.3f} | {statistics.mean(latency) * 1000:.1f}ms")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
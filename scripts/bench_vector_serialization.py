@@ -0,0 +1,99 @@
+"""
+Serialization cost of embeddings between the app and pgvector, per 1k vectors.
+
+Compares, for 384-d float32 vectors:
+
+  text            pgvector.sqlalchemy's '[0.1,...]' strings (the old path), parsed back into lists
+  text-numpy      the same strings, parsed with numpy (the loader used when results arrive as text)
+  pgvector-binary pgvector's psycopg binary adapters (copies through its Vector class)
+  numpy-binary    src.utils.vectors: one vectorized byteswap each way, float32 arrays out
+
+With --database it also loads the same vectors into a temporary table with an
+executemany INSERT of text literals and with binary COPY, as bulk ingest does.
+
+Usage:
+    python scripts/bench_vector_serialization.py --vectors 10000
+    python scripts/bench_vector_serialization.py --vectors 10000 --database
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from pgvector import Vector
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.vectors import dump_vector_binary, load_vector_binary, load_vector_text  # noqa: E402
+
+CODECS = {
+    "text": (lambda v: Vector._to_db(v).encode(), lambda b: Vector._from_text(b.decode())),
+    "text-numpy": (lambda v: Vector._to_db(v).encode(), load_vector_text),
+    "pgvector-binary": (lambda v: Vector(v).to_binary(), lambda b: Vector.from_binary(b).to_numpy()),
+    "numpy-binary": (dump_vector_binary, load_vector_binary),
+}
+
+
+def ms_per_thousand(fn, values) -> float:
+    start = time.perf_counter()
+    for value in values:
+        fn(value)
+    return (time.perf_counter() - start) / len(values) * 1000 * 1000
+
+
+def bench_codecs(vectors) -> None:
+    print(f"{'codec':>15} | encode/1k | decode/1k | bytes/vector")
+    for name, (encode, decode) in CODECS.items():
+        encoded = [encode(v) for v in vectors]
+        encode_ms = ms_per_thousand(encode, vectors)
+        decode_ms = ms_per_thousand(decode, encoded)
+        print(f"{name:>15} | {encode_ms:>7.2f}ms | {decode_ms:>7.2f}ms | {len(encoded[0]):>12}")
+
+
+def bench_database(vectors) -> None:
+    from pgvector.sqlalchemy import Vector as VectorType
+    from sqlalchemy import bindparam, text
+
+    from src.database import SessionLocal, copy_rows
+
+    db = SessionLocal()
+    try:
+        db.execute(text("CREATE TEMP TABLE bench_vectors (id int, embedding vector(384))"))
+        insert = text("INSERT INTO bench_vectors VALUES (:id, :embedding)").bindparams(
+            bindparam("embedding", type_=VectorType(384))
+        )
+        start = time.perf_counter()
+        db.execute(insert, [{"id": i, "embedding": v} for i, v in enumerate(vectors)])
+        executemany = time.perf_counter() - start
+        db.execute(text("TRUNCATE bench_vectors"))
+
+        start = time.perf_counter()
+        copy_rows(db, "bench_vectors", ("id", "embedding"), ("int4", "vector"), enumerate(vectors))
+        copy = time.perf_counter() - start
+        db.rollback()
+    finally:
+        db.close()
+
+    for name, seconds in (("executemany (text)", executemany), ("COPY (binary)", copy)):
+        print(f"{name:>19}: {seconds * 1000 / len(vectors) * 1000:8.2f}ms/1k  {len(vectors) / seconds:>10.0f} rows/s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=10000)
+    parser.add_argument("--database", action="store_true", help="Also time INSERT vs COPY against DATABASE_URL")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(17)
+    vectors = rng.standard_normal((args.vectors, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    bench_codecs(list(vectors))
+    if args.database:
+        bench_database(list(vectors))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
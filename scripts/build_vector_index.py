@@ -0,0 +1,123 @@
+"""
+(Re)build the document, note and chunk vector indexes.
+
+HNSW needs no training and is the default (see migrations/001_hnsw_cosine_indexes.sql).
+IVFFlat clusters the rows that exist when the index is built, so only build it
+after loading data; lists defaults to rows/1000 (sqrt(rows) above 1M rows),
+following the pgvector guidance. Set VECTOR_INDEX / VECTOR_METRIC to match.
+
+--quantization builds the index on an expression instead of the float32 column:
+halfvec (2 bytes per dimension) or a binary_quantize() bit string (1 bit per
+dimension, Hamming distance, re-ranked with the float32 vectors at query time).
+The table keeps the float32 vectors either way. Set VECTOR_QUANTIZATION to match.
+
+The item and chunk tables are partitioned by tenant: the index is created on the
+parent only, then built concurrently on each partition (IVFFlat lists sized from
+that partition's rows) and attached, so every tenant gets its own index.
+
+Usage:
+    python scripts/build_vector_index.py --index hnsw --metric cosine
+    python scripts/build_vector_index.py --index ivfflat --metric inner_product
+    python scripts/build_vector_index.py --quantization binary
+"""
+import argparse
+import math
+import os
+import sys
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.database import engine  # noqa: E402
+
+OPS = {"cosine": "vector_cosine_ops", "inner_product": "vector_ip_ops"}
+HALFVEC_OPS = {"cosine": "halfvec_cosine_ops", "inner_product": "halfvec_ip_ops"}
+INDEXES = {
+    "documents": ("idx_documents_embedding", "content_embedding"),
+    "meeting_notes": ("idx_notes_embedding", "content_embedding"),
+    "document_chunks": ("idx_document_chunks_embedding", "embedding"),
+    "note_chunks": ("idx_note_chunks_embedding", "embedding"),
+}
+
+
+def ivfflat_lists(rows: int) -> int:
+    if rows > 1_000_000:
+        return max(1, int(math.sqrt(rows)))
+    return max(1, rows // 1000)
+
+
+def index_key(column: str, metric: str, quantization: str) -> str:
+    """Indexed expression and operator class; must match the ORDER BY in src.api.search._nearest_sql"""
+    if quantization == "halfvec":
+        return f"(({column}::halfvec(384)) {HALFVEC_OPS[metric]})"
+    if quantization == "binary":
+        return f"((binary_quantize({column})::bit(384)) bit_hamming_ops)"
+    return f"({column} {OPS[metric]})"
+
+
+PARTITIONS = text(
+    """
+    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname
+"""
+)
+
+
+def index_options(conn, table: str, args) -> str:
+    if args.index == "hnsw":
+        return f"WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+    rows = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+    return f"WITH (lists = {args.lists or ivfflat_lists(rows)})"
+
+
+def build_index(conn, table: str, index: str, column: str, args) -> None:
+    key = index_key(column, args.metric, args.quantization)
+    options = index_options(conn, table, args)
+    print(f"  {index} on {table} {options}")
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY {index} ON {table} USING {args.index} {key} {options}"))
+    size = conn.execute(text(f"SELECT pg_size_pretty(pg_relation_size('{index}'))")).scalar()
+    print(f"    {size}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument("--metric", choices=sorted(OPS), default="cosine")
+    parser.add_argument("--quantization", choices=["none", "halfvec", "binary"], default="none")
+    parser.add_argument("--m", type=int, default=16, help="HNSW max connections per layer")
+    parser.add_argument("--ef-construction", type=int, default=64, help="HNSW build-time candidate list size")
+    parser.add_argument("--lists", type=int, help="IVFFlat list count (default derived from row count)")
+    args = parser.parse_args()
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SET maintenance_work_mem = '1GB'"))
+        for table, (index, column) in INDEXES.items():
+            print(f"Building {args.index} ({args.metric}, {args.quantization}) index {index}...")
+            partitions = conn.execute(PARTITIONS, {"table": table}).scalars().all()
+            if not partitions:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index}"))
+                build_index(conn, table, index, column, args)
+            else:
+                # Partitioned indexes can't be built concurrently: create the index on the
+                # parent only (partitions added later copy it), then build and attach one per partition
+                key = index_key(column, args.metric, args.quantization)
+                options = index_options(conn, table, args)
+                conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+                conn.execute(text(f"CREATE INDEX {index} ON ONLY {table} USING {args.index} {key} {options}"))
+                for partition in partitions:
+                    partition_index = index + partition[len(table) :]
+                    build_index(conn, partition, partition_index, column, args)
+                    conn.execute(text(f"ALTER INDEX {index} ATTACH PARTITION {partition_index}"))
+                    conn.execute(text(f"ANALYZE {partition}"))
+            conn.execute(text(f"ANALYZE {table}"))
+    print(
+        f"Done. Set VECTOR_INDEX={args.index} VECTOR_METRIC={args.metric} "
+        f"VECTOR_QUANTIZATION={args.quantization} for the API."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Bulk-load documents or notes for one client straight into the database.
+
+Reads a JSON array or NDJSON file (``{"title", "content"}`` for documents,
+``{"content"}`` for notes), embeds in batches, summarizes on a worker pool and
+inserts chunk by chunk, then prints per-item failures and throughput.
+``--synthetic N`` generates N items instead, for throughput benchmarking.
+
+Usage:
+    python scripts/bulk_ingest.py --client-id 1 --type document --file onboarding.ndjson
+    SUMMARIZER=extractive python scripts/bulk_ingest.py --client-id 1 --type note --synthetic 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import settings  # noqa: E402
+from src.database import SessionLocal  # noqa: E402
+from src.utils.bulk import bulk_ingest, parse_bulk_payload  # noqa: E402
+from src.utils.embedder import get_embedder  # noqa: E402
+from src.utils.summarizer import get_summarizer  # noqa: E402
+from src.utils.validation import validate_client_exists  # noqa: E402
+
+SYNTHETIC_TEXT = (
+    "Quarterly review of the client's portfolio. Equities returned 7.2% against a 6.1% benchmark. "
+    "The advisor recommended rebalancing bonds toward short duration treasuries. "
+    "Client asked about Roth conversion timing and required minimum distributions."
+)
+
+
+def load_items(args) -> list:
+    if args.synthetic:
+        # Tagged per run, so repeated benchmark runs aren't skipped as duplicates
+        run = time.time_ns()
+        return [
+            {"title": f"Synthetic document {i}", "content": f"{SYNTHETIC_TEXT} Item {i} of run {run}."}
+            if args.type == "document"
+            else {"content": f"{SYNTHETIC_TEXT} Item {i} of run {run}."}
+            for i in range(args.synthetic)
+        ]
+    with open(args.file, "rb") as f:
+        body = f.read()
+    is_ndjson = args.file.endswith((".ndjson", ".jsonl"))
+    return parse_bulk_payload(body, "application/x-ndjson" if is_ndjson else "application/json")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--client-id", type=int, required=True)
+    parser.add_argument("--type", choices=["document", "note"], required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="JSON array or NDJSON file")
+    source.add_argument("--synthetic", type=int, help="Generate this many items instead of reading a file")
+    parser.add_argument("--chunk-size", type=int, default=settings.bulk_chunk_size)
+    parser.add_argument("--summary-workers", type=int, default=settings.bulk_summary_workers)
+    args = parser.parse_args()
+
+    items = load_items(args)
+    embedder = get_embedder(settings.embeddings_provider)
+    summarizer = get_summarizer(settings.summarizer)
+
+    db = SessionLocal()
+    try:
+        validate_client_exists(args.client_id, db)
+        start = time.perf_counter()
+        results = bulk_ingest(
+            db,
+            embedder,
+            summarizer,
+            args.client_id,
+            args.type,
+            items,
+            chunk_size=args.chunk_size,
+            summary_workers=args.summary_workers,
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    failed = [r for r in results if r.status == "error"]
+    for result in failed[:20]:
+        print(f"  item {result.index}: {result.error}")
+    created = sum(1 for r in results if r.status == "created")
+    duplicates = sum(1 for r in results if r.status == "duplicate")
+    print(f"Created {created}/{len(results)} {args.type}s in {elapsed:.1f}s ({created / elapsed:.1f} items/s)")
+    if duplicates:
+        print(f"Skipped {duplicates} duplicates of existing {args.type}s")
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
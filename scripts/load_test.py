@@ -0,0 +1,112 @@
+"""
+Search latency under concurrent ingest load.
+
+Measures /search latency on an idle API, then again while ingest workers keep
+posting documents and notes. With inference and DB calls off the event loop,
+search percentiles should stay roughly flat between the two phases.
+
+Usage (requires running API):
+    python scripts/load_test.py --client-id 1 --duration 30 --ingest-workers 4
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from typing import List
+
+import httpx
+
+QUERIES = ["retirement plan", "portfolio rebalancing", "Roth conversion", "tax deduction", "dividend income"]
+
+SAMPLE_TEXT = (
+    "Client meeting focused on retirement planning goals. Client is 55 years old and wants to retire by 65. "
+    "Currently has $750K in retirement accounts and contributes $25K annually. Discussed asset allocation "
+    "strategy: 60% stocks, 35% bonds, 5% cash. Next steps: review Social Security projections."
+)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label: str, samples: List[float]) -> None:
+    if not samples:
+        print(f"{label}: no samples")
+        return
+    print(
+        f"{label}: n={len(samples)} mean={statistics.mean(samples) * 1000:.1f}ms "
+        f"p50={percentile(samples, 50) * 1000:.1f}ms p95={percentile(samples, 95) * 1000:.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:.1f}ms"
+    )
+
+
+async def search_worker(client: httpx.AsyncClient, stop_at: float, samples: List[float]) -> None:
+    i = 0
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        response = await client.get("/search", params={"q": QUERIES[i % len(QUERIES)]})
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        i += 1
+
+
+async def ingest_worker(client: httpx.AsyncClient, client_id: int, stop_at: float, counter: List[int]) -> None:
+    i = 0
+    while time.monotonic() < stop_at:
+        # Unique per post, so uploads aren't answered from deduplication
+        content = f"{SAMPLE_TEXT} Ref {uuid.uuid4().hex}."
+        if i % 2:
+            response = await client.post(f"/clients/{client_id}/notes", json={"content": content})
+        else:
+            response = await client.post(
+                f"/clients/{client_id}/documents", json={"title": f"Load test {i}", "content": content}
+            )
+        response.raise_for_status()
+        counter[0] += 1
+        i += 1
+
+
+async def run_phase(args, with_ingest: bool) -> List[float]:
+    samples: List[float] = []
+    ingested = [0]
+    stop_at = time.monotonic() + args.duration
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+        tasks = [search_worker(client, stop_at, samples) for _ in range(args.search_workers)]
+        if with_ingest:
+            tasks += [ingest_worker(client, args.client_id, stop_at, ingested) for _ in range(args.ingest_workers)]
+        await asyncio.gather(*tasks)
+    if with_ingest:
+        print(f"ingested {ingested[0]} items ({ingested[0] / args.duration:.1f}/s)")
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--client-id", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per phase")
+    parser.add_argument("--search-workers", type=int, default=4)
+    parser.add_argument("--ingest-workers", type=int, default=4)
+    parser.add_argument(
+        "--max-slowdown", type=float, default=2.0, help="Fail if loaded p95 exceeds idle p95 by this factor"
+    )
+    args = parser.parse_args()
+
+    idle = asyncio.run(run_phase(args, with_ingest=False))
+    report("search (idle)", idle)
+    loaded = asyncio.run(run_phase(args, with_ingest=True))
+    report("search (during ingest)", loaded)
+
+    if not idle or not loaded:
+        return 1
+    slowdown = percentile(loaded, 95) / percentile(idle, 95)
+    print(f"p95 slowdown under ingest: {slowdown:.2f}x (limit {args.max_slowdown:.2f}x)")
+    return 0 if slowdown <= args.max_slowdown else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Search throughput and connection pool pressure at increasing concurrency.
+
+Runs /search with 1, 2, 4, ... concurrent clients for a fixed time per level
+and reports requests/s, latency percentiles, errors, and the pool metrics from
+/metrics for that level: mean and max checkout wait, connections in use and
+checkout timeouts. Every query is distinct so the result cache can't absorb
+the load. Rising checkout wait with flat throughput means requests
+are queueing on the pool (raise DB_POOL_SIZE / DB_MAX_OVERFLOW, or put
+PgBouncer in front and set DB_PGBOUNCER=true).
+
+Usage (requires running API):
+    python scripts/load_test_pool.py --concurrency 1 8 32 64 --duration 15
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from load_test import QUERIES, percentile
+
+WAIT = "db_pool_checkout_wait_seconds"
+
+
+async def search_client(client: httpx.AsyncClient, stop_at: float, offset: int, samples: List[float], errors: List[int]):
+    i = 0
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        try:
+            response = await client.get("/search", params={"q": f"{QUERIES[i % len(QUERIES)]} {offset}-{i}"})
+            response.raise_for_status()
+            samples.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            errors[0] += 1
+        i += 1
+
+
+def pool_stats(snapshot: Dict) -> Dict[str, float]:
+    wait = snapshot["summaries"].get(WAIT, {"count": 0, "sum": 0.0, "max": 0.0})
+    return {
+        "count": wait["count"],
+        "sum": wait["sum"],
+        "max": wait["max"],
+        "timeouts": snapshot["counters"].get("db_pool_checkout_timeouts", 0.0),
+        "in_use": snapshot["gauges"].get("db_pool_in_use", 0.0),
+    }
+
+
+async def run_level(args, concurrency: int) -> None:
+    samples: List[float] = []
+    errors = [0]
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        before = pool_stats((await client.get("/metrics")).json())
+        stop_at = time.monotonic() + args.duration
+        await asyncio.gather(*[search_client(client, stop_at, n, samples, errors) for n in range(concurrency)])
+        after = pool_stats((await client.get("/metrics")).json())
+
+    checkouts = after["count"] - before["count"]
+    mean_wait = (after["sum"] - before["sum"]) / checkouts if checkouts else 0.0
+    latency = (
+        f"p50={percentile(samples, 50) * 1000:7.1f}ms p95={percentile(samples, 95) * 1000:7.1f}ms"
+        if samples
+        else "no successful requests"
+    )
+    # The max wait is cumulative across levels, so it only grows
+    print(
+        f"c={concurrency:>3} | {len(samples) / args.duration:7.1f} req/s | {latency} | errors={errors[0]} | "
+        f"wait mean={mean_wait * 1000:.2f}ms max={after['max'] * 1000:.1f}ms | "
+        f"in_use={after['in_use']:.0f} | timeouts={after['timeouts'] - before['timeouts']:.0f}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per concurrency level")
+    args = parser.parse_args()
+
+    for concurrency in args.concurrency:
+        asyncio.run(run_level(args, concurrency))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
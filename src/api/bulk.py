@@ -0,0 +1,89 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from src.api.schemas import BulkIngestResponse
+from src.config import settings
+from src.services import get_embedder_service, get_summarizer_service
+from src.utils.bulk import bulk_ingest, parse_bulk_payload
+from src.utils.cache import search_result_cache
+from src.utils.embedder import Embedder
+from src.utils.summarizer import Summarizer
+from src.utils.validation import get_tenant_id, validate_client_exists
+
+from ..database import get_db
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+async def _bulk_create(
+    request: Request,
+    client_id: int,
+    kind: str,
+    db: Session,
+    embedder: Embedder,
+    summarizer: Summarizer,
+    tenant_id: int,
+) -> BulkIngestResponse:
+    try:
+        items = parse_bulk_payload(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(items) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=400, detail=f"Too many items. Maximum {settings.bulk_max_items} items per request"
+        )
+
+    # Validate client once for the whole batch
+    await run_in_threadpool(validate_client_exists, client_id, db, tenant_id)
+
+    try:
+        results = await run_in_threadpool(bulk_ingest, db, embedder, summarizer, client_id, kind, items, tenant_id)
+    except Exception as e:
+        logger.error(f"Unexpected error in bulk {kind} ingest: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    created = sum(1 for r in results if r.status == "created")
+    duplicates = sum(1 for r in results if r.status == "duplicate")
+    if created:
+        search_result_cache.invalidate(tenant_id)
+    return BulkIngestResponse(
+        client_id=client_id,
+        type=kind,
+        created=created,
+        failed=len(results) - created - duplicates,
+        duplicates=duplicates,
+        items=results,
+    )
+
+
+@router.post("/{client_id}/documents:bulk", response_model=BulkIngestResponse)
+async def bulk_create_documents(
+    request: Request,
+    client_id: int,
+    db: Session = Depends(get_db),
+    embedder: Embedder = Depends(get_embedder_service),
+    summarizer: Summarizer = Depends(get_summarizer_service),
+    tenant_id: int = Depends(get_tenant_id),
+):
+    """Create many documents from a JSON array or NDJSON body of {title, content} objects"""
+    return await _bulk_create(request, client_id, "document", db, embedder, summarizer, tenant_id)
+
+
+@router.post("/{client_id}/notes:bulk", response_model=BulkIngestResponse)
+async def bulk_create_notes(
+    request: Request,
+    client_id: int,
+    db: Session = Depends(get_db),
+    embedder: Embedder = Depends(get_embedder_service),
+    summarizer: Summarizer = Depends(get_summarizer_service),
+    tenant_id: int = Depends(get_tenant_id),
+):
+    """Create many notes from a JSON array or NDJSON body of {content} objects"""
+    return await _bulk_create(request, client_id, "note", db, embedder, summarizer, tenant_id)
@@ -1,78 +1,121 @@
 import logging
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from src.api.schemas import NoteCreate, NoteResponse
 from src.config import settings
-from src.models.database import MeetingNote
-from src.utils.embedder import get_embedder
-from src.utils.summarizer import get_summarizer
-from src.utils.validation import validate_client_exists, validate_content_length
+from src.models.database import MeetingNote, NoteChunk
+from src.services import get_embedder_service, get_summarizer_service
+from src.utils.cache import search_result_cache
+from src.utils.chunking import chunk_rows
+from src.utils.content_cache import content_hash, embed_chunks_cached, summarize_cached
+from src.utils.dedup import MAX_IDEMPOTENCY_KEY_LENGTH, find_duplicate, mark_replayed, save_unique, stored_hash
+from src.utils.embedder import Embedder
+from src.utils.summarizer import Summarizer
+from src.utils.summary_queue import SUMMARY_PENDING, SUMMARY_READY, save_with_summary_job
+from src.utils.validation import get_tenant_id, validate_client_exists, validate_content_length
 
-from ..database import get_db
+from ..database import get_db, save_instance
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _note_response(row: MeetingNote) -> NoteResponse:
+    return NoteResponse(
+        id=row.id,
+        client_id=row.client_id,
+        content=row.content,
+        summary=row.summary,
+        summary_status=row.summary_status,
+        created_at=row.created_at,
+    )
+
+
 @router.post("/{client_id}/notes", response_model=NoteResponse, status_code=201)
-async def create_note(client_id: int, note: NoteCreate, db: Session = Depends(get_db)):
+async def create_note(
+    client_id: int,
+    note: NoteCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    embedder: Embedder = Depends(get_embedder_service),
+    summarizer: Summarizer = Depends(get_summarizer_service),
+    tenant_id: int = Depends(get_tenant_id),
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=MAX_IDEMPOTENCY_KEY_LENGTH),
+):
     try:
         # Validate client exists and belongs to tenant
-        validate_client_exists(client_id, db)
+        await run_in_threadpool(validate_client_exists, client_id, db, tenant_id)
 
         # Validate content length
         validate_content_length(note.content)
 
-        # Get services
-        embedder = get_embedder(settings.embeddings_provider)
-        summarizer = get_summarizer(settings.summarizer)
+        # A retried upload returns the row it created, without touching the models
+        digest = content_hash(note.content)
+        existing = await run_in_threadpool(
+            find_duplicate, db, MeetingNote, tenant_id, client_id, digest, idempotency_key
+        )
+        if existing is not None:
+            mark_replayed(response)
+            return _note_response(existing)
 
         # Generate embedding with error handling
         try:
-            embedding = embedder.encode(note.content)
+            chunks, chunk_embeddings, embedding = await embed_chunks_cached(db, embedder, tenant_id, note.content)
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
             raise HTTPException(status_code=500, detail="Failed to generate note embedding")
 
-        # Generate summary with error handling (has built-in fallback)
-        try:
-            summary = summarizer.summarize(note.content, content_type="note")
-        except Exception as e:
-            logger.error(f"Summarization failed: {e}")
-            raise HTTPException(status_code=500, detail="Failed to generate note summary")
+        # Generate summary with error handling (has built-in fallback), or defer it to the workers
+        summary, summary_status = None, SUMMARY_PENDING
+        if settings.summary_mode != "deferred":
+            try:
+                summary = await summarize_cached(db, summarizer, tenant_id, note.content, "note")
+                summary_status = SUMMARY_READY
+            except Exception as e:
+                logger.error(f"Summarization failed: {e}")
+                raise HTTPException(status_code=500, detail="Failed to generate note summary")
 
         # Create note
         db_note = MeetingNote(
-            tenant_id=settings.tenant_id,
+            tenant_id=tenant_id,
             client_id=client_id,
             content=note.content,
             summary=summary,
+            summary_status=summary_status,
             content_embedding=embedding,
+            content_hash=stored_hash(digest),
+            idempotency_key=idempotency_key,
+            chunks=[NoteChunk(**row) for row in chunk_rows(chunks, chunk_embeddings, tenant_id)],
         )
 
-        db.add(db_note)
-        db.commit()
-        db.refresh(db_note)
-
-        return NoteResponse(
-            id=db_note.id,
-            client_id=db_note.client_id,
-            content=db_note.content,
-            summary=db_note.summary,
-            created_at=db_note.created_at,
+        if summary_status == SUMMARY_PENDING:
+            save, save_args = save_with_summary_job, ("note",)
+        else:
+            save, save_args = save_instance, ()
+        db_note, created = await run_in_threadpool(
+            save_unique, db, db_note, save, *save_args, digest=digest, idempotency_key=idempotency_key
         )
+        if created:
+            search_result_cache.invalidate(db_note.tenant_id)
+        else:
+            # A concurrent retry inserted it first
+            mark_replayed(response)
+
+        return _note_response(db_note)
 
     except HTTPException:
         # Re-raise HTTP exceptions (validation errors)
         raise
     except SQLAlchemyError as e:
         logger.error(f"Database error in create_note: {e}")
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(status_code=500, detail="Database operation failed")
     except Exception as e:
         logger.error(f"Unexpected error in create_note: {e}")
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(status_code=500, detail="Internal server error")
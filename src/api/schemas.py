@@ -26,7 +26,8 @@ class DocumentResponse(BaseModel):
     client_id: int
     title: str
     content: str
-    summary: str
+    summary: Optional[str] = None  # None while summary_status is "pending" or "failed"
+    summary_status: str = "ready"
     created_at: datetime
 
 
@@ -44,7 +45,8 @@ class NoteResponse(BaseModel):
     id: int
     client_id: int
     content: str
-    summary: str
+    summary: Optional[str] = None  # None while summary_status is "pending" or "failed"
+    summary_status: str = "ready"
     created_at: datetime
 
 
@@ -53,8 +55,10 @@ class SearchResult(BaseModel):
     type: str
     client_id: int
     title: Optional[str] = None
-    content: str
-    summary: str
+    content: Optional[str] = None  # None when ?fields= leaves it out
+    snippet: Optional[str] = None  # HTML-escaped matching passages with <mark> highlights; only when requested
+    summary: Optional[str] = None  # None while summary_status is "pending" or "failed"
+    summary_status: str = "ready"
     created_at: datetime
     score: float
 
@@ -63,3 +67,20 @@ class SearchResponse(BaseModel):
     query: str
     type: Optional[str]
     results: List[SearchResult]
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page; None on the last page
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str  # "created", "duplicate" (id is the existing row) or "error"
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkIngestResponse(BaseModel):
+    client_id: int
+    type: str
+    created: int
+    failed: int
+    duplicates: int = 0
+    items: List[BulkItemResult]
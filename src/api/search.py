@@ -1,17 +1,33 @@
+import base64
+import binascii
+import hashlib
+import html
+import json
 import logging
-from typing import List, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import text
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Integer, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from src.api.schemas import SearchResponse, SearchResult
 from src.config import settings
-from src.models.database import Document, MeetingNote
-from src.utils.embedder import get_embedder
+from src.services import get_embedder_service, get_query_cache
+from src.utils.cache import QueryEmbeddingCache, search_result_cache
+from src.utils.chunking import pool_chunk_scores
+from src.utils.embedder import Embedder
+from src.utils.metrics import metrics
 from src.utils.search_utils import reciprocal_rank_fusion
-from src.utils.validation import validate_search_query
+from src.utils.validation import get_tenant_id, validate_search_query
+from src.utils.vectors import BinaryVector
 
 from ..database import get_db
 
@@ -19,11 +35,854 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+TYPE_PREFIXES = {"document": "doc_", "note": "note_"}
+# Result columns read from the database only when the response asks for them (?fields=);
+# content can be 50,000 characters and a snippet costs a ts_headline pass over it
+HYDRATED_COLUMNS = ("content", "snippet")
+DEFAULT_COLUMNS = ("content",)
+# Always returned, so a projected result still identifies its item
+REQUIRED_FIELDS = ("id", "type")
+# ts_headline wraps matches in private-use characters, removed from the content beforehand, so
+# uploaded markup can't pass for a highlight; the snippet is HTML-escaped and they become <mark> tags
+SNIPPET_START, SNIPPET_STOP = "\ue000", "\ue001"
+CANDIDATE_LIMIT = 50  # Per table, per retriever; default for ?candidate_depth=
+RESULT_LIMIT = 20  # Default page size for ?limit=
+MAX_CANDIDATE_DEPTH = 500
+MAX_RESULT_LIMIT = 100
+STREAM_BATCH_SIZE = 5  # NDJSON responses hydrate and flush this many results at a time
+
+# SEARCH_MODE=sql: candidate retrieval, RRF and hydration in one round trip.
+# Notes are ranked after documents within each retriever, matching the list
+# concatenation in the Python path so both modes return the same ranking.
+HYBRID_SEARCH_TEMPLATE = """
+    WITH doc_fts AS (
+        SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+        FROM (
+            SELECT id, ts_rank(content_tsv, plainto_tsquery(:query)) AS score
+            FROM documents
+            WHERE :include_documents AND tenant_id = :tenant_id{doc_filters} AND content_tsv @@ plainto_tsquery(:query)
+            ORDER BY score DESC LIMIT :candidates
+        ) hits
+    ),
+    note_fts AS (
+        SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+        FROM (
+            SELECT id, ts_rank(content_tsv, plainto_tsquery(:query)) AS score
+            FROM meeting_notes
+            WHERE :include_notes AND tenant_id = :tenant_id{note_filters} AND content_tsv @@ plainto_tsquery(:query)
+            ORDER BY score DESC LIMIT :candidates
+        ) hits
+    ),
+    doc_vec AS ({doc_vec}
+    ),
+    note_vec AS ({note_vec}
+    ),
+    ranks AS (
+        SELECT 'document' AS type, id, rank FROM doc_fts
+        UNION ALL
+        SELECT 'note', id, rank + (SELECT count(*) FROM doc_fts) FROM note_fts
+        UNION ALL
+        SELECT 'document', id, rank FROM doc_vec
+        UNION ALL
+        SELECT 'note', id, rank + (SELECT count(*) FROM doc_vec) FROM note_vec
+    ),
+    fused AS (
+        SELECT type, id, score, row_number() OVER (ORDER BY score DESC, type, id) <= :limit AS first_page
+        FROM (
+            SELECT type, id, sum(1.0 / (:rrf_k + rank))::float8 AS score
+            FROM ranks
+            GROUP BY type, id
+        ) scored
+    )
+    SELECT f.type, f.id, f.score, d.client_id, d.title, {doc_columns}, d.summary, d.summary_status, d.created_at
+    FROM fused f JOIN documents d ON f.first_page AND f.type = 'document' AND d.tenant_id = :tenant_id AND d.id = f.id
+    UNION ALL
+    SELECT f.type, f.id, f.score, n.client_id, NULL::text, {note_columns}, n.summary, n.summary_status, n.created_at
+    FROM fused f JOIN meeting_notes n ON f.first_page AND f.type = 'note' AND n.tenant_id = :tenant_id AND n.id = f.id
+    UNION ALL
+    -- The rest of the ranking, unhydrated, for the snapshot later pages are served from
+    SELECT f.type, f.id, f.score, NULL::int, NULL::text, NULL::text, NULL::text, NULL::text, NULL::text,
+           NULL::timestamptz
+    FROM fused f WHERE NOT f.first_page
+    ORDER BY score DESC, type, id
+"""
+# One vector per item
+ITEM_VECTOR_TEMPLATE = """
+        SELECT id, row_number() OVER (ORDER BY distance) AS rank
+        FROM ({nearest}
+        ) hits
+"""
+# Nearest chunks, pooled per parent item
+CHUNK_VECTOR_TEMPLATE = """
+        SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+        FROM (
+            SELECT {parent} AS id, {pooling}({similarity}) AS score
+            FROM ({nearest}
+            ) chunk_hits
+            GROUP BY {parent}
+            ORDER BY score DESC LIMIT :candidates
+        ) hits
+"""
+VECTOR_OPERATORS = {"cosine": "<=>", "inner_product": "<#>"}
+# SQL form of _vector_similarity
+SIMILARITY_EXPRESSIONS = {"cosine": "1 - distance", "inner_product": "-distance"}
+ITEM_TABLES = {"document": "documents", "note": "meeting_notes"}
+CHUNK_TABLES = {"document": ("document_chunks", "document_id"), "note": ("note_chunks", "note_id")}
+CHUNK_POOLING = ("max", "sum")
+# Must match the index built by scripts/build_vector_index.py --quantization
+VECTOR_QUANTIZATIONS = ("none", "halfvec", "binary")
+# Scan the filtered rows without the vector index; chosen per request for small filtered sets
+EXACT_SEARCH = "exact"
+EMBEDDING_DIM = 384
+# Optional /search filters; created_after and created_before bound a half-open range
+FILTER_PREDICATES = {
+    "client_id": "client_id = :client_id",
+    "created_after": "created_at >= :created_after",
+    "created_before": "created_at < :created_before",
+}
+ITERATIVE_SCAN_SETTINGS = {"hnsw": "hnsw.iterative_scan", "ivfflat": "ivfflat.iterative_scan"}
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """Optional restrictions on the searched items. Hashable, so it can key the result cache"""
+
+    client_id: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Names of the filters that are set, in FILTER_PREDICATES order; part of the statement keys"""
+        return tuple(name for name in FILTER_PREDICATES if getattr(self, name) is not None)
+
+    def params(self) -> dict:
+        return {name: getattr(self, name) for name in self.columns}
+
+
+def _item_filter_sql(filters: Tuple[str, ...]) -> str:
+    return "".join(f" AND {FILTER_PREDICATES[name]}" for name in filters)
+
+
+def _chunk_filter_sql(kind: str, filters: Tuple[str, ...]) -> str:
+    """Chunks have no client or date of their own, so they are filtered through their parent item"""
+    if not filters:
+        return ""
+    _, parent = CHUNK_TABLES[kind]
+    parents = f"SELECT id FROM {ITEM_TABLES[kind]} WHERE tenant_id = :tenant_id{_item_filter_sql(filters)}"
+    return f" AND {parent} IN ({parents})"
+
+
+def _nearest_sql(
+    table: str,
+    id_column: str,
+    vector_column: str,
+    operator: str,
+    where: str,
+    limit: str,
+    quantization: str,
+    id_alias: Optional[str] = None,
+) -> str:
+    """Rows nearest to :embedding as (id, distance), closest first.
+
+    ``halfvec`` orders by the half-precision cast the index is built on.
+    ``binary`` takes ``:rerank_multiplier`` times as many candidates by Hamming
+    distance between binary_quantize() bit strings, then re-ranks them by the
+    exact distance on the stored float32 vectors. ``exact`` computes the
+    distance for every row matching ``where`` without the vector index.
+    """
+    selected = f"{id_column} AS {id_alias}" if id_alias else id_column
+    if quantization == EXACT_SEARCH:
+        # Materialized, so the planner can't turn the sort back into a vector index scan
+        # that walks the whole tenant's graph and filters afterwards
+        return f"""
+            WITH filtered AS MATERIALIZED (
+                SELECT {id_column}, {vector_column} FROM {table} WHERE {where}
+            )
+            SELECT {selected}, {vector_column} {operator} :embedding AS distance
+            FROM filtered
+            ORDER BY distance LIMIT {limit}"""
+    if quantization == "none":
+        distance = f"{vector_column} {operator} :embedding"
+        source = f"{table}\n            WHERE {where}"
+    elif quantization == "halfvec":
+        halfvec = f"halfvec({EMBEDDING_DIM})"
+        distance = f"{vector_column}::{halfvec} {operator} CAST(:embedding AS {halfvec})"
+        source = f"{table}\n            WHERE {where}"
+    elif quantization == "binary":
+        distance = f"{vector_column} {operator} :embedding"
+        # Parameters are sent as the smallest int type, so widen before multiplying
+        source = f"""(
+                SELECT {id_column}, {vector_column}
+                FROM {table}
+                WHERE {where}
+                ORDER BY binary_quantize({vector_column})::bit({EMBEDDING_DIM}) <~> binary_quantize(:embedding)
+                LIMIT CAST({limit} AS int) * :rerank_multiplier
+            ) candidates"""
+    else:
+        raise ValueError(f"Unknown vector quantization: {quantization}")
+    return f"""
+            SELECT {selected}, {distance} AS distance
+            FROM {source}
+            ORDER BY distance LIMIT {limit}"""
+
+
+def _hydrated_columns_sql(alias: str, columns: Tuple[str, ...]) -> str:
+    """content and snippet select-list entries, NULL for the ones not requested"""
+    content = f"{alias}content" if "content" in columns else "NULL::text"
+    snippet = "NULL::text"
+    if "snippet" in columns:
+        stripped = f"translate({alias}content, :snippet_markers, '')"
+        snippet = f"ts_headline({stripped}, plainto_tsquery(:query), :snippet_options)"
+    return f"{content} AS content, {snippet} AS snippet"
+
+
+def _snippet_params() -> Dict[str, str]:
+    """Bind parameters of the snippet expression; the markers override any StartSel/StopSel in the settings"""
+    return {
+        "snippet_options": f'{settings.search_snippet_options}, StartSel="{SNIPPET_START}", StopSel="{SNIPPET_STOP}"',
+        "snippet_markers": SNIPPET_START + SNIPPET_STOP,
+    }
+
+
+def _render_snippet(snippet: Optional[str]) -> Optional[str]:
+    """HTML-escaped snippet with its matches wrapped in <mark>/</mark>"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(SNIPPET_START, "<mark>").replace(SNIPPET_STOP, "</mark>")
+
+
+# Only the columns SearchResult needs; content_embedding stays in the database
+@lru_cache(maxsize=None)
+def _hydrate_query(kind: str, columns: Tuple[str, ...] = DEFAULT_COLUMNS):
+    title = "title" if kind == "document" else "NULL AS title"
+    return text(
+        f"""
+        SELECT id, client_id, {title}, {_hydrated_columns_sql("", columns)}, summary, summary_status, created_at
+        FROM {ITEM_TABLES[kind]}
+        WHERE tenant_id = :tenant_id AND id = ANY(:ids)
+    """
+    ).bindparams(bindparam("ids", type_=ARRAY(Integer)))
+
+
+HYDRATE_QUERIES = {kind: _hydrate_query(kind, DEFAULT_COLUMNS) for kind in ITEM_TABLES}
+# Item embeddings of ranked hits, for ?collapse_duplicates=true
+EMBEDDING_QUERIES = {
+    kind: text(
+        f"""
+        SELECT id, content_embedding FROM {table}
+        WHERE tenant_id = :tenant_id AND id = ANY(:ids) AND content_embedding IS NOT NULL
+    """
+    ).bindparams(bindparam("ids", type_=ARRAY(Integer)))
+    for kind, table in ITEM_TABLES.items()
+}
+
+
+def _with_embedding(sql: str):
+    return text(sql).bindparams(bindparam("embedding", type_=BinaryVector(EMBEDDING_DIM)))
+
+
+@lru_cache(maxsize=None)
+def _hybrid_search_query(
+    metric: str,
+    quantization: str,
+    pooling: Optional[str] = None,
+    filters: Tuple[str, ...] = (),
+    exact_kinds: FrozenSet[str] = frozenset(),
+    columns: Tuple[str, ...] = DEFAULT_COLUMNS,
+):
+    """Build the SQL-mode statement for a metric; with a pooling function vector retrieval runs on chunks.
+
+    Memoized, so each combination of filters keeps one statement (and one
+    server-side prepared statement per connection). Item types in
+    ``exact_kinds`` are searched exactly instead of through the vector index;
+    ``columns`` are the HYDRATED_COLUMNS the first page reads.
+    """
+    operator = VECTOR_OPERATORS[metric]
+    ctes = {
+        "doc_filters": _item_filter_sql(filters),
+        "note_filters": _item_filter_sql(filters),
+        "doc_columns": _hydrated_columns_sql("d.", columns),
+        "note_columns": _hydrated_columns_sql("n.", columns),
+    }
+    for name, (kind, include) in {
+        "doc_vec": ("document", ":include_documents"),
+        "note_vec": ("note", ":include_notes"),
+    }.items():
+        strategy = EXACT_SEARCH if kind in exact_kinds else quantization
+        if pooling is None:
+            where = f"{include} AND tenant_id = :tenant_id{_item_filter_sql(filters)}"
+            table = ITEM_TABLES[kind]
+            nearest = _nearest_sql(table, "id", "content_embedding", operator, where, ":candidates", strategy)
+            ctes[name] = ITEM_VECTOR_TEMPLATE.rstrip().format(nearest=nearest)
+        else:
+            chunk_table, parent = CHUNK_TABLES[kind]
+            where = f"{include} AND tenant_id = :tenant_id{_chunk_filter_sql(kind, filters)}"
+            nearest = _nearest_sql(chunk_table, parent, "embedding", operator, where, ":chunk_candidates", strategy)
+            ctes[name] = CHUNK_VECTOR_TEMPLATE.rstrip().format(
+                nearest=nearest, parent=parent, pooling=pooling, similarity=SIMILARITY_EXPRESSIONS[metric]
+            )
+    return _with_embedding(HYBRID_SEARCH_TEMPLATE.format(**ctes))
+
+
+HYBRID_SEARCH_QUERIES = {
+    (metric, quantization): _hybrid_search_query(metric, quantization, None, (), frozenset(), DEFAULT_COLUMNS)
+    for metric in VECTOR_OPERATORS
+    for quantization in VECTOR_QUANTIZATIONS
+}
+CHUNK_HYBRID_SEARCH_QUERIES = {
+    (metric, pooling, quantization): _hybrid_search_query(
+        metric, quantization, pooling, (), frozenset(), DEFAULT_COLUMNS
+    )
+    for metric in VECTOR_OPERATORS
+    for pooling in CHUNK_POOLING
+    for quantization in VECTOR_QUANTIZATIONS
+}
+
+
+# SEARCH_MODE=python statements, built once (per filter combination) so each keeps the same
+# SQL text across requests and psycopg prepares it server-side after db_prepare_threshold runs
+@lru_cache(maxsize=None)
+def _fts_search_query(kind: str, filters: Tuple[str, ...] = ()):
+    return text(
+        f"""
+        SELECT id, ts_rank(content_tsv, plainto_tsquery(:query)) AS score
+        FROM {ITEM_TABLES[kind]}
+        WHERE tenant_id = :tenant_id{_item_filter_sql(filters)} AND content_tsv @@ plainto_tsquery(:query)
+        ORDER BY score DESC LIMIT :limit
+    """
+    )
+
+
+@lru_cache(maxsize=None)
+def _vector_search_query(
+    kind: str, metric: str, quantization: str, granularity: str = "document", filters: Tuple[str, ...] = ()
+):
+    operator = VECTOR_OPERATORS[metric]
+    if granularity == "chunk":
+        table, parent = CHUNK_TABLES[kind]
+        where = f"tenant_id = :tenant_id{_chunk_filter_sql(kind, filters)}"
+        sql = _nearest_sql(table, parent, "embedding", operator, where, ":limit", quantization, id_alias="id")
+    else:
+        where = f"tenant_id = :tenant_id{_item_filter_sql(filters)}"
+        sql = _nearest_sql(ITEM_TABLES[kind], "id", "content_embedding", operator, where, ":limit", quantization)
+    return _with_embedding(sql)
+
+
+@lru_cache(maxsize=None)
+def _filtered_counts_query(filters: Tuple[str, ...]):
+    """Items of each type matching the filters, counted no further than :threshold (index-only scans)"""
+    counts = ",\n".join(
+        f"(SELECT count(*) FROM (SELECT 1 FROM {table} WHERE tenant_id = :tenant_id{_item_filter_sql(filters)} "
+        f"LIMIT :threshold) matching) AS {kind}"
+        for kind, table in ITEM_TABLES.items()
+    )
+    return text(f"SELECT {counts}")
+
+
+# The unfiltered statements; arguments are spelled out as the search functions pass
+# them, so the memoized builders return these same objects
+FTS_SEARCH_QUERIES = {kind: _fts_search_query(kind, ()) for kind in ITEM_TABLES}
+VECTOR_SEARCH_QUERIES = {
+    (kind, metric, quantization): _vector_search_query(kind, metric, quantization, "document", ())
+    for kind in ITEM_TABLES
+    for metric in VECTOR_OPERATORS
+    for quantization in VECTOR_QUANTIZATIONS
+}
+CHUNK_SEARCH_QUERIES = {
+    (kind, metric, quantization): _vector_search_query(kind, metric, quantization, "chunk", ())
+    for kind in CHUNK_TABLES
+    for metric in VECTOR_OPERATORS
+    for quantization in VECTOR_QUANTIZATIONS
+}
+ANN_SETTINGS = {"hnsw": "hnsw.ef_search", "ivfflat": "ivfflat.probes"}
+
+
+@dataclass(frozen=True)
+class SearchOptions:
+    """Per-request tuning; unset fields fall back to Settings. Hashable, so it can key the result cache"""
+
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+    candidate_depth: Optional[int] = None  # candidates per table and retriever; CANDIDATE_LIMIT if unset
+    collapse_duplicates: bool = False  # drop hits nearly identical to a better-ranked one
+
+    @property
+    def depth(self) -> int:
+        return self.candidate_depth or CANDIDATE_LIMIT
+
+
+@dataclass
+class SearchSnapshot:
+    """The fused ranking of one search, keyed "doc_<id>" / "note_<id>", best first.
+
+    Stored in the result cache, so later pages only hydrate their own rows
+    instead of re-running retrieval and fusion. ``results`` holds the rows
+    hydrated so far, with whichever HYDRATED_COLUMNS were requested for them.
+    """
+
+    ranking: List[Tuple[str, float]]
+    results: Dict[str, SearchResult] = field(default_factory=dict)
+    positions: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.positions = {key: position for position, (key, _) in enumerate(self.ranking)}
+
+    def page(self, after: Optional[str], limit: int) -> List[Tuple[str, float]]:
+        """Up to ``limit`` hits following the key ``after`` (from the start if None); KeyError if absent"""
+        start = 0 if after is None else self.positions[after] + 1
+        return self.ranking[start : start + limit]
+
+    def has(self, key: str, columns: Tuple[str, ...]) -> bool:
+        result = self.results.get(key)
+        return result is not None and all(getattr(result, column) is not None for column in columns)
+
+    def add(self, results: List[SearchResult]) -> None:
+        for result in results:
+            key = _result_key(result.type, result.id)
+            cached = self.results.get(key)
+            if cached is not None:
+                # Keep columns an earlier request hydrated that this one didn't ask for
+                result = result.model_copy(
+                    update={
+                        column: getattr(cached, column)
+                        for column in HYDRATED_COLUMNS
+                        if getattr(result, column) is None
+                    }
+                )
+            self.results[key] = result
+
+
+def _result_key(result_type: str, item_id: int) -> str:
+    return TYPE_PREFIXES[result_type] + str(item_id)
+
+
+def _ids_by_type(ranked: List[Tuple[str, float]]) -> Dict[str, List[int]]:
+    ids_by_type = {result_type: [] for result_type in TYPE_PREFIXES}
+    for item_id, _ in ranked:
+        for result_type, prefix in TYPE_PREFIXES.items():
+            if item_id.startswith(prefix):
+                ids_by_type[result_type].append(int(item_id[len(prefix) :]))
+    return ids_by_type
+
+
+def _apply_ann_settings(db: Session, options: SearchOptions) -> None:
+    """Override the index search breadth for this transaction only"""
+    value = options.ef_search if settings.vector_index == "hnsw" else options.probes
+    if value is not None:
+        db.execute(
+            text("SELECT set_config(:name, :value, true)"),
+            {"name": ANN_SETTINGS[settings.vector_index], "value": str(value)},
+        )
+
+
+def _plan_filtered_search(db: Session, tenant_id: int, filters: SearchFilters) -> FrozenSet[str]:
+    """Choose exact or index search per item type for a filtered search; returns the exact ones.
+
+    A filter applied after an approximate index scan leaves only the matches
+    among the first ef_search neighbours, often none. Small filtered sets are
+    searched exactly; larger ones keep the index, with pgvector's iterative
+    scan enabled for the transaction so it keeps going until enough rows pass.
+    """
+    if not filters.columns:
+        return frozenset()
+    exact_kinds = frozenset()
+    if settings.exact_search_threshold > 0:
+        counts = db.execute(
+            _filtered_counts_query(filters.columns),
+            {"tenant_id": tenant_id, "threshold": settings.exact_search_threshold, **filters.params()},
+        ).one()
+        exact_kinds = frozenset(
+            kind for kind in ITEM_TABLES if getattr(counts, kind) < settings.exact_search_threshold
+        )
+    if exact_kinds != frozenset(ITEM_TABLES) and settings.vector_iterative_scan != "off":
+        db.execute(
+            text("SELECT set_config(:name, :value, true)"),
+            {"name": ITERATIVE_SCAN_SETTINGS[settings.vector_index], "value": settings.vector_iterative_scan},
+        )
+    return exact_kinds
+
+
+def _vector_similarity(distance: float) -> float:
+    # <#> returns the negated inner product; <=> returns 1 - cosine similarity
+    return -distance if settings.vector_metric == "inner_product" else 1 - distance
+
+
+def _vector_candidates(
+    db: Session,
+    kind: str,
+    query_embedding,
+    tenant_id: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+    exact: bool = False,
+    limit: int = CANDIDATE_LIMIT,
+) -> List[Tuple[int, float]]:
+    """Top item ids by vector similarity, from item vectors or from pooled chunk hits"""
+    tenant_id = tenant_id if tenant_id is not None else settings.tenant_id
+    filters = filters or SearchFilters()
+    statement = _vector_search_query(
+        kind,
+        settings.vector_metric,
+        EXACT_SEARCH if exact else settings.vector_quantization,
+        settings.vector_granularity,
+        filters.columns,
+    )
+    params = {
+        "embedding": query_embedding,
+        "tenant_id": tenant_id,
+        "limit": limit,
+        "rerank_multiplier": settings.binary_rerank_multiplier,
+        **filters.params(),
+    }
+    if settings.vector_granularity == "chunk":
+        params["limit"] = limit * settings.chunk_candidate_multiplier
+        pooled = pool_chunk_scores((row.id, _vector_similarity(row.distance)) for row in db.execute(statement, params))
+        return pooled[:limit]
+
+    hits = [(row.id, _vector_similarity(row.distance)) for row in db.execute(statement, params)]
+    # A relaxed-order iterative scan may return neighbours slightly out of order
+    return sorted(hits, key=lambda hit: hit[1], reverse=True)
+
+
+def _hydrate(
+    db: Session,
+    ranked: List[Tuple[str, float]],
+    tenant_id: Optional[int] = None,
+    columns: Tuple[str, ...] = DEFAULT_COLUMNS,
+    q: Optional[str] = None,
+) -> List[SearchResult]:
+    """Fetch ranked hits with one query per table and return them in RRF order; snippets need the query"""
+    tenant_id = tenant_id if tenant_id is not None else settings.tenant_id
+    rows = {}
+    try:
+        for result_type, ids in _ids_by_type(ranked).items():
+            if not ids:
+                continue
+            params = {"ids": ids, "tenant_id": tenant_id, "query": q, **_snippet_params()}
+            for row in db.execute(_hydrate_query(result_type, columns), params):
+                rows[TYPE_PREFIXES[result_type] + str(row.id)] = (result_type, row)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error hydrating search results: {e}")
+        raise HTTPException(status_code=500, detail="Error loading search results")
+
+    results = []
+    for item_id, score in ranked:
+        if item_id not in rows:
+            continue
+        result_type, row = rows[item_id]
+        results.append(
+            SearchResult(
+                id=row.id,
+                type=result_type,
+                client_id=row.client_id,
+                title=row.title,
+                content=row.content,
+                snippet=_render_snippet(row.snippet),
+                summary=row.summary,
+                summary_status=row.summary_status,
+                created_at=row.created_at,
+                score=score,
+            )
+        )
+    return results
+
+
+def _collapse_near_duplicates(
+    db: Session, ranked: List[Tuple[str, float]], tenant_id: Optional[int] = None
+) -> List[Tuple[str, float]]:
+    """Drop hits whose item embedding is at least search_duplicate_similarity to a better-ranked hit's.
+
+    Catches copies the upload deduplication can't: legacy duplicates, the same
+    text uploaded for several clients, or re-exports differing in a few words.
+    Hits without an item embedding are kept.
+    """
+    tenant_id = tenant_id if tenant_id is not None else settings.tenant_id
+    vectors = {}
+    try:
+        for result_type, ids in _ids_by_type(ranked).items():
+            if not ids:
+                continue
+            for row in db.execute(EMBEDDING_QUERIES[result_type], {"ids": ids, "tenant_id": tenant_id}):
+                vectors[_result_key(result_type, row.id)] = row.content_embedding
+    except SQLAlchemyError as e:
+        logger.error(f"Database error loading embeddings to collapse duplicates: {e}")
+        raise HTTPException(status_code=500, detail="Error collapsing duplicate results")
+
+    keys = [key for key, _ in ranked if key in vectors]
+    if len(keys) < 2:
+        return ranked
+    matrix = np.asarray([vectors[key] for key in keys], dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    similar = matrix @ matrix.T >= settings.search_duplicate_similarity
+    # Greedy in rank order: a kept hit hides every lower-ranked hit similar to it
+    dropped = np.zeros(len(keys), dtype=bool)
+    for position in range(len(keys)):
+        if not dropped[position]:
+            dropped[position + 1 :] |= similar[position, position + 1 :]
+    duplicates = {key for key, drop in zip(keys, dropped) if drop}
+    metrics.inc("search_duplicates_collapsed", len(duplicates))
+    return [hit for hit in ranked if hit[0] not in duplicates]
+
+
+def _run_search(
+    db: Session,
+    q: str,
+    type: Optional[str],
+    query_embedding,
+    options: Optional[SearchOptions] = None,
+    tenant_id: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+    limit: int = RESULT_LIMIT,
+    columns: Tuple[str, ...] = DEFAULT_COLUMNS,
+) -> SearchSnapshot:
+    """Candidate retrieval and RRF fusion, hydrating the first ``limit`` hits; blocking, so it runs in the threadpool"""
+    tenant_id = tenant_id if tenant_id is not None else settings.tenant_id
+    filters = filters or SearchFilters()
+    options = options or SearchOptions()
+    _apply_ann_settings(db, options)
+    exact_kinds = _plan_filtered_search(db, tenant_id, filters)
+    fts_params = {"query": q, "tenant_id": tenant_id, "limit": options.depth, **filters.params()}
+    all_fts_results = []
+    all_vector_results = []
+
+    # Search documents
+    if not type or type == "document":
+        try:
+            # FTS search
+            fts_results = db.execute(_fts_search_query("document", filters.columns), fts_params).fetchall()
+
+            vector_results = _vector_candidates(
+                db, "document", query_embedding, tenant_id, filters, "document" in exact_kinds, options.depth
+            )
+
+            # Add to unified results with type prefix
+            all_fts_results.extend([("doc_" + str(r.id), r.score) for r in fts_results])
+            all_vector_results.extend([("doc_" + str(item_id), score) for item_id, score in vector_results])
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error searching documents: {e}")
+            raise HTTPException(status_code=500, detail="Error searching documents")
+
+    # Search notes
+    if not type or type == "note":
+        try:
+            # FTS search
+            fts_results = db.execute(_fts_search_query("note", filters.columns), fts_params).fetchall()
+
+            vector_results = _vector_candidates(
+                db, "note", query_embedding, tenant_id, filters, "note" in exact_kinds, options.depth
+            )
+
+            # Add to unified results with type prefix
+            all_fts_results.extend([("note_" + str(r.id), r.score) for r in fts_results])
+            all_vector_results.extend([("note_" + str(item_id), score) for item_id, score in vector_results])
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error searching notes: {e}")
+            raise HTTPException(status_code=500, detail="Error searching notes")
+
+    # Unified RRF ranking across all results
+    merged = reciprocal_rank_fusion(all_fts_results, all_vector_results, k=settings.rrf_k)
+    if options.collapse_duplicates:
+        merged = _collapse_near_duplicates(db, merged, tenant_id)
+
+    # Hydrate the first page in one round trip per table
+    snapshot = SearchSnapshot(merged)
+    snapshot.add(_hydrate(db, merged[:limit], tenant_id, columns, q))
+    return snapshot
+
+
+def _run_sql_search(
+    db: Session,
+    q: str,
+    type: Optional[str],
+    query_embedding,
+    options: Optional[SearchOptions] = None,
+    tenant_id: Optional[int] = None,
+    filters: Optional[SearchFilters] = None,
+    limit: int = RESULT_LIMIT,
+    columns: Tuple[str, ...] = DEFAULT_COLUMNS,
+) -> SearchSnapshot:
+    """Retrieval, RRF fusion and first-page hydration in a single statement; blocking, so it runs in the threadpool"""
+    filters = filters or SearchFilters()
+    options = options or SearchOptions()
+    params = {
+        "query": q,
+        "tenant_id": tenant_id if tenant_id is not None else settings.tenant_id,
+        "embedding": query_embedding,
+        "include_documents": not type or type == "document",
+        "include_notes": not type or type == "note",
+        "candidates": options.depth,
+        "rrf_k": settings.rrf_k,
+        "limit": limit,
+        "rerank_multiplier": settings.binary_rerank_multiplier,
+        **_snippet_params(),
+        **filters.params(),
+    }
+    pooling = None
+    if settings.vector_granularity == "chunk":
+        pooling = settings.chunk_pooling
+        params["chunk_candidates"] = options.depth * settings.chunk_candidate_multiplier
+    try:
+        _apply_ann_settings(db, options)
+        exact_kinds = _plan_filtered_search(db, params["tenant_id"], filters)
+        statement = _hybrid_search_query(
+            settings.vector_metric, settings.vector_quantization, pooling, filters.columns, exact_kinds, columns
+        )
+        rows = db.execute(statement, params).fetchall()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in hybrid SQL search: {e}")
+        raise HTTPException(status_code=500, detail="Error searching documents and notes")
+
+    ranking = [(_result_key(row.type, row.id), row.score) for row in rows]
+    if options.collapse_duplicates:
+        # Collapsed hits may leave the first page short; the endpoint hydrates the rest
+        ranking = _collapse_near_duplicates(db, ranking, params["tenant_id"])
+    snapshot = SearchSnapshot(ranking)
+    snapshot.add(
+        [
+            SearchResult(
+                id=row.id,
+                type=row.type,
+                client_id=row.client_id,
+                title=row.title,
+                content=row.content,
+                snippet=_render_snippet(row.snippet),
+                summary=row.summary,
+                summary_status=row.summary_status,
+                created_at=row.created_at,
+                score=row.score,
+            )
+            for row in rows
+            # Rows ranked beyond the first page are not hydrated
+            if row.client_id is not None and _result_key(row.type, row.id) in snapshot.positions
+        ]
+    )
+    return snapshot
+
+
+SEARCH_BACKENDS = {"python": _run_search, "sql": _run_sql_search}
+
+
+def _search_and_release(backend, db: Session, *args) -> List[SearchResult]:
+    """Run a search backend, then end its read-only transaction.
+
+    The request keeps its session, but the connection goes back to the pool
+    before the response is serialized instead of when the dependency closes.
+    """
+    try:
+        return backend(db, *args)
+    finally:
+        db.rollback()
+
+
+async def _cache_call(cache: QueryEmbeddingCache, fn, *args):
+    # An in-process lookup is a dict access; only a shared backend needs to leave the loop
+    if cache.is_remote:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+async def _embed_query(q: str, embedder: Embedder, cache: Optional[QueryEmbeddingCache]):
+    """Embed the query, reusing a cached vector for repeated searches"""
+    if cache is None:
+        return await embedder.encode_async(q)
+    try:
+        cached = await _cache_call(cache, cache.get, q)
+    except Exception as e:
+        logger.warning(f"Query embedding cache lookup failed: {e}")
+        cached = None
+    if cached is not None:
+        return cached
+
+    embedding = await embedder.encode_async(q)
+    try:
+        await _cache_call(cache, cache.put, q, embedding)
+    except Exception as e:
+        logger.warning(f"Query embedding cache store failed: {e}")
+    return embedding
+
+
+def _params_digest(cache_params: Tuple) -> str:
+    return hashlib.sha1(repr(cache_params).encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_cursor(generation: int, after: str, digest: str) -> str:
+    """Opaque page token: the snapshot's generation, the last key served and the search it belongs to"""
+    payload = json.dumps({"g": generation, "a": after, "d": digest}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, digest: str) -> Tuple[int, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        generation, after, cursor_digest = int(payload["g"]), str(payload["a"]), payload["d"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_digest != digest:
+        raise HTTPException(status_code=400, detail="Cursor belongs to a different search")
+    return generation, after
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """?fields= as a set of SearchResult fields including REQUIRED_FIELDS, or None for the full result"""
+    if fields is None:
+        return None
+    requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = requested - set(SearchResult.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested | frozenset(REQUIRED_FIELDS)
+
+
+async def _stream_results(
+    db: Session,
+    snapshot: SearchSnapshot,
+    page: List[Tuple[str, float]],
+    header: dict,
+    include: Optional[FrozenSet[str]],
+    tenant_id: int,
+    columns: Tuple[str, ...],
+    q: str,
+):
+    """NDJSON lines: the response header, then each result as soon as its batch is hydrated"""
+    yield json.dumps(header) + "\n"
+    try:
+        for start in range(0, len(page), STREAM_BATCH_SIZE):
+            batch = page[start : start + STREAM_BATCH_SIZE]
+            missing = [hit for hit in batch if not snapshot.has(hit[0], columns)]
+            if missing:
+                snapshot.add(await run_in_threadpool(_search_and_release, _hydrate, db, missing, tenant_id, columns, q))
+            for key, _ in batch:
+                if key in snapshot.results:
+                    yield snapshot.results[key].model_dump_json(include=include) + "\n"
+    except Exception as e:
+        # The status line is already sent, so the error goes in the stream
+        logger.error(f"Error streaming search results: {e}")
+        yield json.dumps({"error": "Error loading search results"}) + "\n"
+
+
 @router.get("/search", response_model=SearchResponse)
 async def search(
     q: str = Query(..., description="Search query"),
     type: Optional[str] = Query(None, description="Filter by type: document or note"),
+    ef_search: Optional[int] = Query(None, ge=1, le=1000, description="HNSW ef_search override for this query"),
+    probes: Optional[int] = Query(None, ge=1, le=1000, description="IVFFlat probes override for this query"),
+    client_id: Optional[int] = Query(None, ge=1, description="Only this client's documents and notes"),
+    created_after: Optional[datetime] = Query(None, description="Only items created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only items created before this time"),
+    limit: int = Query(RESULT_LIMIT, ge=1, le=MAX_RESULT_LIMIT, description="Results per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    candidate_depth: Optional[int] = Query(
+        None, ge=1, le=MAX_CANDIDATE_DEPTH, description="Candidates per table and retriever before fusion"
+    ),
+    fields: Optional[str] = Query(None, description="Comma-separated result fields, e.g. title,snippet,score"),
+    collapse_duplicates: bool = Query(False, description="Drop hits nearly identical to a better-ranked one"),
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db),
+    embedder: Embedder = Depends(get_embedder_service),
+    query_cache: Optional[QueryEmbeddingCache] = Depends(get_query_cache),
+    tenant_id: int = Depends(get_tenant_id),
 ):
     try:
         # Validate search query
@@ -33,121 +892,99 @@ async def search(
         if type and type not in ["document", "note"]:
             raise HTTPException(status_code=400, detail="Type must be 'document' or 'note'")
 
-        # Get embedder with error handling
-        try:
-            embedder = get_embedder(settings.embeddings_provider)
-            query_embedding = embedder.encode(q)
-        except Exception as e:
-            logger.error(f"Embedding generation failed for search: {e}")
-            raise HTTPException(status_code=500, detail="Failed to process search query")
+        if settings.search_mode not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search mode: {settings.search_mode}")
+        options = SearchOptions(
+            ef_search=ef_search,
+            probes=probes,
+            candidate_depth=candidate_depth,
+            collapse_duplicates=collapse_duplicates,
+        )
+        if (
+            created_after
+            and created_before
+            and (created_after.tzinfo is None) == (created_before.tzinfo is None)
+            and created_after >= created_before
+        ):
+            raise HTTPException(status_code=400, detail="created_after must be earlier than created_before")
+        filters = SearchFilters(client_id=client_id, created_after=created_after, created_before=created_before)
+        include = _parse_fields(fields)
+        columns = DEFAULT_COLUMNS if include is None else tuple(c for c in HYDRATED_COLUMNS if c in include)
+        stream = "ndjson" in (accept or "")
 
-        all_fts_results = []
-        all_vector_results = []
+        # Read the generation first: a write committed while this search runs bumps it,
+        # so the result stored below is never served for the newer generation
+        generation = search_result_cache.generation(tenant_id)
+        cache_params = (
+            QueryEmbeddingCache.normalize(q),
+            type,
+            settings.search_mode,
+            settings.vector_granularity,
+            settings.chunk_pooling,
+            settings.vector_quantization,
+            settings.rrf_k,
+            options,
+            filters,
+        )
+        digest = _params_digest(cache_params)
+        after = None
+        if cursor is None:
+            snapshot = search_result_cache.get(tenant_id, generation, cache_params)
+        else:
+            # Later pages come from the first page's snapshot, so writes since then don't shift them
+            snapshot_generation, after = _decode_cursor(cursor, digest)
+            snapshot = search_result_cache.get(tenant_id, snapshot_generation, cache_params)
+            if snapshot is not None:
+                generation = snapshot_generation
 
-        # Search documents
-        if not type or type == "document":
+        if snapshot is None:
+            # Embed query with error handling
             try:
-                # FTS search
-                fts_query = text(
-                    """
-                    SELECT id, ts_rank(content_tsv, plainto_tsquery(:query)) as score
-                    FROM documents
-                    WHERE tenant_id = :tenant_id AND content_tsv @@ plainto_tsquery(:query)
-                    ORDER BY score DESC LIMIT 50
-                """
-                )
-                fts_results = db.execute(fts_query, {"query": q, "tenant_id": settings.tenant_id}).fetchall()
-
-                # Vector search using SQLAlchemy ORM
-                vector_results = (
-                    db.query(Document.id, Document.content_embedding.l2_distance(query_embedding).label("distance"))
-                    .filter(Document.tenant_id == settings.tenant_id)
-                    .order_by("distance")
-                    .limit(50)
-                    .all()
-                )
-
-                # Add to unified results with type prefix
-                all_fts_results.extend([("doc_" + str(r.id), r.score) for r in fts_results])
-                all_vector_results.extend([("doc_" + str(r.id), 1 - r.distance) for r in vector_results])
+                query_embedding = await _embed_query(q, embedder, query_cache)
+            except Exception as e:
+                logger.error(f"Embedding generation failed for search: {e}")
+                raise HTTPException(status_code=500, detail="Failed to process search query")
 
-            except SQLAlchemyError as e:
-                logger.error(f"Database error searching documents: {e}")
-                raise HTTPException(status_code=500, detail="Error searching documents")
+            snapshot = await run_in_threadpool(
+                _search_and_release,
+                SEARCH_BACKENDS[settings.search_mode],
+                db,
+                q,
+                type,
+                query_embedding,
+                options,
+                tenant_id,
+                filters,
+                # A stream sends its first batch before hydrating the rest
+                min(limit, STREAM_BATCH_SIZE) if stream else limit,
+                columns,
+            )
+            search_result_cache.put(tenant_id, generation, cache_params, snapshot)
 
-        # Search notes
-        if not type or type == "note":
-            try:
-                # FTS search
-                fts_query = text(
-                    """
-                    SELECT id, ts_rank(content_tsv, plainto_tsquery(:query)) as score
-                    FROM meeting_notes
-                    WHERE tenant_id = :tenant_id AND content_tsv @@ plainto_tsquery(:query)
-                    ORDER BY score DESC LIMIT 50
-                """
-                )
-                fts_results = db.execute(fts_query, {"query": q, "tenant_id": settings.tenant_id}).fetchall()
-
-                # Vector search using SQLAlchemy ORM
-                vector_results = (
-                    db.query(
-                        MeetingNote.id, MeetingNote.content_embedding.l2_distance(query_embedding).label("distance")
-                    )
-                    .filter(MeetingNote.tenant_id == settings.tenant_id)
-                    .order_by("distance")
-                    .limit(50)
-                    .all()
-                )
+        try:
+            page = snapshot.page(after, limit)
+        except KeyError:
+            # The snapshot expired and the re-run ranking no longer has the cursor's position
+            raise HTTPException(status_code=410, detail="Cursor expired; restart the search")
+        next_cursor = None
+        if page and page[-1][0] != snapshot.ranking[-1][0]:
+            next_cursor = _encode_cursor(generation, page[-1][0], digest)
+        if stream:
+            header = {"query": q, "type": type, "next_cursor": next_cursor}
+            return StreamingResponse(
+                _stream_results(db, snapshot, page, header, include, tenant_id, columns, q),
+                media_type="application/x-ndjson",
+            )
 
-                # Add to unified results with type prefix
-                all_fts_results.extend([("note_" + str(r.id), r.score) for r in fts_results])
-                all_vector_results.extend([("note_" + str(r.id), 1 - r.distance) for r in vector_results])
-
-            except SQLAlchemyError as e:
-                logger.error(f"Database error searching notes: {e}")
-                raise HTTPException(status_code=500, detail="Error searching notes")
-
-        # Unified RRF ranking across all results
-        merged = reciprocal_rank_fusion(all_fts_results, all_vector_results)
-
-        # Get top results and fetch from database
-        results = []
-        for item_id, score in merged[:20]:  # Top 20 results
-            if item_id.startswith("doc_"):
-                doc_id = int(item_id[4:])  # Remove "doc_" prefix
-                doc = db.query(Document).filter(Document.id == doc_id).first()
-                if doc:
-                    results.append(
-                        SearchResult(
-                            id=doc.id,
-                            type="document",
-                            client_id=doc.client_id,
-                            title=doc.title,
-                            content=doc.content,
-                            summary=doc.summary,
-                            created_at=doc.created_at,
-                            score=score,
-                        )
-                    )
-            elif item_id.startswith("note_"):
-                note_id = int(item_id[5:])  # Remove "note_" prefix
-                note = db.query(MeetingNote).filter(MeetingNote.id == note_id).first()
-                if note:
-                    results.append(
-                        SearchResult(
-                            id=note.id,
-                            type="note",
-                            client_id=note.client_id,
-                            title=None,
-                            content=note.content,
-                            summary=note.summary,
-                            created_at=note.created_at,
-                            score=score,
-                        )
-                    )
-
-        return SearchResponse(query=q, type=type, results=results)
+        missing = [hit for hit in page if not snapshot.has(hit[0], columns)]
+        if missing:
+            snapshot.add(await run_in_threadpool(_search_and_release, _hydrate, db, missing, tenant_id, columns, q))
+        results = [snapshot.results[key] for key, _ in page if key in snapshot.results]
+        response = SearchResponse(query=q, type=type, results=results, next_cursor=next_cursor)
+        if include is None:
+            return response
+        projection = {"query": True, "type": True, "next_cursor": True, "results": {"__all__": set(include)}}
+        return Response(response.model_dump_json(include=projection), media_type="application/json")
 
     except HTTPException:
         # Re-raise HTTP exceptions (validation errors)
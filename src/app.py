@@ -0,0 +1,93 @@
+import logging
+from contextlib import asynccontextmanager
+
+import anyio
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from src.config import settings
+from src.services import registry
+from src.utils.executor import inference_executor
+from src.utils.metrics import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+APP_PROFILES = ("full", "search")
+
+
+def _lifespan(profile: str):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Blocking DB calls run on anyio's threadpool; size it to the connection budget
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+
+        # Load models once per process, off the event loop
+        await run_in_threadpool(registry.startup, profile == "full")
+
+        # Deferred summaries are filled in by in-process workers unless src.worker runs separately
+        workers = []
+        if profile == "full" and settings.summary_mode == "deferred" and registry.summarizer is not None:
+            from src.database import SessionLocal
+            from src.utils.summary_queue import SummaryWorker
+
+            workers = [
+                SummaryWorker(SessionLocal, registry.summarizer, name=f"summary-worker-{i}")
+                for i in range(settings.summary_inprocess_workers)
+            ]
+            for worker in workers:
+                worker.start()
+
+        yield
+
+        for worker in workers:
+            await run_in_threadpool(worker.stop, 30)
+        registry.shutdown()
+        inference_executor.shutdown()
+
+    return lifespan
+
+
+async def health_check():
+    services = registry.status()
+    if not registry.ready:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "services": services})
+    return {"status": "healthy", "services": services}
+
+
+async def get_metrics():
+    return metrics.snapshot()
+
+
+def create_app(profile: str = "full") -> FastAPI:
+    """Build the API for a deployment profile.
+
+    ``full`` serves ingestion and search. ``search`` mounts only /search,
+    /health and /metrics and never loads the summarizer, so search replicas
+    don't import the ingestion routers or any summarization library.
+    """
+    if profile not in APP_PROFILES:
+        raise ValueError(f"Unknown app profile: {profile}")
+
+    app = FastAPI(
+        title="WealthTech Smart Search API",
+        description="Smart search API for client documents and meeting notes",
+        version="1.0.0",
+        lifespan=_lifespan(profile),
+    )
+
+    # Routers are imported here so the search profile never imports the ingestion modules
+    from src.api import search
+
+    if profile == "full":
+        from src.api import bulk, documents, notes
+
+        app.include_router(documents.router, prefix="/clients", tags=["documents"])
+        app.include_router(notes.router, prefix="/clients", tags=["notes"])
+        app.include_router(bulk.router, prefix="/clients", tags=["bulk"])
+    app.include_router(search.router, tags=["search"])
+
+    app.add_api_route("/health", health_check, methods=["GET"])
+    app.add_api_route("/metrics", get_metrics, methods=["GET"])
+    return app
@@ -1,13 +1,137 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     database_url: str = "postgresql://user:password@db:5432/wealthtech_db"
-    tenant_id: int = 1
-    embeddings_provider: str = "local"
+    tenant_id: int = 1  # Used when a request has no X-Tenant-ID header
+    require_tenant_header: bool = False
+    embeddings_provider: str = "local"  # "local" (PyTorch), "onnx" or "onnx_int8" (ONNX Runtime, no torch)
     summarizer: str = "gemini"  # Default to Gemini API summarization
     gemini_api_key: str = ""
 
+    # Search: "python" runs retrievers separately and fuses in-app, "sql" does it in one statement
+    search_mode: str = "python"
+    rrf_k: int = 60
+
+    # Vector search: index type decides which knob applies; metric must match the index ops
+    vector_index: str = "hnsw"  # "hnsw" or "ivfflat"
+    vector_metric: str = "cosine"  # "cosine" or "inner_product"
+    hnsw_ef_search: int = 40
+    ivfflat_probes: int = 10
+    # "none" searches the float32 vectors; "halfvec" a half-precision index; "binary" a bit(384)
+    # Hamming index whose candidates are re-ranked with the float32 vectors. Must match the
+    # index built by scripts/build_vector_index.py --quantization
+    vector_quantization: str = "none"
+    binary_rerank_multiplier: int = 4  # Hamming candidates fetched per result before re-ranking
+    # Filtered searches (client_id, created_after/created_before): item types with fewer matching rows
+    # than this are searched exactly; larger ones use the vector index with iterative scans
+    exact_search_threshold: int = 2000
+    vector_iterative_scan: str = "relaxed_order"  # "off", "relaxed_order" or (HNSW only) "strict_order"
+
+    # ONNX Runtime embedder: model files are downloaded (and int8-quantized) into this directory once
+    onnx_model_dir: str = "/tmp/onnx_models"
+    onnx_intra_op_threads: int = 0  # 0 lets ONNX Runtime pick
+
+    # Chunking: texts are split into sentence-aware overlapping windows, each embedded and
+    # indexed in document_chunks/note_chunks; "chunk" granularity searches those and pools
+    # chunk hits back to their parent item, "document" searches one vector per item
+    chunk_max_words: int = 150  # ~200 word pieces, under MiniLM's 256 limit
+    chunk_overlap_words: int = 30
+    # Items uploaded before migration 003 have no chunk rows until scripts/backfill_chunks.py
+    # has run, so "chunk" is opt-in
+    vector_granularity: str = "document"
+    chunk_pooling: str = "max"  # "max" or "sum"
+    chunk_candidate_multiplier: int = 4  # chunks fetched per parent candidate before pooling
+
+    # Embedding micro-batching (max size 1 disables the batcher)
+    embedding_batch_max_size: int = 32
+    embedding_batch_max_wait_ms: float = 5.0
+
+    # Query embedding cache: "memory" is per-process LRU, "redis" is shared across replicas
+    query_cache_backend: str = "memory"
+    query_cache_size: int = 10000  # 0 disables the cache
+    query_cache_ttl_seconds: float = 3600.0  # 0 means entries never expire
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Search result cache (per process); writes invalidate it, the TTL bounds staleness
+    # from writes made through other replicas or the standalone summary worker
+    search_cache_size: int = 1000  # 0 disables the cache
+    search_cache_ttl_seconds: float = 60.0
+    # ts_headline options for ?fields=snippet; the search API sets the match markers itself
+    # (rendered as <mark> around HTML-escaped text)
+    search_snippet_options: str = "MaxFragments=2, MaxWords=30, MinWords=10"
+    # ?collapse_duplicates=true drops hits whose item embedding is at least this similar to a better hit
+    search_duplicate_similarity: float = 0.97
+
+    # Connection pool: size + overflow should stay within threadpool_size and the server's
+    # max_connections divided by the number of replicas
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0  # wait for a free connection before failing
+    db_pool_recycle_seconds: int = 1800  # replace connections older than this; -1 never
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000  # 0 disables
+    db_application_name: str = "wealthtech-api"
+    db_prepare_threshold: Optional[int] = 2  # executions before psycopg prepares a statement; None never
+    # PgBouncer transaction pooling: no startup options or session-level SETs (they would
+    # leak across clients); defaults are applied with SET LOCAL at the start of each transaction
+    db_pgbouncer: bool = False
+
+    # Concurrency: bounded pool for summarization, shared threadpool for blocking DB calls
+    inference_workers: int = 2
+    threadpool_size: int = 40
+
+    # Summaries: "sync" summarizes on the request path, "deferred" stores the item
+    # with summary_status=pending and a summary_jobs row filled in by workers
+    summary_mode: str = "sync"
+    summary_inprocess_workers: int = 1  # 0 when running python -m src.worker instead
+    summary_job_batch_size: int = 10
+    summary_job_max_attempts: int = 5
+    summary_job_backoff_seconds: float = 5.0
+    summary_job_lease_seconds: float = 300.0
+    summary_poll_interval_seconds: float = 2.0
+
+    # Content cache: summaries and chunk embeddings of content a tenant uploaded before, keyed by
+    # a hash of the normalized text; least recently used entries beyond the budget are evicted
+    content_cache_max_bytes: int = 256 * 1024 * 1024  # 0 disables the cache
+    content_cache_evict_every: int = 100  # stores between eviction passes, per process
+
+    # Upload deduplication: a client's upload whose content (or Idempotency-Key) matches an
+    # existing document/note returns that row instead of creating a copy
+    dedupe_uploads: bool = True
+
+    # Gemini REST client: one pooled HTTP client per process. Calls are rate limited, retried with
+    # exponential backoff, and after repeated failures the circuit opens: summaries fall back to
+    # extractive without calling the API until a probe call succeeds
+    gemini_model: str = "gemini-1.5-flash"
+    gemini_base_url: str = "https://generativelanguage.googleapis.com"
+    gemini_timeout_seconds: float = 20.0  # per attempt
+    gemini_max_retries: int = 3
+    gemini_backoff_seconds: float = 0.5  # first retry delay, doubling per attempt
+    gemini_backoff_max_seconds: float = 10.0
+    gemini_requests_per_minute: float = 60.0  # token bucket refill rate; 0 disables rate limiting
+    gemini_burst: int = 10  # token bucket capacity
+    gemini_max_connections: int = 10
+    gemini_circuit_failures: int = 5  # consecutive failed calls that open the circuit
+    gemini_circuit_reset_seconds: float = 30.0  # open time before a probe call is let through
+    gemini_batch_size: int = 8  # bulk ingest texts summarized per prompt; 1 disables batching
+    gemini_batch_max_chars: int = 60000  # input characters per batched prompt
+
+    # BART map-reduce: inputs are split into token-bounded chunks, summarized in batched
+    # pipeline calls, then the partial summaries are summarized again
+    bart_chunk_tokens: int = 900  # per chunk, under BART's 1024-token window
+    bart_batch_size: int = 4  # chunks per pipeline call
+    bart_map_workers: int = 1  # concurrent pipeline calls in the map phase
+    bart_max_input_tokens: int = 8192  # tokens read from the input; the rest is ignored
+    bart_partial_summary_tokens: int = 120
+
+    # Bulk ingestion
+    bulk_max_items: int = 10000
+    bulk_chunk_size: int = 256
+    bulk_summary_workers: int = 4
+
     class Config:
         env_file = ".env"
 
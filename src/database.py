@@ -1,16 +1,116 @@
 import logging
+import time
+from typing import Iterable, Sequence
 
+import psycopg
 from fastapi import HTTPException
-from sqlalchemy import create_engine
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from src.config import settings
+from src.utils.metrics import metrics
+from src.utils.vectors import register_vector_adapters
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(settings.database_url)
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout wait time and connection usage to /metrics"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            metrics.inc("db_pool_checkout_timeouts")
+            raise
+        finally:
+            metrics.observe("db_pool_checkout_wait_seconds", time.perf_counter() - start)
+        self._report_usage()
+        return record
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report_usage()
+
+    def _report_usage(self):
+        metrics.set_gauge("db_pool_in_use", self.checkedout())
+        metrics.set_gauge("db_pool_overflow", max(0, self.overflow()))
+
+
+def driver_url(url: str) -> str:
+    """Run plain postgresql:// URLs on psycopg 3, which prepares statements and sends vectors in binary"""
+    for scheme in ("postgresql://", "postgres://"):
+        if url.startswith(scheme):
+            return "postgresql+psycopg://" + url[len(scheme) :]
+    return url
+
+
+def engine_options(config=settings) -> dict:
+    """create_engine keyword arguments for the configured pool and session defaults"""
+    connect_args = {
+        "application_name": config.db_application_name,
+        # Statements run this many times on a connection become server-side prepared
+        # statements; PgBouncer in transaction mode can't track them, so it gets none
+        "prepare_threshold": None if config.db_pgbouncer else config.db_prepare_threshold,
+    }
+    if not config.db_pgbouncer and config.db_statement_timeout_ms > 0:
+        # Sent as a startup parameter, so it costs no extra round trip
+        connect_args["options"] = f"-c statement_timeout={int(config.db_statement_timeout_ms)}"
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_timeout": config.db_pool_timeout_seconds,
+        "pool_recycle": config.db_pool_recycle_seconds,
+        "pool_pre_ping": config.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
+def _transaction_defaults_sql(config=settings) -> str:
+    """One statement applying the session defaults to the current transaction only"""
+    values = [("hnsw.ef_search", int(config.hnsw_ef_search)), ("ivfflat.probes", int(config.ivfflat_probes))]
+    if config.db_statement_timeout_ms > 0:
+        values.append(("statement_timeout", int(config.db_statement_timeout_ms)))
+    return "SELECT " + ", ".join(f"set_config('{name}', '{value}', true)" for name, value in values)
+
+
+def create_db_engine(config=settings):
+    """Engine for the configured database, pool and connection defaults"""
+    db_engine = create_engine(driver_url(config.database_url), **engine_options(config))
+
+    @event.listens_for(db_engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        """pgvector adapters, plus session-level ANN defaults that requests may override with SET LOCAL"""
+        # numpy arrays go out in pgvector's binary format; vector columns load as float32 arrays
+        register_vector_adapters(dbapi_connection)
+        if not config.db_pgbouncer:
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET hnsw.ef_search = {int(config.hnsw_ef_search)}")
+            cursor.execute(f"SET ivfflat.probes = {int(config.ivfflat_probes)}")
+            cursor.close()
+        # Commit so the pool's reset-on-return rollback doesn't undo the SETs
+        dbapi_connection.commit()
+
+    if config.db_pgbouncer:
+        transaction_defaults = _transaction_defaults_sql(config)
+
+        @event.listens_for(db_engine, "begin")
+        def _set_transaction_defaults(conn):
+            """A PgBouncer server connection may serve another client after each transaction"""
+            conn.exec_driver_sql(transaction_defaults)
+
+    return db_engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+metrics.set_gauge("db_pool_size", settings.db_pool_size)
+metrics.set_gauge("db_pool_max_overflow", settings.db_max_overflow)
 
 
 def get_db():
@@ -34,3 +134,32 @@ def get_db():
                 db.close()
             except Exception as e:
                 logger.error(f"Error closing database connection: {e}")
+
+
+def save_instance(db: Session, instance):
+    """Add, commit and refresh an ORM instance; blocking, so callers run it in the threadpool"""
+    db.add(instance)
+    db.commit()
+    db.refresh(instance)
+    return instance
+
+
+def copy_rows(db: Session, table: str, columns: Sequence[str], types: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """Load rows with COPY ... (FORMAT BINARY) in the session's transaction; returns the row count.
+
+    ``types`` are Postgres type names, one per column; vector values are
+    written from their float32 buffers without a text round trip.
+    """
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN (FORMAT BINARY)"
+    count = 0
+    try:
+        with db.connection().connection.driver_connection.cursor() as cursor:
+            with cursor.copy(statement) as copy:
+                copy.set_types(types)
+                for row in rows:
+                    copy.write_row(row)
+                    count += 1
+    except psycopg.Error as e:
+        # Surface as SQLAlchemy's error type so callers' handlers and rollback still apply
+        raise DBAPIError(statement, None, e)
+    return count
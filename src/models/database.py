@@ -1,8 +1,22 @@
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
+from src.utils.vectors import BinaryVector
+
 Base = declarative_base()
 
 
@@ -27,22 +41,104 @@ class Client(Base):
 
 class Document(Base):
     __tablename__ = "documents"
-    id = Column(Integer, primary_key=True)
-    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    # Partitioned by tenant_id, which is therefore part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), primary_key=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     summary = Column(Text)
+    summary_status = Column(String, nullable=False, server_default="ready")
     created_at = Column(DateTime, server_default=func.now())
-    content_embedding = Column(Vector(384))
+    # Normalized mean of the chunk embeddings; deferred so loading or refreshing an item doesn't fetch it
+    content_embedding = deferred(Column(BinaryVector(384)))
+    # Unique per (tenant, client) so retried uploads find the existing row
+    content_hash = Column(LargeBinary)
+    idempotency_key = Column(String)
+
+    chunks = relationship("DocumentChunk", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class MeetingNote(Base):
     __tablename__ = "meeting_notes"
-    id = Column(Integer, primary_key=True)
-    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), primary_key=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     content = Column(Text, nullable=False)
     summary = Column(Text)
+    summary_status = Column(String, nullable=False, server_default="ready")
     created_at = Column(DateTime, server_default=func.now())
-    content_embedding = Column(Vector(384))
+    # Normalized mean of the chunk embeddings; deferred so loading or refreshing an item doesn't fetch it
+    content_embedding = deferred(Column(BinaryVector(384)))
+    # Unique per (tenant, client) so retried uploads find the existing row
+    content_hash = Column(LargeBinary)
+    idempotency_key = Column(String)
+
+    chunks = relationship("NoteChunk", cascade="all, delete-orphan", passive_deletes=True)
+
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), primary_key=True)
+    document_id = Column(Integer, nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    embedding = deferred(Column(BinaryVector(384), nullable=False))
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["tenant_id", "document_id"], ["documents.tenant_id", "documents.id"], ondelete="CASCADE"
+        ),
+        UniqueConstraint("tenant_id", "document_id", "chunk_index"),
+    )
+
+
+class NoteChunk(Base):
+    __tablename__ = "note_chunks"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), primary_key=True)
+    note_id = Column(Integer, nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    embedding = deferred(Column(BinaryVector(384), nullable=False))
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["tenant_id", "note_id"], ["meeting_notes.tenant_id", "meeting_notes.id"], ondelete="CASCADE"
+        ),
+        UniqueConstraint("tenant_id", "note_id", "chunk_index"),
+    )
+
+
+class SummaryJob(Base):
+    __tablename__ = "summary_jobs"
+    id = Column(BigInteger, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    item_type = Column(String, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    run_after = Column(DateTime, server_default=func.now())
+    last_error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (UniqueConstraint("item_type", "item_id"),)
+
+
+class ContentCacheEntry(Base):
+    __tablename__ = "content_cache"
+    id = Column(BigInteger, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    content_hash = Column(LargeBinary, nullable=False)
+    kind = Column(String, nullable=False)
+    provider = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    version = Column(String, nullable=False)
+    value = Column(LargeBinary, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    cost_seconds = Column(Float, nullable=False, server_default="0")
+    hits = Column(BigInteger, nullable=False, server_default="0")
+    created_at = Column(DateTime, server_default=func.now())
+    last_used_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (UniqueConstraint("tenant_id", "content_hash", "kind", "provider", "model", "version"),)
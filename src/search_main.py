@@ -0,0 +1,5 @@
+"""Search-only entrypoint: uvicorn src.search_main:app"""
+
+from src.app import create_app
+
+app = create_app("search")
@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from src.config import settings
+from src.utils.batching import BatchingEmbedder
+from src.utils.cache import QueryEmbeddingCache, get_query_embedding_cache
+from src.utils.embedder import Embedder, get_embedder
+from src.utils.summarizer import Summarizer, get_summarizer
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """Process-wide holder for the model-backed services, loaded once at startup"""
+
+    def __init__(self):
+        self.load_summarizer = True
+        self.embedder: Optional[Embedder] = None
+        self.summarizer: Optional[Summarizer] = None
+        self.query_cache: Optional[QueryEmbeddingCache] = None
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def startup(self, load_summarizer: bool = True) -> None:
+        """Load and warm every configured provider; failures are recorded, not raised.
+
+        Search-only processes pass ``load_summarizer=False`` so the summarizer
+        provider (and its libraries) is never imported.
+        """
+        with self._lock:
+            self.load_summarizer = load_summarizer
+            if self.embedder is None:
+                try:
+                    embedder = get_embedder(settings.embeddings_provider)
+                    embedder.warm_up()
+                    if settings.embedding_batch_max_size > 1:
+                        embedder = BatchingEmbedder(
+                            embedder, settings.embedding_batch_max_size, settings.embedding_batch_max_wait_ms
+                        )
+                    self.embedder = embedder
+                    self.errors.pop("embedder", None)
+                    logger.info(f"Embedder '{settings.embeddings_provider}' loaded")
+                except Exception as e:
+                    logger.error(f"Embedder '{settings.embeddings_provider}' failed to load: {e}")
+                    self.errors["embedder"] = str(e)
+
+            if self.embedder is not None and self.query_cache is None:
+                try:
+                    self.query_cache = get_query_embedding_cache(self.embedder.model_id)
+                except Exception as e:
+                    # Searches still work without the cache, just slower
+                    logger.warning(f"Query embedding cache unavailable: {e}")
+
+            if load_summarizer and self.summarizer is None:
+                try:
+                    summarizer = get_summarizer(settings.summarizer)
+                    summarizer.warm_up()
+                    self.summarizer = summarizer
+                    self.errors.pop("summarizer", None)
+                    logger.info(f"Summarizer '{settings.summarizer}' loaded")
+                except Exception as e:
+                    logger.error(f"Summarizer '{settings.summarizer}' failed to load: {e}")
+                    self.errors["summarizer"] = str(e)
+
+    def shutdown(self) -> None:
+        """Release shared instances so the next startup reloads them"""
+        with self._lock:
+            if isinstance(self.embedder, BatchingEmbedder):
+                self.embedder.close()
+            if self.summarizer is not None:
+                self.summarizer.close()
+            self.embedder = None
+            self.summarizer = None
+            self.query_cache = None
+            self.errors.clear()
+
+    @property
+    def ready(self) -> bool:
+        return self.embedder is not None and (self.summarizer is not None or not self.load_summarizer)
+
+    def status(self) -> Dict[str, str]:
+        """Per-service readiness, used by the health endpoint"""
+        status = {"embedder": "ready" if self.embedder is not None else self.errors.get("embedder", "not loaded")}
+        if self.load_summarizer:
+            status["summarizer"] = (
+                "ready" if self.summarizer is not None else self.errors.get("summarizer", "not loaded")
+            )
+        return status
+
+
+registry = ServiceRegistry()
+
+
+def get_embedder_service() -> Embedder:
+    """Embedder dependency backed by the shared registry"""
+    if registry.embedder is None:
+        raise HTTPException(status_code=503, detail="Embedding service not ready")
+    return registry.embedder
+
+
+def get_summarizer_service() -> Summarizer:
+    """Summarizer dependency backed by the shared registry"""
+    if registry.summarizer is None:
+        raise HTTPException(status_code=503, detail="Summarization service not ready")
+    return registry.summarizer
+
+
+def get_query_cache() -> Optional[QueryEmbeddingCache]:
+    """Query embedding cache dependency; None when disabled or unavailable"""
+    return registry.query_cache
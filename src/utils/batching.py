@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+import numpy as np
+
+from src.utils.embedder import Embedder
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchingEmbedder(Embedder):
+    """Coalesces concurrent single-text encodes into one batched model call.
+
+    A worker thread waits for the first queued request, then keeps collecting
+    until either ``max_batch_size`` texts are queued or ``max_wait_ms`` has
+    elapsed, runs a single ``encode_batch`` and resolves each caller's future.
+    """
+
+    def __init__(self, embedder: Embedder, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def model_id(self) -> str:
+        return self.embedder.model_id
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        # Callers that already hold a batch go straight to the model
+        return self.embedder.encode_batch(texts)
+
+    def warm_up(self) -> None:
+        self.embedder.warm_up()
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((text, future))
+        metrics.set_gauge("embedding_queue_depth", self._queue.qsize())
+        return future
+
+    def close(self) -> None:
+        """Stop the worker after draining requests that are already queued"""
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+
+    def _collect(self, first: Tuple[str, Future]) -> Tuple[List[Tuple[str, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+            metrics.set_gauge("embedding_queue_depth", self._queue.qsize())
+            metrics.observe("embedding_batch_size", len(batch))
+
+            try:
+                embeddings = self.embedder.encode_batch([text for text, _ in batch])
+            except Exception as e:
+                logger.error(f"Batched embedding failed for {len(batch)} texts: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
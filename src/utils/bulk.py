@@ -0,0 +1,256 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from src.api.schemas import BulkItemResult, DocumentCreate, NoteCreate
+from src.config import settings
+from src.database import copy_rows
+from src.models.database import Document, DocumentChunk, MeetingNote, NoteChunk, SummaryJob
+from src.utils.chunking import chunk_rows, embed_chunks_batch
+from src.utils.dedup import stored_hash, upload_hash
+from src.utils.embedder import Embedder
+from src.utils.summarizer import Summarizer
+from src.utils.summary_queue import SUMMARY_PENDING, SUMMARY_READY
+
+logger = logging.getLogger(__name__)
+
+BULK_MODELS = {"document": (DocumentCreate, Document), "note": (NoteCreate, MeetingNote)}
+CHUNK_MODELS = {"document": (DocumentChunk, "document_id"), "note": (NoteChunk, "note_id")}
+# Chunk rows are loaded with binary COPY: (tenant_id, parent id, chunk_index, content, embedding)
+CHUNK_COPY_TYPES = ("int4", "int4", "int4", "text", "vector")
+
+
+def parse_bulk_payload(body: bytes, content_type: str = "application/json") -> List[Any]:
+    """Parse a JSON array or NDJSON (one object per line) request body"""
+    text = body.decode("utf-8")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = []
+        for line_number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e.msg}")
+        return items
+
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e.msg}")
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array of items")
+    return items
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+
+def _existing_ids(db: Session, model, tenant_id: int, client_id: int, digests: List[bytes]) -> Dict[bytes, int]:
+    """Ids of the client's rows with these content hashes, in one probe of the unique index"""
+    statement = select(model.content_hash, model.id).where(
+        model.tenant_id == tenant_id, model.client_id == client_id, model.content_hash.in_(digests)
+    )
+    return {row.content_hash: row.id for row in db.execute(statement)}
+
+
+def _insert_chunk(
+    db: Session, kind: str, tenant_id: int, rows: List[dict], row_passages: List[list], deferred: bool
+) -> List[int]:
+    """INSERT ... RETURNING the items, COPY their passages and queue summary jobs; commits, returns the new ids"""
+    model = BULK_MODELS[kind][1]
+    chunk_model, parent_column = CHUNK_MODELS[kind]
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    ids = db.execute(statement, rows).scalars().all()
+    passage_rows = (
+        (passage["tenant_id"], new_id, passage["chunk_index"], passage["content"], passage["embedding"])
+        for new_id, passages in zip(ids, row_passages)
+        for passage in passages
+    )
+    columns = ("tenant_id", parent_column, "chunk_index", "content", "embedding")
+    copy_rows(db, chunk_model.__tablename__, columns, CHUNK_COPY_TYPES, passage_rows)
+    if deferred:
+        jobs = [{"tenant_id": tenant_id, "item_type": kind, "item_id": new_id} for new_id in ids]
+        db.execute(insert(SummaryJob), jobs)
+    db.commit()
+    return ids
+
+
+def _taken_by_concurrent_upload(
+    db: Session, model, tenant_id: int, client_id: int, rows: List[dict], error: SQLAlchemyError
+) -> Dict[bytes, int]:
+    """After a failed insert: ids of rows a concurrent upload stored with this content since the lookup"""
+    if not isinstance(error, IntegrityError) or not settings.dedupe_uploads:
+        return {}
+    try:
+        return _existing_ids(db, model, tenant_id, client_id, [row["content_hash"] for row in rows])
+    except SQLAlchemyError as e:
+        logger.error(f"Bulk duplicate re-check failed: {e}")
+        db.rollback()
+        return {}
+
+
+def bulk_ingest(
+    db: Session,
+    embedder: Embedder,
+    summarizer: Summarizer,
+    client_id: int,
+    kind: str,
+    items: List[Any],
+    tenant_id: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    summary_workers: Optional[int] = None,
+) -> List[BulkItemResult]:
+    """Validate, embed, summarize and insert items chunk by chunk.
+
+    Each chunk of items is split into passages and every passage is embedded
+    with one batched model call; items are then summarized on a worker
+    pool, several per call for providers with a batch_size above one (or
+    queued as summary jobs in deferred mode), and written with a single
+    executemany INSERT ... RETURNING plus a binary COPY of the passages, then
+    committed, so a failure only affects the items of that chunk. The client
+    must already have been validated by the caller.
+
+    With DEDUPE_UPLOADS on, items whose content the client already has, or
+    that repeat an earlier item of the request, are reported as "duplicate"
+    with the existing id and skip the models entirely. Content a concurrent
+    upload inserts between that lookup and the chunk's INSERT makes the
+    insert fail on the unique index; those items are then reported as
+    duplicates too and the rest of the chunk is inserted again.
+    """
+    schema, model = BULK_MODELS[kind]
+    tenant_id = tenant_id if tenant_id is not None else settings.tenant_id
+    chunk_size = chunk_size or settings.bulk_chunk_size
+    results: List[Optional[BulkItemResult]] = [None] * len(items)
+
+    valid = []
+    first_seen: Dict[bytes, int] = {}
+    repeats: Dict[int, int] = {}  # index -> index of the earlier item with the same content
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = BulkItemResult(index=index, status="error", error="Item must be a JSON object")
+            continue
+        try:
+            parsed = schema(**item)
+        except ValidationError as e:
+            results[index] = BulkItemResult(index=index, status="error", error=_validation_message(e))
+            continue
+        digest = upload_hash(parsed.content, parsed.title if kind == "document" else None)
+        if settings.dedupe_uploads:
+            first = first_seen.setdefault(digest, index)
+            if first != index:
+                repeats[index] = first
+                continue
+        valid.append((index, parsed, digest))
+
+    if settings.dedupe_uploads and valid:
+        try:
+            existing = _existing_ids(db, model, tenant_id, client_id, [digest for _, _, digest in valid])
+        except SQLAlchemyError as e:
+            logger.error(f"Bulk duplicate lookup failed: {e}")
+            db.rollback()
+            for index, _, _ in valid:
+                results[index] = BulkItemResult(index=index, status="error", error="Database operation failed")
+            existing, valid = {}, []
+        for index, _, digest in valid:
+            if digest in existing:
+                results[index] = BulkItemResult(index=index, status="duplicate", id=existing[digest])
+        valid = [entry for entry in valid if entry[2] not in existing]
+
+    def summarize(texts: List[str]) -> List[Optional[str]]:
+        try:
+            if len(texts) == 1:
+                return [summarizer.summarize(texts[0], content_type=kind)]
+            return summarizer.summarize_batch(texts, content_type=kind)
+        except Exception as e:
+            logger.error(f"Bulk summarization failed for {len(texts)} items: {e}")
+            return [None] * len(texts)
+
+    deferred = settings.summary_mode == "deferred"
+    with ThreadPoolExecutor(max_workers=summary_workers or settings.bulk_summary_workers) as pool:
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start : start + chunk_size]
+            texts = [parsed.content for _, parsed, _ in chunk]
+
+            try:
+                embedded = embed_chunks_batch(embedder, texts)
+            except Exception as e:
+                logger.error(f"Bulk embedding failed for {len(chunk)} items: {e}")
+                for index, _, _ in chunk:
+                    results[index] = BulkItemResult(index=index, status="error", error="Failed to generate embedding")
+                continue
+
+            if deferred:
+                summaries = [None] * len(texts)
+            else:
+                # Providers that batch (Gemini) get several texts per call, the others one each
+                size = max(1, summarizer.batch_size)
+                groups = [texts[i : i + size] for i in range(0, len(texts), size)]
+                summaries = [summary for group in pool.map(summarize, groups) for summary in group]
+
+            rows, row_indexes, row_passages = [], [], []
+            for (index, parsed, digest), (passages, vectors, embedding), summary in zip(chunk, embedded, summaries):
+                if summary is None and not deferred:
+                    results[index] = BulkItemResult(index=index, status="error", error="Failed to generate summary")
+                    continue
+                row = {
+                    "tenant_id": tenant_id,
+                    "client_id": client_id,
+                    "content": parsed.content,
+                    "summary": summary,
+                    "summary_status": SUMMARY_PENDING if deferred else SUMMARY_READY,
+                    "content_embedding": embedding,
+                    "content_hash": stored_hash(digest),
+                }
+                if kind == "document":
+                    row["title"] = parsed.title
+                rows.append(row)
+                row_indexes.append(index)
+                row_passages.append(chunk_rows(passages, vectors, tenant_id))
+
+            if not rows:
+                continue
+
+            # Each retry drops at least one row, so this ends
+            while rows:
+                try:
+                    ids = _insert_chunk(db, kind, tenant_id, rows, row_passages, deferred)
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    taken = _taken_by_concurrent_upload(db, model, tenant_id, client_id, rows, e)
+                    if not taken:
+                        logger.error(f"Bulk insert failed for {len(rows)} {kind}s: {e}")
+                        for index in row_indexes:
+                            results[index] = BulkItemResult(
+                                index=index, status="error", error="Database operation failed"
+                            )
+                        break
+                    kept = []
+                    for row, index, passages in zip(rows, row_indexes, row_passages):
+                        if row["content_hash"] in taken:
+                            existing_id = taken[row["content_hash"]]
+                            results[index] = BulkItemResult(index=index, status="duplicate", id=existing_id)
+                        else:
+                            kept.append((row, index, passages))
+                    rows = [row for row, _, _ in kept]
+                    row_indexes = [index for _, index, _ in kept]
+                    row_passages = [passages for _, _, passages in kept]
+                    continue
+
+                for index, new_id in zip(row_indexes, ids):
+                    results[index] = BulkItemResult(index=index, status="created", id=new_id)
+                break
+
+    for index, first in repeats.items():
+        if results[first].id is not None:
+            results[index] = BulkItemResult(index=index, status="duplicate", id=results[first].id)
+        else:
+            results[index] = BulkItemResult(index=index, status="error", error=results[first].error)
+    return results
@@ -0,0 +1,184 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+from src.utils.metrics import metrics
+
+
+class LRUCache:
+    """Thread-safe size-bounded LRU with optional TTL; counters go to the metrics registry"""
+
+    is_remote = False
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None, name: str = "cache"):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds or None
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    metrics.inc(f"{self.name}_hits")
+                    return value
+                del self._data[key]
+                metrics.inc(f"{self.name}_expirations")
+        metrics.inc(f"{self.name}_misses")
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        evicted = 0
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                evicted += 1
+            metrics.set_gauge(f"{self.name}_size", len(self._data))
+        if evicted:
+            metrics.inc(f"{self.name}_evictions", evicted)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class RedisCache:
+    """Shared byte-valued cache on Redis (or any client with get/set(ex=)); Redis handles eviction"""
+
+    is_remote = True
+
+    def __init__(self, client, ttl_seconds: Optional[float] = None, name: str = "cache", prefix: str = ""):
+        self.client = client
+        self.ttl_seconds = ttl_seconds or None
+        self.name = name
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("redis library not available. Install with: pip install redis")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(self.prefix + key)
+        metrics.inc(f"{self.name}_hits" if value is not None else f"{self.name}_misses")
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        ttl = int(self.ttl_seconds) if self.ttl_seconds else None
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+
+class QueryEmbeddingCache:
+    """Query text -> embedding cache, keyed by embedder model and normalized query.
+
+    Vectors are stored as raw float32 bytes (1.5 KB for 384 dims) so the same
+    entries work in process memory and in a shared Redis.
+    """
+
+    def __init__(self, backend, model_id: str):
+        self.backend = backend
+        self.model_id = model_id
+
+    @property
+    def is_remote(self) -> bool:
+        return self.backend.is_remote
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        # The MiniLM tokenizer is uncased, so case and spacing don't change the embedding
+        return " ".join(query.casefold().split())
+
+    def key(self, query: str) -> str:
+        digest = hashlib.sha1(self.normalize(query).encode("utf-8")).hexdigest()
+        return f"qemb:{self.model_id}:{digest}"
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        value = self.backend.get(self.key(query))
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=np.float32)
+
+    def put(self, query: str, embedding: np.ndarray) -> None:
+        self.backend.set(self.key(query), np.asarray(embedding, dtype=np.float32).tobytes())
+
+
+def get_query_embedding_cache(model_id: str) -> Optional[QueryEmbeddingCache]:
+    """Build the configured query embedding cache, or None when disabled"""
+    if settings.query_cache_size <= 0:
+        return None
+    name = "query_embedding_cache"
+    if settings.query_cache_backend == "memory":
+        backend = LRUCache(settings.query_cache_size, settings.query_cache_ttl_seconds, name=name)
+    elif settings.query_cache_backend == "redis":
+        backend = RedisCache.from_url(settings.redis_url, ttl_seconds=settings.query_cache_ttl_seconds, name=name)
+    else:
+        raise ValueError(f"Unknown query cache backend: {settings.query_cache_backend}")
+    return QueryEmbeddingCache(backend, model_id)
+
+
+class SearchResultCache:
+    """Search snapshots per tenant, invalidated by a per-tenant generation counter.
+
+    Writes bump the tenant's generation instead of scanning for affected keys;
+    entries from older generations become unreachable and age out of the LRU.
+    Callers read the generation before running the query so a write that lands
+    mid-search can't be hidden behind a stale entry. Entries of older
+    generations stay readable by generation until they age out, which is what
+    paginated searches rely on to page through an unchanged ranking.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.enabled = max_size > 0
+        self._entries = LRUCache(max_size, ttl_seconds, name="search_result_cache")
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, tenant_id: int) -> int:
+        with self._lock:
+            return self._generations.get(tenant_id, 0)
+
+    def invalidate(self, tenant_id: int) -> None:
+        with self._lock:
+            self._generations[tenant_id] = self._generations.get(tenant_id, 0) + 1
+        metrics.inc("search_result_cache_invalidations")
+
+    def get(self, tenant_id: int, generation: int, params: Tuple) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        return self._entries.get((tenant_id, generation, params))
+
+    def put(self, tenant_id: int, generation: int, params: Tuple, value: Any) -> None:
+        if self.enabled:
+            self._entries.set((tenant_id, generation, params), value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+search_result_cache = SearchResultCache(settings.search_cache_size, settings.search_cache_ttl_seconds)
@@ -0,0 +1,120 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from src.config import settings
+from src.utils.embedder import Embedder
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_long_sentence(words: List[str], max_words: int, overlap_words: int) -> List[List[str]]:
+    step = max(1, max_words - overlap_words)
+    return [words[start : start + max_words] for start in range(0, max(1, len(words) - overlap_words), step)]
+
+
+def chunk_text(text: str, max_words: Optional[int] = None, overlap_words: Optional[int] = None) -> List[str]:
+    """Split text into overlapping windows of whole sentences.
+
+    MiniLM truncates at 256 word pieces, so windows are bounded in words
+    (~1.3 pieces each) rather than characters. Each window after the first
+    starts with the trailing sentences of the previous one, up to
+    ``overlap_words``; a single sentence longer than a window is split on words.
+    """
+    max_words = max_words or settings.chunk_max_words
+    overlap_words = min(overlap_words if overlap_words is not None else settings.chunk_overlap_words, max_words // 2)
+
+    sentences: List[List[str]] = []
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        words = sentence.split()
+        if len(words) > max_words:
+            sentences.extend(_split_long_sentence(words, max_words, overlap_words))
+        elif words:
+            sentences.append(words)
+    if not sentences:
+        return [text]
+
+    chunks: List[str] = []
+    window: List[List[str]] = []
+    window_words = 0
+    for sentence in sentences:
+        if window and window_words + len(sentence) > max_words:
+            chunks.append(" ".join(word for s in window for word in s))
+            # Carry trailing sentences over as overlap
+            carried, carried_words = [], 0
+            for previous in reversed(window):
+                size = carried_words + len(previous)
+                if size > overlap_words or size + len(sentence) > max_words:
+                    break
+                carried.insert(0, previous)
+                carried_words = size
+            window, window_words = carried, carried_words
+        window.append(sentence)
+        window_words += len(sentence)
+    chunks.append(" ".join(word for s in window for word in s))
+    return chunks
+
+
+def pool_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """Item-level vector from its chunk vectors: the re-normalized mean"""
+    if len(embeddings) == 1:
+        return embeddings[0]
+    mean = np.mean(embeddings, axis=0)
+    norm = np.linalg.norm(mean)
+    return mean / norm if norm else mean
+
+
+def embed_chunks(embedder: Embedder, text: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Chunk and embed one text in a single batched call; returns (chunks, chunk vectors, item vector)"""
+    chunks = chunk_text(text)
+    embeddings = np.asarray(embedder.encode_batch(chunks))
+    return chunks, embeddings, pool_embeddings(embeddings)
+
+
+async def embed_chunks_async(embedder: Embedder, text: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """embed_chunks without blocking the event loop; short texts go through the micro-batcher"""
+    chunks = chunk_text(text)
+    if len(chunks) == 1:
+        embedding = await embedder.encode_async(chunks[0])
+        return chunks, np.asarray([embedding]), embedding
+    embeddings = np.asarray(await run_in_threadpool(embedder.encode_batch, chunks))
+    return chunks, embeddings, pool_embeddings(embeddings)
+
+
+def embed_chunks_batch(embedder: Embedder, texts: List[str]) -> List[Tuple[List[str], np.ndarray, np.ndarray]]:
+    """Chunk many texts and embed every chunk with one batched model call"""
+    chunked = [chunk_text(text) for text in texts]
+    flat = [chunk for chunks in chunked for chunk in chunks]
+    embeddings = np.asarray(embedder.encode_batch(flat))
+    results, start = [], 0
+    for chunks in chunked:
+        vectors = embeddings[start : start + len(chunks)]
+        results.append((chunks, vectors, pool_embeddings(vectors)))
+        start += len(chunks)
+    return results
+
+
+def chunk_rows(chunks: List[str], embeddings: np.ndarray, tenant_id: int) -> List[Dict]:
+    """Column values for document_chunks/note_chunks rows, minus the parent id"""
+    return [
+        {"tenant_id": tenant_id, "chunk_index": index, "content": chunk, "embedding": embedding}
+        for index, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ]
+
+
+def pool_chunk_scores(hits: Iterable[Tuple[int, float]], pooling: Optional[str] = None) -> List[Tuple[int, float]]:
+    """Aggregate (parent_id, similarity) chunk hits into parents ranked by max or sum of similarities"""
+    pooling = pooling or settings.chunk_pooling
+    if pooling not in ("max", "sum"):
+        raise ValueError(f"Unknown chunk pooling: {pooling}")
+    scores: Dict[int, float] = {}
+    for parent_id, similarity in hits:
+        if parent_id not in scores:
+            scores[parent_id] = similarity
+        elif pooling == "max":
+            scores[parent_id] = max(scores[parent_id], similarity)
+        else:
+            scores[parent_id] += similarity
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,166 @@
+import hashlib
+import itertools
+import logging
+import time
+import unicodedata
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.utils.chunking import chunk_text, embed_chunks_async, pool_embeddings
+from src.utils.embedder import Embedder
+from src.utils.executor import inference_executor
+from src.utils.metrics import metrics
+from src.utils.summarizer import Summarizer, summarize_checked
+
+logger = logging.getLogger(__name__)
+
+KIND_SUMMARY = "summary"
+KIND_EMBEDDING = "embedding"
+
+
+class CacheKey(NamedTuple):
+    """Everything besides the content that determines a cached value"""
+
+    kind: str
+    provider: str
+    model: str
+    version: str
+
+
+# Lookups mark the entry as used in the same statement; callers commit straight away so the
+# row lock is not held while the item is embedded and summarized
+LOOKUP = text("""
+    UPDATE content_cache SET hits = hits + 1, last_used_at = now()
+    WHERE tenant_id = :tenant_id AND content_hash = :content_hash AND kind = :kind
+      AND provider = :provider AND model = :model AND version = :version
+    RETURNING value, cost_seconds
+""")
+STORE = text("""
+    INSERT INTO content_cache (tenant_id, content_hash, kind, provider, model, version, value, size_bytes, cost_seconds)
+    VALUES (:tenant_id, :content_hash, :kind, :provider, :model, :version, :value, :size_bytes, :cost_seconds)
+    ON CONFLICT (tenant_id, content_hash, kind, provider, model, version) DO NOTHING
+""")
+# Keep the most recently used entries that fit in the budget
+EVICT = text("""
+    DELETE FROM content_cache WHERE id IN (
+        SELECT id FROM (
+            SELECT id, sum(size_bytes) OVER (ORDER BY last_used_at DESC, id DESC) AS retained
+            FROM content_cache
+        ) ranked
+        WHERE retained > :max_bytes
+    )
+""")
+
+_stores = itertools.count(1)
+
+
+def content_hash(content: str) -> bytes:
+    """SHA-256 of the content with Unicode normalized and whitespace collapsed.
+
+    Chunking splits on whitespace, so re-uploads that only differ in line
+    breaks or indentation get the same chunks and share cache entries.
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", content).split())
+    return hashlib.sha256(normalized.encode("utf-8")).digest()
+
+
+def summary_key(summarizer: Summarizer, content_type: str) -> CacheKey:
+    provider, model, version = summarizer.cache_identity()
+    # Documents and notes are summarized with different prompts
+    return CacheKey(KIND_SUMMARY, provider, model, f"{version}:{content_type}")
+
+
+def embedding_key(embedder: Embedder) -> CacheKey:
+    version = f"chunks={settings.chunk_max_words}/{settings.chunk_overlap_words}"
+    return CacheKey(KIND_EMBEDDING, settings.embeddings_provider, embedder.model_id, version)
+
+
+def lookup(db: Session, tenant_id: int, digest: bytes, key: CacheKey, content_chars: int) -> Optional[bytes]:
+    """Cached value for the content, or None; hits add their original cost to the saved-cost metrics"""
+    try:
+        row = db.execute(LOOKUP, {"tenant_id": tenant_id, "content_hash": digest, **key._asdict()}).first()
+        db.commit()
+    except SQLAlchemyError as e:
+        # The cache only saves work; never fail an upload because of it
+        logger.warning(f"Content cache lookup failed: {e}")
+        db.rollback()
+        return None
+    if row is None:
+        metrics.inc(f"content_cache_{key.kind}_misses")
+        return None
+    metrics.inc(f"content_cache_{key.kind}_hits")
+    metrics.inc(f"content_cache_{key.kind}_seconds_saved", row.cost_seconds)
+    metrics.inc(f"content_cache_{key.kind}_chars_saved", content_chars)
+    return row.value
+
+
+def store(db: Session, tenant_id: int, digest: bytes, key: CacheKey, value: bytes, cost_seconds: float) -> None:
+    """Insert an entry (first writer wins) and, every content_cache_evict_every stores, trim to the budget"""
+    params = {
+        "tenant_id": tenant_id,
+        "content_hash": digest,
+        **key._asdict(),
+        "value": value,
+        "size_bytes": len(value),
+        "cost_seconds": cost_seconds,
+    }
+    try:
+        db.execute(STORE, params)
+        db.commit()
+        if next(_stores) % max(1, settings.content_cache_evict_every) == 0:
+            evicted = db.execute(EVICT, {"max_bytes": settings.content_cache_max_bytes}).rowcount
+            db.commit()
+            metrics.inc("content_cache_evictions", evicted)
+    except SQLAlchemyError as e:
+        logger.warning(f"Content cache store failed: {e}")
+        db.rollback()
+
+
+async def embed_chunks_cached(
+    db: Session, embedder: Embedder, tenant_id: int, content: str
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """embed_chunks_async, reusing the chunk vectors of identical content the tenant uploaded before"""
+    if settings.content_cache_max_bytes <= 0:
+        return await embed_chunks_async(embedder, content)
+    digest, key = content_hash(content), embedding_key(embedder)
+    value = await run_in_threadpool(lookup, db, tenant_id, digest, key, len(content))
+    if value is not None:
+        chunks = chunk_text(content)
+        vectors = np.frombuffer(value, dtype=np.float32)
+        if vectors.size and vectors.size % len(chunks) == 0:
+            vectors = vectors.reshape(len(chunks), -1)
+            return chunks, vectors, pool_embeddings(vectors)
+        logger.warning("Cached chunk embeddings don't match the content's chunks; re-embedding")
+
+    start = time.perf_counter()
+    chunks, vectors, embedding = await embed_chunks_async(embedder, content)
+    elapsed = time.perf_counter() - start
+    value = np.asarray(vectors, dtype=np.float32).tobytes()
+    await run_in_threadpool(store, db, tenant_id, digest, key, value, elapsed)
+    return chunks, vectors, embedding
+
+
+async def summarize_cached(db: Session, summarizer: Summarizer, tenant_id: int, content: str, content_type: str) -> str:
+    """Summarize on the inference executor, reusing the summary of identical content uploaded before.
+
+    Summaries from the extractive fallback of a failed provider call are not
+    cached, so the next upload of the content tries the provider again.
+    """
+    if settings.content_cache_max_bytes <= 0:
+        return await inference_executor.run(summarizer.summarize, content, content_type=content_type)
+    digest, key = content_hash(content), summary_key(summarizer, content_type)
+    value = await run_in_threadpool(lookup, db, tenant_id, digest, key, len(content))
+    if value is not None:
+        return value.decode("utf-8")
+
+    start = time.perf_counter()
+    summary, from_provider = await inference_executor.run(summarize_checked, summarizer, content, content_type)
+    if from_provider:
+        await run_in_threadpool(store, db, tenant_id, digest, key, summary.encode("utf-8"), time.perf_counter() - start)
+    return summary
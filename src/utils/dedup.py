@@ -0,0 +1,96 @@
+import hashlib
+import logging
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.utils.content_cache import content_hash
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Set on responses that return an existing row instead of creating one
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+def upload_hash(content: str, title: Optional[str] = None) -> bytes:
+    """Key that identifies a repeated upload: the content hash, combined with the title's for documents.
+
+    A document re-uploaded under a new title is a new document, not a replay
+    of the old one.
+    """
+    digest = content_hash(content)
+    if title is None:
+        return digest
+    return hashlib.sha256(content_hash(title) + digest).digest()
+
+
+def stored_hash(digest: bytes) -> Optional[bytes]:
+    """Value for the content_hash column: NULL opts the row out of the unique index"""
+    return digest if settings.dedupe_uploads else None
+
+
+def mark_replayed(response: Response) -> None:
+    """Answer 200 instead of the endpoint's 201: the returned row already existed"""
+    response.status_code = 200
+    response.headers[REPLAYED_HEADER] = "true"
+
+
+def find_duplicate(
+    db: Session, model, tenant_id: int, client_id: int, digest: bytes, idempotency_key: Optional[str] = None
+):
+    """The client's row created with this Idempotency-Key or, failing that, with the same upload_hash; else None.
+
+    One lookup on the (tenant_id, client_id, ...) unique indexes, made before
+    any embedding or summarization. Reusing a key for different content is a
+    client error (422) rather than a replay.
+    """
+    conditions = []
+    if idempotency_key is not None:
+        conditions.append(model.idempotency_key == idempotency_key)
+    if settings.dedupe_uploads:
+        conditions.append(model.content_hash == digest)
+    if not conditions:
+        return None
+    statement = (
+        select(model)
+        .where(model.tenant_id == tenant_id, model.client_id == client_id, or_(*conditions))
+        .limit(2)  # at most one row per index
+    )
+    rows = db.execute(statement).scalars().all()
+    if not rows:
+        return None
+
+    keyed = [row for row in rows if idempotency_key is not None and row.idempotency_key == idempotency_key]
+    if keyed:
+        # Legacy copies have no stored hash, so compare the content (and title) itself
+        if upload_hash(keyed[0].content, getattr(keyed[0], "title", None)) != digest:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with different content")
+        metrics.inc("upload_duplicates_idempotency_key")
+        return keyed[0]
+    metrics.inc("upload_duplicates_content_hash")
+    return rows[0]
+
+
+def save_unique(
+    db: Session, instance, save: Callable, *args, digest: bytes, idempotency_key: Optional[str] = None
+) -> Tuple[object, bool]:
+    """Save ``instance`` with ``save(db, instance, *args)``; returns (row, created).
+
+    A concurrent upload of the same content or key that committed first
+    makes the insert fail on the unique indexes; its row is returned instead.
+    """
+    try:
+        return save(db, instance, *args), True
+    except IntegrityError:
+        db.rollback()
+        existing = find_duplicate(db, type(instance), instance.tenant_id, instance.client_id, digest, idempotency_key)
+        if existing is None:
+            raise
+        logger.info(f"Concurrent duplicate upload for client {instance.client_id}; returning row {existing.id}")
+        return existing, False
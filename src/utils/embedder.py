@@ -1,24 +1,127 @@
+import os
 from abc import ABC, abstractmethod
+from typing import List
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from fastapi.concurrency import run_in_threadpool
+
+from src.config import settings
+
+MINILM_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
 
 class Embedder(ABC):
+    # Identifies the vector space; cached embeddings are keyed on it
+    model_id: str = "unknown"
+
     @abstractmethod
     def encode(self, text: str) -> np.ndarray:
         pass
 
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode several texts; providers with native batching override this"""
+        return np.stack([self.encode(text) for text in texts])
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        """Encode without blocking the event loop"""
+        return await run_in_threadpool(self.encode, text)
+
+    def warm_up(self) -> None:
+        """Run a dummy encode so the first real request doesn't pay for lazy initialisation"""
+        self.encode("warm-up")
+
 
 class LocalEmbedder(Embedder):
+    model_id = MINILM_MODEL
+
     def __init__(self):
-        self.model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        # Imported here so ONNX-only deployments don't need torch installed
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(self.model_id)
 
     def encode(self, text: str) -> np.ndarray:
         return self.model.encode(text, normalize_embeddings=True)
 
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, normalize_embeddings=True)
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Masked mean over tokens followed by L2 normalization, as the sentence-transformers model does"""
+    mask = attention_mask[..., np.newaxis].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+
+class OnnxEmbedder(Embedder):
+    """all-MiniLM-L6-v2 on ONNX Runtime, optionally with dynamic int8 weight quantization.
+
+    Produces the same vector space as LocalEmbedder (checked by the parity
+    test) without importing torch; only onnxruntime, tokenizers and
+    huggingface_hub are needed.
+    """
+
+    max_tokens = 256  # MiniLM's max_seq_length
+
+    def __init__(self, quantize: bool = False):
+        try:
+            import onnxruntime as ort
+            from huggingface_hub import hf_hub_download
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ImportError("ONNX embedder dependencies missing. Install with: pip install onnxruntime tokenizers")
+
+        self.model_id = MINILM_MODEL + ("@int8" if quantize else "")
+        cache_dir = settings.onnx_model_dir
+        model_path = hf_hub_download(MINILM_MODEL, "onnx/model.onnx", cache_dir=cache_dir)
+        tokenizer_path = hf_hub_download(MINILM_MODEL, "tokenizer.json", cache_dir=cache_dir)
+        if quantize:
+            model_path = self._quantized(model_path, cache_dir)
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=self.max_tokens)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.onnx_intra_op_threads:
+            options.intra_op_num_threads = settings.onnx_intra_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @staticmethod
+    def _quantized(model_path: str, cache_dir: str) -> str:
+        """Dynamic int8 quantization of the fp32 graph, done once and cached next to it"""
+        quantized_path = os.path.join(cache_dir, "all-MiniLM-L6-v2-int8.onnx")
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            os.makedirs(cache_dir, exist_ok=True)
+            quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        return quantized_path
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+        return mean_pool(token_embeddings, inputs["attention_mask"])
+
 
 def get_embedder(provider: str = "local") -> Embedder:
     if provider == "local":
         return LocalEmbedder()
+    if provider == "onnx":
+        return OnnxEmbedder()
+    if provider == "onnx_int8":
+        return OnnxEmbedder(quantize=True)
     raise ValueError(f"Unknown embedder provider: {provider}")
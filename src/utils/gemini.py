@@ -0,0 +1,258 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import httpx
+
+from src.config import settings
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Overload and transient server errors; anything else in 4xx is the request's fault
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class GeminiError(Exception):
+    """A generateContent call that produced no text"""
+
+
+class GeminiUnavailable(GeminiError):
+    """Timeouts, connection errors or retryable statuses on every attempt; counts against the circuit"""
+
+
+class GeminiRequestError(GeminiError):
+    """The API answered but rejected the request or returned no text; not retried"""
+
+
+class CircuitOpenError(GeminiError):
+    """Calls are short-circuited while the API is unhealthy"""
+
+
+class RateLimitExceeded(GeminiError):
+    """No rate limiter token became available within the call timeout"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, holding at most ``capacity``"""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self.tokens = float(self.capacity)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """Take a token, waiting up to ``timeout`` seconds; False if none became available"""
+        if self.rate <= 0:
+            return True
+        deadline = self.clock() + timeout
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failed calls.
+
+    While open every call is refused, so callers fall back immediately instead
+    of waiting out timeouts and retries. After ``reset_seconds`` one probe call
+    is let through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if self.probing or self.clock() - self.opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or self.clock() - self.opened_at < self.reset_seconds:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+        metrics.set_gauge("gemini_circuit_open", 0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.opened_at is None and self.failures < self.failure_threshold:
+                return
+            if self.opened_at is None:
+                logger.warning(f"Gemini circuit opened after {self.failures} consecutive failures")
+                metrics.inc("gemini_circuit_opened")
+            self.opened_at = self.clock()
+        metrics.set_gauge("gemini_circuit_open", 1)
+
+    def release(self) -> None:
+        """End a call without an outcome (e.g. it never reached the API)"""
+        with self._lock:
+            self.probing = False
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("retry-after", 0)))
+    except ValueError:
+        # HTTP-date form; fall back to the computed backoff
+        return 0.0
+
+
+def _response_text(payload: dict) -> str:
+    """Concatenated text parts of the first candidate"""
+    try:
+        parts = payload["candidates"][0]["content"]["parts"]
+        text = "".join(part.get("text", "") for part in parts).strip()
+    except (KeyError, IndexError, TypeError, AttributeError):
+        # Prompts blocked by safety filters come back without candidates
+        raise GeminiRequestError(f"Gemini returned no candidates: {str(payload)[:200]}")
+    if not text:
+        raise GeminiRequestError("Gemini returned an empty response")
+    return text
+
+
+class GeminiClient:
+    """generateContent over one pooled HTTP client, shared by every thread that summarizes.
+
+    Each attempt waits for a rate limiter token and has its own timeout;
+    timeouts, connection errors and retryable statuses are retried with
+    exponential backoff and jitter (at least Retry-After when the API sends
+    it; a Retry-After beyond GEMINI_BACKOFF_MAX_SECONDS fails the call
+    instead). Calls that still fail trip the circuit breaker.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout_seconds: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        bucket: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.model = model or settings.gemini_model
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None else settings.gemini_timeout_seconds
+        self.max_retries = max_retries if max_retries is not None else settings.gemini_max_retries
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else settings.gemini_backoff_seconds
+        self.bucket = bucket or TokenBucket(settings.gemini_requests_per_minute / 60.0, settings.gemini_burst)
+        self.breaker = breaker or CircuitBreaker(settings.gemini_circuit_failures, settings.gemini_circuit_reset_seconds)
+        self.http = httpx.Client(
+            base_url=base_url or settings.gemini_base_url,
+            headers={"x-goog-api-key": api_key},
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.gemini_max_connections,
+                max_keepalive_connections=settings.gemini_max_connections,
+            ),
+        )
+
+    def close(self) -> None:
+        self.http.close()
+
+    def generate(
+        self, prompt: str, temperature: float = 0.3, max_output_tokens: int = 200, json_output: bool = False
+    ) -> str:
+        """Text of the model's answer to ``prompt``; raises a GeminiError subclass when there is none"""
+        if not self.breaker.allow():
+            metrics.inc("gemini_short_circuited")
+            raise CircuitOpenError("Gemini circuit is open")
+        config = {"temperature": temperature, "maxOutputTokens": max_output_tokens}
+        if json_output:
+            config["responseMimeType"] = "application/json"
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}], "generationConfig": config}
+        try:
+            payload = self._post_with_retries(f"/v1beta/models/{self.model}:generateContent", body)
+        except GeminiUnavailable:
+            self.breaker.record_failure()
+            raise
+        except RateLimitExceeded:
+            self.breaker.release()
+            raise
+        except GeminiRequestError:
+            # An answer, even a rejection, means the API is reachable
+            self.breaker.record_success()
+            raise
+        except Exception:
+            # Decoding errors, redirect loops or anything unexpected: never leave a half-open probe pending
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return _response_text(payload)
+
+    def _backoff(self, attempt: int, retry_after: float) -> float:
+        delay = min(settings.gemini_backoff_max_seconds, self.backoff_seconds * 2 ** (attempt - 1))
+        # Equal jitter spreads out retries of calls that failed together
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        # The cap bounds our own backoff only; the API's Retry-After is always honoured
+        return max(delay, retry_after)
+
+    def _post_with_retries(self, path: str, body: dict) -> dict:
+        last_error, retry_after = "", 0.0
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                metrics.inc("gemini_retries")
+                time.sleep(self._backoff(attempt, retry_after))
+            if not self.bucket.acquire(self.timeout_seconds):
+                metrics.inc("gemini_rate_limited")
+                raise RateLimitExceeded("No Gemini rate limit token within the call timeout")
+
+            start = time.perf_counter()
+            try:
+                response = self.http.post(path, json=body)
+            except httpx.TransportError as e:
+                # Connect/read timeouts and connection errors
+                last_error, retry_after = f"{type(e).__name__}: {e}", 0.0
+                continue
+            finally:
+                metrics.observe("gemini_request_seconds", time.perf_counter() - start)
+
+            if response.status_code in RETRYABLE_STATUS:
+                last_error, retry_after = f"HTTP {response.status_code}", _retry_after(response)
+                if retry_after > settings.gemini_backoff_max_seconds:
+                    # Waiting that long would stall the worker; fail now and let the caller fall back
+                    raise GeminiUnavailable(f"{last_error} with Retry-After {retry_after:.0f}s")
+                continue
+            if response.status_code >= 400:
+                raise GeminiRequestError(f"HTTP {response.status_code}: {response.text[:200]}")
+            try:
+                return response.json()
+            except ValueError:
+                raise GeminiRequestError("Gemini returned invalid JSON")
+        raise GeminiUnavailable(f"Gemini failed after {self.max_retries + 1} attempts: {last_error}")
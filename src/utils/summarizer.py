@@ -1,66 +1,113 @@
+import json
+import logging
 import os
+import re
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
-import nltk
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.summarizers.lex_rank import LexRankSummarizer
+from src.config import settings
+from src.utils.metrics import metrics
 
-# Download required NLTK data for extractive summarization
-try:
-    nltk.data.find("tokenizers/punkt_tab")
-except LookupError:
-    nltk.download("punkt_tab", quiet=True)
+logger = logging.getLogger(__name__)
 
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt", quiet=True)
+# Provider libraries (nltk/sumy, transformers, httpx for Gemini) are imported
+# when a provider is constructed, so importing this module stays cheap.
+_nltk_ready = False
+
+
+def _ensure_nltk_data() -> None:
+    """Download required NLTK data for extractive summarization, once per process"""
+    global _nltk_ready
+    if _nltk_ready:
+        return
+    import nltk
+
+    for resource in ("punkt_tab", "punkt"):
+        try:
+            nltk.data.find(f"tokenizers/{resource}")
+        except LookupError:
+            nltk.download(resource, quiet=True)
+    _nltk_ready = True
+
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+# Bump when the Gemini prompts or generation parameters change, so cached summaries are not reused
+GEMINI_PROMPT_VERSION = "1"
+_fallback = threading.local()
 
 
 class Summarizer(ABC):
+    batch_size = 1  # texts worth summarizing together with summarize_batch
+
     @abstractmethod
     def summarize(self, text: str, content_type: str = "document") -> str:
         pass
 
+    def summarize_batch(self, texts: List[str], content_type: str = "document") -> List[str]:
+        """Summaries of ``texts`` in order; providers that can share a call override this"""
+        return [self.summarize(text, content_type) for text in texts]
+
+    def warm_up(self) -> None:
+        """Prime local models; remote providers override this with a no-op"""
+        self.summarize("Warm-up text for the summarizer. It has two sentences.")
+
+    def close(self) -> None:
+        """Release connections or other provider resources"""
+
+    def cache_identity(self) -> Tuple[str, str, str]:
+        """(provider, model, version) that, with the content, determine the summary"""
+        return type(self).__name__, "", "1"
+
+
+@lru_cache(maxsize=1)
+def _fallback_summarizer() -> "ExtractiveSummarizer":
+    """Extractive summarizer shared by every provider fallback in the process"""
+    return ExtractiveSummarizer()
+
+
+def _extractive_fallback(text: str, content_type: str = "document") -> str:
+    """Summarize with LexRank after a provider failed; recorded for summarize_checked"""
+    _fallback.used = True
+    metrics.inc("summarizer_fallbacks")
+    return _fallback_summarizer().summarize(text, content_type)
+
+
+def summarize_checked(summarizer: Summarizer, text: str, content_type: str = "document") -> Tuple[str, bool]:
+    """Summarize, also returning whether the provider's own model produced the summary.
+
+    False when it fell back to extractive summarization, so callers can avoid
+    caching a degraded summary under the provider's identity.
+    """
+    _fallback.used = False
+    summary = summarizer.summarize(text, content_type=content_type)
+    return summary, not _fallback.used
+
 
 class ExtractiveSummarizer(Summarizer):
     def __init__(self, sentence_count: int = 3):
+        from sumy.summarizers.lex_rank import LexRankSummarizer
+
+        _ensure_nltk_data()
         self.summarizer = LexRankSummarizer()
         self.sentence_count = sentence_count
 
     def summarize(self, text: str, content_type: str = "document") -> str:
+        from sumy.nlp.tokenizers import Tokenizer
+        from sumy.parsers.plaintext import PlaintextParser
+
         parser = PlaintextParser.from_string(text, Tokenizer("english"))
         summary = self.summarizer(parser.document, self.sentence_count)
         return " ".join(str(sentence) for sentence in summary)
 
+    def cache_identity(self) -> Tuple[str, str, str]:
+        return "extractive", "lexrank", f"sentences={self.sentence_count}"
 
-class GeminiSummarizer(Summarizer):
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY environment variable is required")
-
-        try:
-            import google.generativeai as genai
-
-            genai.configure(api_key=self.api_key)
-            self.genai = genai
-            self.model = genai.GenerativeModel("gemini-1.5-flash")
-            self.available = True
-        except ImportError:
-            raise ImportError("google-generativeai library not available. Install with: pip install google-generativeai")
-        except Exception as e:
-            raise RuntimeError(f"Gemini initialization failed: {e}")
-
-    def summarize(self, text: str, content_type: str = "document") -> str:
-        """Generate abstractive summary using Gemini API with context-specific prompts"""
-        if not self.available:
-            raise RuntimeError("Gemini summarizer not available")
 
-        if content_type == "note":
-            prompt = f"""
+GEMINI_INSTRUCTIONS = {
+    "note": """
 You are a financial advisor's assistant summarizing meeting notes. Create a concise summary for financial advisors to quickly understand client interactions.
 
 Requirements:
@@ -69,13 +116,8 @@ Requirements:
 - Use professional advisory language
 - Keep the summary to 2-3 sentences maximum
 - Emphasize actionable insights for the advisor's next client interaction
-
-Meeting notes to summarize:
-{text}
-
-Advisory Summary:"""
-        else:  # document
-            prompt = f"""
+""",
+    "document": """
 You are a financial advisor's assistant summarizing client documents. Create a concise summary to help advisors quickly understand document contents.
 
 Requirements:
@@ -84,29 +126,112 @@ Requirements:
 - Use professional advisory language
 - Keep the summary to 2-3 sentences maximum
 - Emphasize critical information advisors need for comprehensive client understanding
+""",
+}
+GEMINI_INPUT_LABELS = {"note": "Meeting notes to summarize", "document": "Document to summarize"}
+GEMINI_BATCH_ITEMS = {"note": "sets of meeting notes", "document": "documents"}
 
-Document to summarize:
-{text}
 
-Advisory Summary:"""
+def _gemini_kind(content_type: str) -> str:
+    return "note" if content_type == "note" else "document"
 
-        try:
-            response = self.model.generate_content(
-                prompt, generation_config=self.genai.GenerationConfig(temperature=0.3, max_output_tokens=200)
-            )
 
-            if response.text:
-                return response.text.strip()
-            else:
-                # Fallback to extractive if no response
-                fallback = ExtractiveSummarizer()
-                return fallback.summarize(text)
+def _gemini_prompt(text: str, content_type: str) -> str:
+    kind = _gemini_kind(content_type)
+    return f"{GEMINI_INSTRUCTIONS[kind]}\n{GEMINI_INPUT_LABELS[kind]}:\n{text}\n\nAdvisory Summary:"
+
+
+def _gemini_batch_prompt(texts: List[str], content_type: str) -> str:
+    """One prompt for several texts, answered with a JSON array of their summaries in order"""
+    kind = _gemini_kind(content_type)
+    items = "\n\n".join(f'<item index="{index}">\n{text}\n</item>' for index, text in enumerate(texts, 1))
+    return (
+        f"{GEMINI_INSTRUCTIONS[kind]}\n"
+        f"The {len(texts)} items below are unrelated {GEMINI_BATCH_ITEMS[kind]}; apply the requirements to each "
+        f"one separately. Respond with a JSON array of exactly {len(texts)} strings, where string i is the "
+        f"summary of item i.\n\n{items}"
+    )
+
+
+def _bounded_groups(texts: List[str], max_items: int, max_chars: int) -> List[List[str]]:
+    """Consecutive groups of at most ``max_items`` texts and (unless a text alone exceeds it) ``max_chars``"""
+    groups, group, chars = [], [], 0
+    for text in texts:
+        if group and (len(group) >= max_items or chars + len(text) > max_chars):
+            groups.append(group)
+            group, chars = [], 0
+        group.append(text)
+        chars += len(text)
+    if group:
+        groups.append(group)
+    return groups
+
+
+class GeminiSummarizer(Summarizer):
+    def __init__(self, api_key: Optional[str] = None, client=None):
+        self.api_key = api_key or settings.gemini_api_key or os.getenv("GEMINI_API_KEY")
+        if client is None and not self.api_key:
+            raise ValueError("GEMINI_API_KEY environment variable is required")
+
+        from src.utils.gemini import GeminiClient
+
+        # Shared by every thread summarizing in this process: pooled connections, one rate limit
+        self.client = client or GeminiClient(self.api_key)
+        self.batch_size = max(1, settings.gemini_batch_size)
+        self.available = True
 
+    def warm_up(self) -> None:
+        """Skip the dummy call: warming a remote API only costs quota"""
+
+    def close(self) -> None:
+        self.client.close()
+
+    def cache_identity(self) -> Tuple[str, str, str]:
+        return "gemini", self.client.model, GEMINI_PROMPT_VERSION
+
+    def summarize(self, text: str, content_type: str = "document") -> str:
+        """Generate abstractive summary using Gemini API with context-specific prompts"""
+        try:
+            return self.client.generate(_gemini_prompt(text, content_type), temperature=0.3, max_output_tokens=200)
         except Exception as e:
-            print(f"Gemini summarization failed: {e}")
-            # Fallback to extractive summarization
-            fallback = ExtractiveSummarizer()
-            return fallback.summarize(text)
+            # Includes an open circuit, which fails without calling the API
+            logger.warning(f"Gemini summarization failed, using extractive fallback: {e}")
+            return _extractive_fallback(text, content_type)
+
+    def summarize_batch(self, texts: List[str], content_type: str = "document") -> List[str]:
+        """Summaries of ``texts`` in order, from one prompt per GEMINI_BATCH_SIZE texts"""
+        from src.utils.gemini import GeminiRequestError
+
+        summaries = []
+        for group in _bounded_groups(texts, self.batch_size, settings.gemini_batch_max_chars):
+            if len(group) == 1:
+                summaries.append(self.summarize(group[0], content_type))
+                continue
+            try:
+                answer = self.client.generate(
+                    _gemini_batch_prompt(group, content_type),
+                    temperature=0.3,
+                    max_output_tokens=200 * len(group),
+                    json_output=True,
+                )
+                parsed = json.loads(answer)
+                if not (
+                    isinstance(parsed, list)
+                    and len(parsed) == len(group)
+                    and all(isinstance(summary, str) and summary.strip() for summary in parsed)
+                ):
+                    raise ValueError(f"expected a JSON array of {len(group)} summaries")
+                summaries.extend(summary.strip() for summary in parsed)
+                metrics.inc("gemini_batched_summaries", len(group))
+            except (GeminiRequestError, ValueError) as e:
+                # The API answered, just not in a usable shape: summarize the texts one by one
+                logger.warning(f"Batched Gemini summary unusable, summarizing {len(group)} texts singly: {e}")
+                summaries.extend(self.summarize(text, content_type) for text in group)
+            except Exception as e:
+                # Unavailable, circuit open or rate limited: single calls would fail the same way
+                logger.warning(f"Batched Gemini summarization failed, using extractive fallback: {e}")
+                summaries.extend(_extractive_fallback(text, content_type) for text in group)
+        return summaries
 
 
 class BARTSummarizer(Summarizer):
@@ -134,40 +259,116 @@ class BARTSummarizer(Summarizer):
         except Exception as e:
             raise RuntimeError(f"BART initialization failed: {e}")
 
+    def cache_identity(self) -> Tuple[str, str, str]:
+        # The map-reduce token budgets change the output, so they are part of the version
+        version = (
+            f"input={settings.bart_max_input_tokens},chunk={settings.bart_chunk_tokens},"
+            f"partial={settings.bart_partial_summary_tokens}"
+        )
+        return "bart", self.summarizer.model.name_or_path, version
+
+    def _token_chunks(self, text: str, max_tokens: int) -> List[str]:
+        """Split text into sentence-aligned chunks of at most ``chunk_tokens`` model tokens.
+
+        Only the first ``max_tokens`` tokens are kept; a sentence longer than a
+        chunk is cut on token boundaries.
+        """
+        chunk_tokens = settings.bart_chunk_tokens
+        tokenizer = self.summarizer.tokenizer
+        sentences = [s for s in SENTENCE_BOUNDARY.split(text.strip()) if s]
+        if not sentences:
+            return []
+
+        # (text, token count) per sentence, within the token budget
+        pieces = []
+        budget = max_tokens
+        for sentence, ids in zip(sentences, tokenizer(sentences, add_special_tokens=False)["input_ids"]):
+            if len(ids) <= min(chunk_tokens, budget):
+                pieces.append((sentence, len(ids)))
+            else:
+                ids = ids[:budget]
+                for start in range(0, len(ids), chunk_tokens):
+                    part = ids[start : start + chunk_tokens]
+                    pieces.append((tokenizer.decode(part, skip_special_tokens=True), len(part)))
+            budget -= len(ids)
+            if budget <= 0:
+                break
+
+        chunks, sizes = [], []
+        for piece, size in pieces:
+            if chunks and sizes[-1] + size <= chunk_tokens:
+                chunks[-1] += " " + piece
+                sizes[-1] += size
+            else:
+                chunks.append(piece)
+                sizes.append(size)
+        return chunks
+
+    def _generate(self, chunks: List[str], max_length: int, min_length: int) -> List[str]:
+        """Summarize chunks in batched pipeline calls, up to ``bart_map_workers`` at a time"""
+        batch_size = max(1, settings.bart_batch_size)
+        batches = [chunks[start : start + batch_size] for start in range(0, len(chunks), batch_size)]
+
+        def run(batch: List[str]) -> List[str]:
+            outputs = self.summarizer(
+                batch,
+                batch_size=len(batch),
+                max_length=max_length,
+                min_length=min_length,
+                do_sample=False,
+                truncation=True,
+            )
+            return [output["summary_text"] for output in outputs]
+
+        workers = min(len(batches), max(1, settings.bart_map_workers))
+        if workers == 1:
+            results = [run(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bart-map") as pool:
+                results = list(pool.map(run, batches))
+        return [summary for batch in results for summary in batch]
+
     def summarize(self, text: str, content_type: str = "document") -> str:
-        """Generate abstractive summary using HuggingFace BART"""
+        """Generate abstractive summary using HuggingFace BART.
+
+        Inputs longer than one chunk are summarized map-reduce style: each
+        chunk is summarized, the partial summaries are joined and reduced
+        again until they fit a single chunk, then summarized once more. The
+        token cap bounds the number of chunks and so the latency.
+        """
         if not self.available:
             raise RuntimeError("BART summarizer not available")
 
         try:
-            # BART has a 1024 token limit, chunk longer texts
-            max_chunk_length = 800  # Conservative limit for tokens
-
-            if len(text) > max_chunk_length:
-                # Take first chunk for now (could be improved with sliding window)
-                text = text[:max_chunk_length]
+            chunks = self._token_chunks(text, settings.bart_max_input_tokens)
+            if not chunks:
+                return text
+            partial_max = settings.bart_partial_summary_tokens
+            while len(chunks) > 1:
+                partials = self._generate(chunks, max_length=partial_max, min_length=min(30, partial_max // 2))
+                reduced = self._token_chunks(" ".join(partials), settings.bart_max_input_tokens)
+                if len(reduced) >= len(chunks):
+                    # Partials are not shrinking; keep what fits in one chunk
+                    reduced = reduced[:1]
+                chunks = reduced
 
             # Generate summary with appropriate length based on input
-            input_length = len(text)
+            input_length = len(self.summarizer.tokenizer(chunks[0], add_special_tokens=False)["input_ids"])
             max_length = min(150, max(50, input_length // 4))  # 25% of input, capped
             min_length = min(30, max_length // 2)
 
-            summary = self.summarizer(
-                text, max_length=max_length, min_length=min_length, do_sample=False, truncation=True
-            )
+            summary = self._generate(chunks, max_length=max_length, min_length=min_length)
 
-            if summary and len(summary) > 0:
-                return summary[0]["summary_text"]
+            if summary:
+                return summary[0]
             else:
                 # Fallback to extractive if no response
-                fallback = ExtractiveSummarizer()
-                return fallback.summarize(text, content_type)
+                return _extractive_fallback(text, content_type)
 
         except Exception as e:
             print(f"BART summarization failed: {e}")
             # Fallback to extractive summarization
-            fallback = ExtractiveSummarizer()
-            return fallback.summarize(text, content_type)
+            return _extractive_fallback(text, content_type)
 
 
 def get_summarizer(provider: str = "extractive") -> Summarizer:
@@ -0,0 +1,169 @@
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.models.database import SummaryJob
+from src.utils.cache import search_result_cache
+from src.utils.metrics import metrics
+from src.utils.summarizer import Summarizer, summarize_checked
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_READY = "ready"
+SUMMARY_PENDING = "pending"
+SUMMARY_FAILED = "failed"
+
+ITEM_TABLES = {"document": "documents", "note": "meeting_notes"}
+
+# Claiming pushes run_after forward by the lease instead of holding row locks
+# while summarizing; a worker that dies mid-job releases it when the lease ends.
+CLAIM_JOBS = text("""
+    UPDATE summary_jobs
+    SET run_after = now() + make_interval(secs => :lease_seconds), attempts = attempts + 1
+    WHERE id IN (
+        SELECT id FROM summary_jobs
+        WHERE run_after <= now()
+        ORDER BY run_after
+        FOR UPDATE SKIP LOCKED
+        LIMIT :batch_size
+    )
+    RETURNING id, tenant_id, item_type, item_id, attempts
+""")
+DELETE_JOB = text("DELETE FROM summary_jobs WHERE id = :id")
+RETRY_JOB = text("""
+    UPDATE summary_jobs SET run_after = now() + make_interval(secs => :delay), last_error = :error
+    WHERE id = :id
+""")
+# tenant_id prunes the lookups to the job's tenant partition
+SELECT_CONTENT = {
+    kind: text(f"SELECT content FROM {table} WHERE tenant_id = :tenant_id AND id = :id")
+    for kind, table in ITEM_TABLES.items()
+}
+SET_SUMMARY = {
+    kind: text(
+        f"UPDATE {table} SET summary = :summary, summary_status = :status WHERE tenant_id = :tenant_id AND id = :id"
+    )
+    for kind, table in ITEM_TABLES.items()
+}
+
+
+def save_with_summary_job(db: Session, instance, item_type: str):
+    """Insert a pending item and its summary job in one transaction; blocking"""
+    db.add(instance)
+    db.flush()
+    db.add(SummaryJob(tenant_id=instance.tenant_id, item_type=item_type, item_id=instance.id))
+    db.commit()
+    db.refresh(instance)
+    return instance
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff after the given number of failed attempts, capped at one hour"""
+    return min(3600.0, settings.summary_job_backoff_seconds * 2 ** (attempts - 1))
+
+
+def claim_jobs(db: Session, batch_size: Optional[int] = None) -> List:
+    rows = db.execute(
+        CLAIM_JOBS,
+        {
+            "batch_size": batch_size or settings.summary_job_batch_size,
+            "lease_seconds": settings.summary_job_lease_seconds,
+        },
+    ).fetchall()
+    db.commit()
+    return rows
+
+
+def process_job(db: Session, summarizer: Summarizer, job) -> bool:
+    """Summarize one claimed job; returns True when the job is finished (done or given up).
+
+    An extractive fallback after a provider error counts as a failed attempt;
+    only once attempts are exhausted is it kept as the item's summary.
+    """
+    item = {"tenant_id": job.tenant_id, "id": job.item_id}
+    content = db.execute(SELECT_CONTENT[job.item_type], item).scalar()
+    if content is None:
+        # Item was deleted after the job was queued
+        db.execute(DELETE_JOB, {"id": job.id})
+        db.commit()
+        return True
+    # End the read transaction: the connection must not sit idle in transaction while the provider works
+    db.commit()
+
+    summary = None
+    try:
+        summary, from_provider = summarize_checked(summarizer, content, job.item_type)
+        if not from_provider:
+            raise RuntimeError("provider call failed; extractive fallback used")
+    except Exception as e:
+        if job.attempts >= settings.summary_job_max_attempts:
+            logger.error(f"Summary job {job.id} failed permanently after {job.attempts} attempts: {e}")
+            # A fallback summary beats none; the item is marked ready with it
+            status = SUMMARY_FAILED if summary is None else SUMMARY_READY
+            db.execute(SET_SUMMARY[job.item_type], {**item, "summary": summary, "status": status})
+            db.execute(DELETE_JOB, {"id": job.id})
+            db.commit()
+            search_result_cache.invalidate(job.tenant_id)
+            metrics.inc("summary_jobs_failed")
+            return True
+        delay = backoff_delay(job.attempts)
+        logger.warning(f"Summary job {job.id} attempt {job.attempts} failed, retrying in {delay:.0f}s: {e}")
+        db.execute(RETRY_JOB, {"id": job.id, "delay": delay, "error": str(e)[:1000]})
+        db.commit()
+        metrics.inc("summary_jobs_retried")
+        return False
+
+    db.execute(SET_SUMMARY[job.item_type], {**item, "summary": summary, "status": SUMMARY_READY})
+    db.execute(DELETE_JOB, {"id": job.id})
+    db.commit()
+    # Cached results carry the old summary; only reaches this process's cache
+    search_result_cache.invalidate(job.tenant_id)
+    metrics.inc("summary_jobs_completed")
+    return True
+
+
+def run_once(session_factory: Callable[[], Session], summarizer: Summarizer) -> int:
+    """Claim and process one batch; returns the number of jobs claimed"""
+    db = session_factory()
+    try:
+        jobs = claim_jobs(db)
+        for job in jobs:
+            try:
+                process_job(db, summarizer, job)
+            except SQLAlchemyError as e:
+                # The lease expires and another attempt picks the job up
+                logger.error(f"Database error processing summary job {job.id}: {e}")
+                db.rollback()
+        return len(jobs)
+    finally:
+        db.close()
+
+
+class SummaryWorker(threading.Thread):
+    """Polls the summary_jobs table until stopped; runs in-process or from src.worker"""
+
+    def __init__(self, session_factory: Callable[[], Session], summarizer: Summarizer, name: str = "summary-worker"):
+        super().__init__(name=name, daemon=True)
+        self.session_factory = session_factory
+        self.summarizer = summarizer
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                claimed = run_once(self.session_factory, self.summarizer)
+            except Exception as e:
+                logger.error(f"Summary worker error: {e}")
+                claimed = 0
+            # Drain the queue without pausing; sleep only when it is empty
+            if not claimed:
+                self._stop_event.wait(settings.summary_poll_interval_seconds)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        self.join(timeout)
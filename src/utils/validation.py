@@ -1,13 +1,31 @@
-from fastapi import HTTPException
+from typing import Optional
+
+from fastapi import Header, HTTPException
 from sqlalchemy.orm import Session
 
 from src.config import settings
 from src.models.database import Client
 
 
-def validate_client_exists(client_id: int, db: Session) -> Client:
-    """Validate client exists and belongs to tenant_id=1"""
-    client = db.query(Client).filter(Client.id == client_id, Client.tenant_id == settings.tenant_id).first()
+def get_tenant_id(
+    x_tenant_id: Optional[int] = Header(None, ge=1, description="Tenant the request is scoped to"),
+) -> int:
+    """Tenant dependency: the X-Tenant-ID header, or the configured tenant when it is absent.
+
+    The header is trusted as sent, so it must be set (and any client value
+    replaced) by the authenticating gateway in front of the API.
+    """
+    if x_tenant_id is not None:
+        return x_tenant_id
+    if settings.require_tenant_header:
+        raise HTTPException(status_code=400, detail="X-Tenant-ID header is required")
+    return settings.tenant_id
+
+
+def validate_client_exists(client_id: int, db: Session, tenant_id: Optional[int] = None) -> Client:
+    """Validate client exists and belongs to the tenant (the configured one by default)"""
+    tenant_id = tenant_id if tenant_id is not None else settings.tenant_id
+    client = db.query(Client).filter(Client.id == client_id, Client.tenant_id == tenant_id).first()
 
     if not client:
         raise HTTPException(status_code=404, detail=f"Client {client_id} not found")
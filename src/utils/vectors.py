@@ -0,0 +1,108 @@
+import struct
+
+import numpy as np
+from pgvector.psycopg import register_vector
+from pgvector.sqlalchemy import Vector
+from psycopg.adapt import Dumper, Loader
+from psycopg.pq import Format
+from sqlalchemy.types import UserDefinedType
+
+# pgvector's binary format: uint16 dimensions, uint16 unused, then big-endian float32s
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+
+
+def dump_vector_binary(value) -> bytes:
+    """Encode one vector in pgvector's binary format with a single vectorized conversion"""
+    array = np.asarray(value, dtype=_WIRE_DTYPE)
+    if array.ndim != 1:
+        raise ValueError(f"Expected a 1-d vector, got shape {array.shape}")
+    return _HEADER.pack(array.shape[0], 0) + array.tobytes()
+
+
+def load_vector_binary(data) -> np.ndarray:
+    """Decode pgvector's binary format into a native float32 array (one byteswapping copy)"""
+    dim, _ = _HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=_WIRE_DTYPE, count=dim, offset=_HEADER.size).astype(np.float32)
+
+
+def load_vector_text(data) -> np.ndarray:
+    """Parse '[0.1,0.2,...]' in C rather than one float() per element"""
+    return np.fromstring(bytes(data)[1:-1], dtype=np.float32, sep=",")
+
+
+class NumpyVectorBinaryDumper(Dumper):
+    format = Format.BINARY
+
+    def dump(self, obj):
+        return dump_vector_binary(obj)
+
+
+class NumpyVectorBinaryLoader(Loader):
+    format = Format.BINARY
+
+    def load(self, data):
+        return load_vector_binary(data)
+
+
+class NumpyVectorTextLoader(Loader):
+    format = Format.TEXT
+
+    def load(self, data):
+        return load_vector_text(data)
+
+
+def register_vector_adapters(dbapi_connection) -> None:
+    """Register pgvector types on a psycopg connection, with numpy float32 in and out.
+
+    pgvector's own adapters go through its ``Vector`` class, which copies
+    element by element; these replacements send ndarrays in binary with one
+    conversion and load vector columns as float32 arrays.
+    """
+    register_vector(dbapi_connection)
+    register_numpy_vector_codecs(dbapi_connection.adapters, dbapi_connection.adapters.types["vector"].oid)
+
+
+def register_numpy_vector_codecs(adapters, oid: int) -> None:
+    """Override the ndarray dumper and the vector loaders on a psycopg adapters map"""
+    # The oid lets psycopg pick this dumper for %s parameters and for COPY set_types(["vector"])
+    adapters.register_dumper("numpy.ndarray", type("NumpyVectorDumper", (NumpyVectorBinaryDumper,), {"oid": oid}))
+    adapters.register_loader(oid, NumpyVectorTextLoader)
+    adapters.register_loader(oid, NumpyVectorBinaryLoader)
+
+
+class BinaryVector(UserDefinedType):
+    """pgvector column and parameter type that hands float32 numpy arrays straight to the driver.
+
+    ``pgvector.sqlalchemy.Vector`` formats every value as a '[0.1,...]' string
+    in Python. With ``register_vector_adapters`` applied to the connection
+    (src.database does this on connect), an ndarray is sent in pgvector's
+    binary format instead, the statement text stays identical between calls
+    so it can be server-side prepared, and results come back as float32
+    arrays.
+    """
+
+    cache_ok = True
+    comparator_factory = Vector.comparator_factory
+
+    def __init__(self, dim: int = None):
+        super().__init__()
+        self.dim = dim
+
+    def get_col_spec(self, **kw) -> str:
+        return "VECTOR" if self.dim is None else f"VECTOR({self.dim})"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            return None if value is None else np.asarray(value, dtype=np.float32)
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            # Already an array when the connection has the adapters registered
+            if value is None or isinstance(value, np.ndarray):
+                return value
+            return load_vector_text(value.encode() if isinstance(value, str) else value)
+
+        return process
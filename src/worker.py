@@ -0,0 +1,39 @@
+"""Standalone summary worker: python -m src.worker [--threads N]"""
+
+import argparse
+import logging
+import signal
+import threading
+
+from src.config import settings
+from src.database import SessionLocal
+from src.utils.summarizer import get_summarizer
+from src.utils.summary_queue import SummaryWorker
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill deferred document and note summaries")
+    parser.add_argument("--threads", type=int, default=1, help="Worker threads sharing one summarizer")
+    args = parser.parse_args()
+
+    summarizer = get_summarizer(settings.summarizer)
+    workers = [SummaryWorker(SessionLocal, summarizer, name=f"summary-worker-{i}") for i in range(args.threads)]
+    for worker in workers:
+        worker.start()
+    logger.info(f"Started {len(workers)} summary worker(s) using '{settings.summarizer}'")
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    stopped.wait()
+
+    logger.info("Stopping summary workers")
+    for worker in workers:
+        worker.stop(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,106 @@ Tests core business logic, edge cases, and regression prevention
 import pytest
 from unittest.mock import patch, MagicMock
 import os
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
 
-from src.utils.summarizer import get_summarizer, ExtractiveSummarizer, GeminiSummarizer, BARTSummarizer
+import httpx
+import numpy as np
+
+from src.utils.summarizer import (
+    get_summarizer,
+    ExtractiveSummarizer,
+    GeminiSummarizer,
+    BARTSummarizer,
+    Summarizer,
+    _extractive_fallback,
+)
 from src.utils.search_utils import reciprocal_rank_fusion
-from src.utils.embedder import get_embedder, LocalEmbedder
-from src.utils.validation import validate_client_exists, validate_content_length, validate_search_query
+from src.utils.embedder import get_embedder, mean_pool, LocalEmbedder, OnnxEmbedder
+from src.utils.validation import (
+    get_tenant_id,
+    validate_client_exists,
+    validate_content_length,
+    validate_search_query,
+)
+from src.utils.batching import BatchingEmbedder
+from src.utils.bulk import bulk_ingest, parse_bulk_payload
+from src.utils.chunking import chunk_text, embed_chunks_batch, pool_chunk_scores
+from src.utils.cache import LRUCache, QueryEmbeddingCache, RedisCache, SearchResultCache, search_result_cache
+from src.utils.content_cache import (
+    content_hash,
+    embed_chunks_cached,
+    embedding_key,
+    store,
+    summarize_cached,
+    summary_key,
+)
+from src.utils.dedup import REPLAYED_HEADER, find_duplicate, save_unique, upload_hash
+from src.utils.executor import InferenceExecutor
+from src.utils.gemini import (
+    CircuitBreaker,
+    GeminiClient,
+    GeminiRequestError,
+    GeminiUnavailable,
+    RateLimitExceeded,
+    TokenBucket,
+)
+from src.utils.metrics import metrics
+from src.utils.vectors import (
+    BinaryVector,
+    dump_vector_binary,
+    load_vector_binary,
+    load_vector_text,
+    register_numpy_vector_codecs,
+)
+from src.utils.summary_queue import backoff_delay, claim_jobs, process_job
+from src.api.search import (
+    CHUNK_HYBRID_SEARCH_QUERIES,
+    FTS_SEARCH_QUERIES,
+    HYBRID_SEARCH_QUERIES,
+    HYDRATE_QUERIES,
+    SEARCH_BACKENDS,
+    VECTOR_SEARCH_QUERIES,
+    SearchFilters,
+    SearchOptions,
+    SearchSnapshot,
+    _collapse_near_duplicates,
+    _hybrid_search_query,
+    _hydrate_query,
+    _embed_query,
+    _hydrate,
+    _nearest_sql,
+    _plan_filtered_search,
+    _run_search,
+    _run_sql_search,
+    _search_and_release,
+    _vector_candidates,
+    _vector_search_query,
+    _vector_similarity,
+)
+from src.api.schemas import SearchResult
+from src.models.database import MeetingNote
+from src.services import ServiceRegistry, get_embedder_service, get_query_cache, get_summarizer_service, registry
 from src.config import settings
+from src.database import (
+    InstrumentedQueuePool,
+    _transaction_defaults_sql,
+    copy_rows,
+    driver_url,
+    engine_options,
+    get_db,
+)
+from src.main import app
 from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 
 @pytest.mark.unit
@@ -50,22 +143,18 @@ class TestSummarizerService:
         result = summarizer.summarize(single, content_type="document")
         assert result == single
 
-    @patch('src.utils.summarizer.ExtractiveSummarizer')
+    @patch('src.utils.summarizer._fallback_summarizer')
     def test_gemini_fallback_mechanism(self, mock_extractive):
         """Test Gemini falls back to extractive on failures"""
-        if not os.getenv("GEMINI_API_KEY"):
-            pytest.skip("GEMINI_API_KEY not available")
-
-        mock_extractive_instance = MagicMock()
-        mock_extractive_instance.summarize.return_value = "Fallback summary"
-        mock_extractive.return_value = mock_extractive_instance
+        mock_extractive.return_value.summarize.return_value = "Fallback summary"
 
-        summarizer = GeminiSummarizer()
+        summarizer = GeminiSummarizer(api_key="test-key")
 
-        with patch.object(summarizer.model, 'generate_content', side_effect=Exception("API Error")):
+        with patch.object(summarizer.client, 'generate', side_effect=Exception("API Error")):
             result = summarizer.summarize("Test content", content_type="document")
             assert result == "Fallback summary"
-            mock_extractive_instance.summarize.assert_called_once()
+            mock_extractive.return_value.summarize.assert_called_once()
+        summarizer.close()
 
 
 @pytest.mark.unit
@@ -208,3 +297,2086 @@ class TestConfiguration:
         assert config.settings.tenant_id == 1
         assert config.settings.embeddings_provider == "local"
         assert config.settings.summarizer == "gemini"
+
+
+@pytest.mark.unit
+class TestServiceRegistry:
+    """Test process-wide service registry lifecycle"""
+
+    def test_startup_loads_and_warms_once(self):
+        """Test providers are built and warmed a single time"""
+        embedder, summarizer = MagicMock(), MagicMock()
+        registry = ServiceRegistry()
+
+        with patch("src.services.get_embedder", return_value=embedder) as mock_embedder, patch(
+            "src.services.get_summarizer", return_value=summarizer
+        ) as mock_summarizer:
+            registry.startup()
+            registry.startup()
+
+        assert mock_embedder.call_count == 1
+        assert mock_summarizer.call_count == 1
+        embedder.warm_up.assert_called_once()
+        summarizer.warm_up.assert_called_once()
+        assert registry.ready
+        assert registry.status() == {"embedder": "ready", "summarizer": "ready"}
+        registry.shutdown()
+
+    def test_startup_failure_reported_not_ready(self):
+        """Test a failing provider leaves the registry unready with the error exposed"""
+        registry = ServiceRegistry()
+
+        with patch("src.services.get_embedder", return_value=MagicMock()), patch(
+            "src.services.get_summarizer", side_effect=ValueError("GEMINI_API_KEY environment variable is required")
+        ):
+            registry.startup()
+
+        assert not registry.ready
+        assert registry.status()["embedder"] == "ready"
+        assert "GEMINI_API_KEY" in registry.status()["summarizer"]
+
+    def test_dependencies_return_503_when_not_loaded(self):
+        """Test DI accessors refuse to serve before startup"""
+        registry.shutdown()
+
+        with pytest.raises(HTTPException) as exc_info:
+            get_embedder_service()
+        assert exc_info.value.status_code == 503
+
+        with pytest.raises(HTTPException) as exc_info:
+            get_summarizer_service()
+        assert exc_info.value.status_code == 503
+
+
+class _FakeBatchEmbedder:
+    """Embedder stand-in that records every batch it receives"""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    def encode_batch(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return np.array([[float(len(text))] for text in texts])
+
+    def warm_up(self):
+        pass
+
+
+@pytest.mark.unit
+class TestBatchingEmbedder:
+    """Test micro-batching scheduler in front of the embedder"""
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Test concurrent encodes are coalesced and each caller gets its own vector"""
+        inner = _FakeBatchEmbedder()
+        batcher = BatchingEmbedder(inner, max_batch_size=16, max_wait_ms=50)
+        texts = ["a" * n for n in range(1, 9)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(batcher.encode, texts))
+        batcher.close()
+
+        assert [r[0] for r in results] == [float(len(t)) for t in texts]
+        assert len(inner.batches) < len(texts)
+        assert sum(len(b) for b in inner.batches) == len(texts)
+
+    def test_batch_size_cap(self):
+        """Test no batch exceeds the configured maximum"""
+        inner = _FakeBatchEmbedder()
+        batcher = BatchingEmbedder(inner, max_batch_size=3, max_wait_ms=20)
+        futures = [batcher.submit(f"text {i}") for i in range(7)]
+        [f.result(timeout=5) for f in futures]
+        batcher.close()
+
+        assert max(len(b) for b in inner.batches) <= 3
+
+    def test_errors_propagate_to_every_caller(self):
+        """Test a failed batch fails all waiting futures"""
+        batcher = BatchingEmbedder(_FakeBatchEmbedder(fail=True), max_batch_size=4, max_wait_ms=20)
+        futures = [batcher.submit("x"), batcher.submit("y")]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model crashed"):
+                future.result(timeout=5)
+        batcher.close()
+
+    def test_batch_metrics_exported(self):
+        """Test batch size and queue depth are recorded"""
+        metrics.reset()
+        batcher = BatchingEmbedder(_FakeBatchEmbedder(), max_batch_size=4, max_wait_ms=1)
+        batcher.encode("hello")
+        batcher.close()
+
+        snapshot = metrics.snapshot()
+        assert snapshot["summaries"]["embedding_batch_size"]["count"] >= 1
+        assert "embedding_queue_depth" in snapshot["gauges"]
+
+
+@pytest.mark.unit
+class TestInferenceExecutor:
+    """Test bounded inference pool keeps the event loop free"""
+
+    def test_concurrency_is_bounded(self):
+        """Test no more than max_workers calls run at once"""
+        executor = InferenceExecutor(max_workers=2)
+        lock = threading.Lock()
+        running, peak = [0], [0]
+
+        def slow_call():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return "done"
+
+        async def main():
+            return await asyncio.gather(*(executor.run(slow_call) for _ in range(6)))
+
+        results = asyncio.run(main())
+        executor.shutdown()
+
+        assert results == ["done"] * 6
+        assert peak[0] <= 2
+
+    def test_event_loop_not_blocked(self):
+        """Test other coroutines progress while inference runs"""
+        executor = InferenceExecutor(max_workers=1)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(executor.run(time.sleep, 0.2), ticker())
+
+        asyncio.run(main())
+        executor.shutdown()
+
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.2
+
+
+@pytest.mark.unit
+class TestSearchHydration:
+    """Test batched hydration of fused search hits"""
+
+    @staticmethod
+    def _row(id, title=None):
+        return SimpleNamespace(
+            id=id,
+            client_id=1,
+            title=title,
+            content=f"content {id}",
+            snippet=None,
+            summary="s",
+            summary_status="ready",
+            created_at=datetime(2024, 1, 1),
+        )
+
+    def test_one_query_per_table_in_rrf_order(self):
+        """Test hydration issues one query per table and keeps fused order"""
+        db = MagicMock()
+        db.execute.side_effect = [
+            [self._row(7, "Doc 7"), self._row(3, "Doc 3")],  # documents, arbitrary DB order
+            [self._row(5)],  # notes
+        ]
+        ranked = [("doc_3", 0.03), ("note_5", 0.02), ("doc_7", 0.01)]
+
+        results = _hydrate(db, ranked)
+
+        assert db.execute.call_count == 2
+        assert [(r.type, r.id) for r in results] == [("document", 3), ("note", 5), ("document", 7)]
+        assert [r.score for r in results] == [0.03, 0.02, 0.01]
+        assert db.execute.call_args_list[0].args[1]["ids"] == [3, 7]
+
+    def test_skips_missing_rows_and_unused_tables(self):
+        """Test deleted rows are dropped and empty id lists skip the query"""
+        db = MagicMock()
+        db.execute.side_effect = [[self._row(1, "Doc 1")]]
+
+        results = _hydrate(db, [("doc_1", 0.5), ("doc_2", 0.4)])
+
+        assert db.execute.call_count == 1
+        assert [r.id for r in results] == [1]
+
+    def test_embedding_column_not_loaded(self):
+        """Test hydration projects only response columns"""
+        for statement in HYDRATE_QUERIES.values():
+            assert "content_embedding" not in str(statement)
+            assert "ANY(:ids)" in str(statement)
+
+
+@pytest.mark.unit
+class TestSqlHybridSearch:
+    """Test single-statement hybrid search backend"""
+
+    def test_single_round_trip(self):
+        """Test SQL mode issues one statement and maps rows in order"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(
+                type="note", id=4, score=0.032, client_id=1, title=None, content="c", snippet=None, summary="s",
+                summary_status="ready", created_at=datetime(2024, 1, 1),
+            ),
+            SimpleNamespace(
+                type="document", id=9, score=0.016, client_id=1, title="T", content="c", snippet=None, summary="s",
+                summary_status="ready", created_at=datetime(2024, 1, 1),
+            ),
+        ]
+
+        snapshot = _run_sql_search(db, "retirement", None, np.zeros(384))
+
+        assert db.execute.call_count == 1
+        assert [key for key, _ in snapshot.ranking] == ["note_4", "doc_9"]
+        assert snapshot.results["doc_9"].title == "T"
+        params = db.execute.call_args.args[1]
+        assert params["include_documents"] and params["include_notes"]
+        assert params["rrf_k"] == settings.rrf_k
+
+    def test_type_filter_disables_other_table(self):
+        """Test type filter is passed through as include flags"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+
+        _run_sql_search(db, "retirement", "note", np.zeros(384))
+
+        params = db.execute.call_args.args[1]
+        assert params["include_notes"] and not params["include_documents"]
+
+    def test_search_backends_registered(self):
+        """Test both search modes are selectable"""
+        assert set(SEARCH_BACKENDS) == {"python", "sql"}
+        assert "UNION ALL" in str(HYBRID_SEARCH_QUERIES[("cosine", "none")])
+
+
+@pytest.mark.unit
+class TestVectorSearchTuning:
+    """Test vector metric selection and per-query ANN overrides"""
+
+    def test_cosine_and_inner_product_operators(self):
+        """Test SQL mode uses the operator matching the index ops"""
+        assert "<=>" in str(HYBRID_SEARCH_QUERIES[("cosine", "none")])
+        assert "<#>" in str(HYBRID_SEARCH_QUERIES[("inner_product", "none")])
+        assert "<->" not in str(HYBRID_SEARCH_QUERIES[("cosine", "none")])
+
+    def test_ef_search_override_is_transaction_local(self):
+        """Test request-level ef_search is applied with set_config(..., true)"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+
+        with patch.object(settings, "vector_index", "hnsw"):
+            _run_sql_search(db, "rmd", None, np.zeros(384), SearchOptions(ef_search=200))
+
+        statement, params = db.execute.call_args_list[0].args
+        assert "set_config" in str(statement)
+        assert params == {"name": "hnsw.ef_search", "value": "200"}
+
+    def test_no_override_skips_round_trip(self):
+        """Test defaults come from the connection, not an extra statement"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+
+        _run_sql_search(db, "rmd", None, np.zeros(384), SearchOptions())
+
+        assert db.execute.call_count == 1
+
+
+@pytest.mark.unit
+class TestBulkIngest:
+    """Test bulk ingestion parsing, batching and per-item status"""
+
+    @staticmethod
+    def _services():
+        embedder = MagicMock()
+        embedder.encode_batch.side_effect = lambda texts: np.zeros((len(texts), 384))
+        summarizer = MagicMock(batch_size=1)
+        summarizer.summarize.side_effect = lambda text, content_type: text[:10]
+        return embedder, summarizer
+
+    def test_parse_json_array_and_ndjson(self):
+        """Test both payload formats are accepted"""
+        assert parse_bulk_payload(b'[{"content": "a"}, {"content": "b"}]') == [{"content": "a"}, {"content": "b"}]
+        ndjson = b'{"content": "a"}\n\n{"content": "b"}\n'
+        assert parse_bulk_payload(ndjson, "application/x-ndjson") == [{"content": "a"}, {"content": "b"}]
+
+    def test_parse_errors(self):
+        """Test malformed payloads raise ValueError with context"""
+        with pytest.raises(ValueError, match="line 2"):
+            parse_bulk_payload(b'{"content": "a"}\n{oops', "application/x-ndjson")
+        with pytest.raises(ValueError, match="JSON array"):
+            parse_bulk_payload(b'{"content": "a"}')
+
+    def test_chunks_batched_with_per_item_status(self):
+        """Test items are embedded per chunk and invalid items reported individually"""
+        embedder, summarizer = self._services()
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.side_effect = [[101, 102], [103]]
+        items = [{"content": "one"}, {"content": ""}, {"content": "two"}, "not an object", {"content": "three"}]
+
+        with patch("src.utils.bulk.copy_rows") as copy_rows:
+            results = bulk_ingest(db, embedder, summarizer, 1, "note", items, chunk_size=2, summary_workers=2)
+
+        assert [r.status for r in results] == ["created", "error", "created", "error", "created"]
+        assert [r.id for r in results if r.id] == [101, 102, 103]
+        assert embedder.encode_batch.call_count == 2
+        # One duplicate lookup, then an item insert plus a binary COPY of the chunks per batch
+        assert db.execute.call_count == 3
+        assert copy_rows.call_count == 2
+        assert copy_rows.call_args_list[0].args[1] == "note_chunks"
+        assert db.commit.call_count == 2
+        inserted_rows = db.execute.call_args_list[1].args[1]
+        assert [row["content"] for row in inserted_rows] == ["one", "two"]
+
+    def test_database_failure_marks_chunk(self):
+        """Test a failed insert rolls back and fails only that chunk"""
+        embedder, summarizer = self._services()
+        db = MagicMock()
+        db.execute.side_effect = OperationalError("INSERT", {}, Exception("connection lost"))
+
+        results = bulk_ingest(db, embedder, summarizer, 1, "document", [{"title": "T", "content": "c"}])
+
+        assert results[0].status == "error"
+        assert results[0].error == "Database operation failed"
+        db.rollback.assert_called_once()
+
+    def test_bulk_route_accepts_ndjson(self):
+        """Test the :bulk route resolves and reports counts"""
+        embedder, summarizer = self._services()
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = [7, 8]
+        app.dependency_overrides = {
+            get_db: lambda: db,
+            get_embedder_service: lambda: embedder,
+            get_summarizer_service: lambda: summarizer,
+        }
+        try:
+            with patch("src.api.bulk.validate_client_exists"):
+                response = TestClient(app).post(
+                    "/clients/1/notes:bulk",
+                    content=b'{"content": "first"}\n{"content": "second"}\n',
+                    headers={"Content-Type": "application/x-ndjson"},
+                )
+        finally:
+            app.dependency_overrides = {}
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["created"] == 2 and body["failed"] == 0
+        assert [item["id"] for item in body["items"]] == [7, 8]
+
+    def test_batching_summarizer_gets_groups(self):
+        """Test providers with a batch_size above one summarize several items per call"""
+        embedder, summarizer = self._services()
+        summarizer.batch_size = 2
+        summarizer.summarize_batch.side_effect = lambda texts, content_type: [text.upper() for text in texts]
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = [1, 2, 3]
+
+        with patch("src.utils.bulk.copy_rows"):
+            bulk_ingest(db, embedder, summarizer, 1, "note", [{"content": c} for c in ("one", "two", "three")])
+
+        summarizer.summarize_batch.assert_called_once_with(["one", "two"], content_type="note")
+        summarizer.summarize.assert_called_once_with("three", content_type="note")
+        inserted_rows = db.execute.call_args_list[1].args[1]
+        assert [row["summary"] for row in inserted_rows] == ["ONE", "TWO", "three"]
+
+
+@pytest.mark.unit
+class TestSummaryQueue:
+    """Test deferred summarization jobs, retries and backoff"""
+
+    @staticmethod
+    def _job(attempts=1):
+        return SimpleNamespace(id=11, tenant_id=1, item_type="note", item_id=5, attempts=attempts)
+
+    def test_completed_job_sets_summary_and_deletes(self):
+        """Test a successful job writes the summary and removes the job"""
+        db = MagicMock()
+        db.execute.return_value.scalar.return_value = "Long meeting note content."
+        summarizer = MagicMock()
+        summarizer.summarize.return_value = "Short summary."
+
+        assert process_job(db, summarizer, self._job()) is True
+
+        update_params = db.execute.call_args_list[1].args[1]
+        assert update_params == {"tenant_id": 1, "id": 5, "summary": "Short summary.", "status": "ready"}
+        assert "DELETE FROM summary_jobs" in str(db.execute.call_args_list[2].args[0])
+        # The read is committed before summarizing, the result written in a second transaction
+        assert db.commit.call_count == 2
+
+    def test_failure_schedules_retry_with_backoff(self):
+        """Test a failed attempt is rescheduled with exponential delay"""
+        db = MagicMock()
+        db.execute.return_value.scalar.return_value = "content"
+        summarizer = MagicMock()
+        summarizer.summarize.side_effect = RuntimeError("model timeout")
+
+        with patch.object(settings, "summary_job_backoff_seconds", 5.0):
+            assert process_job(db, summarizer, self._job(attempts=3)) is False
+
+        retry_params = db.execute.call_args_list[1].args[1]
+        assert retry_params["delay"] == 20.0
+        assert "model timeout" in retry_params["error"]
+
+    def test_failure_after_max_attempts_marks_failed(self):
+        """Test the item is marked failed once retries are exhausted"""
+        db = MagicMock()
+        db.execute.return_value.scalar.return_value = "content"
+        summarizer = MagicMock()
+        summarizer.summarize.side_effect = RuntimeError("still down")
+
+        with patch.object(settings, "summary_job_max_attempts", 3):
+            assert process_job(db, summarizer, self._job(attempts=3)) is True
+
+        assert db.execute.call_args_list[1].args[1]["status"] == "failed"
+
+    def test_fallback_summary_counts_as_failed_attempt(self):
+        """Test a provider falling back to extractive retries the job, keeping the fallback only at the end"""
+        db = MagicMock()
+        db.execute.return_value.scalar.return_value = "content"
+        summarizer = _FlakySummarizer(fail=True)
+
+        with patch.object(settings, "summary_job_max_attempts", 3), \
+                patch("src.utils.summarizer._fallback_summarizer") as extractive:
+            extractive.return_value.summarize.return_value = "Fallback summary"
+            assert process_job(db, summarizer, self._job(attempts=1)) is False
+            assert "extractive fallback" in db.execute.call_args_list[1].args[1]["error"]
+
+            db.execute.reset_mock()
+            assert process_job(db, summarizer, self._job(attempts=3)) is True
+
+        update_params = db.execute.call_args_list[1].args[1]
+        assert update_params["summary"] == "Fallback summary" and update_params["status"] == "ready"
+
+    def test_backoff_is_capped(self):
+        """Test backoff grows exponentially up to one hour"""
+        with patch.object(settings, "summary_job_backoff_seconds", 5.0):
+            assert [backoff_delay(n) for n in (1, 2, 3)] == [5.0, 10.0, 20.0]
+            assert backoff_delay(30) == 3600.0
+
+    def test_claim_uses_skip_locked(self):
+        """Test concurrent workers never claim the same job"""
+        db = MagicMock()
+        claim_jobs(db, batch_size=4)
+
+        statement, params = db.execute.call_args.args
+        assert "FOR UPDATE SKIP LOCKED" in str(statement)
+        assert params["batch_size"] == 4
+
+    def test_bulk_deferred_mode_queues_jobs(self):
+        """Test deferred bulk ingest skips the summarizer and enqueues jobs"""
+        embedder = MagicMock()
+        embedder.encode_batch.side_effect = lambda texts: np.zeros((len(texts), 384))
+        summarizer = MagicMock()
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = [1, 2]
+
+        copied = []
+        with patch.object(settings, "summary_mode", "deferred"), patch(
+            "src.utils.bulk.copy_rows", side_effect=lambda db, table, columns, types, rows: copied.extend(rows)
+        ):
+            results = bulk_ingest(db, embedder, summarizer, 1, "note", [{"content": "a"}, {"content": "b"}])
+
+        assert [r.status for r in results] == ["created", "created"]
+        summarizer.summarize.assert_not_called()
+        # After the duplicate lookup: the item insert, then the jobs
+        rows = db.execute.call_args_list[1].args[1]
+        assert all(row["summary"] is None and row["summary_status"] == "pending" for row in rows)
+        # (tenant_id, note_id, chunk_index, content, embedding)
+        assert [chunk[1] for chunk in copied] == [1, 2]
+        jobs = db.execute.call_args_list[2].args[1]
+        assert [job["item_id"] for job in jobs] == [1, 2]
+
+
+class _DictRedis:
+    """Minimal stand-in for a Redis client: get/set(ex=)/delete"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.mark.unit
+class TestQueryEmbeddingCache:
+    """Test the LRU/TTL cache and query embedding reuse in search"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_lru_evicts_least_recently_used(self):
+        """Test reads refresh recency and the oldest entry is evicted"""
+        cache = LRUCache(2, name="t")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert metrics.counter("t_evictions") == 1
+        assert metrics.counter("t_hits") == 3
+        assert metrics.counter("t_misses") == 1
+
+    def test_ttl_expires_entries(self):
+        """Test expired entries count as misses"""
+        cache = LRUCache(10, ttl_seconds=0.01, name="t")
+        cache.set("a", 1)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_normalized_key_includes_model(self):
+        """Test case and whitespace variants share an entry, models don't"""
+        cache = QueryEmbeddingCache(LRUCache(10), "model-a")
+        other = QueryEmbeddingCache(LRUCache(10), "model-b")
+
+        assert cache.key("  Roth   Conversion ") == cache.key("roth conversion")
+        assert cache.key("rmd") != other.key("rmd")
+
+    def test_stores_float32_bytes(self):
+        """Test vectors round-trip as compact float32 through a shared backend"""
+        client = _DictRedis()
+        cache = QueryEmbeddingCache(RedisCache(client, ttl_seconds=60), "model-a")
+        cache.put("rmd", np.linspace(0, 1, 384, dtype=np.float64))
+
+        stored = next(iter(client.data.values()))
+        assert isinstance(stored, bytes) and len(stored) == 384 * 4
+        vector = cache.get("RMD")
+        assert vector.dtype == np.float32
+        np.testing.assert_allclose(vector, np.linspace(0, 1, 384), rtol=1e-6)
+
+    def test_search_embeds_repeated_query_once(self):
+        """Test the second identical search skips the embedder"""
+        embedder = MagicMock()
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.ones(384)))
+        cache = QueryEmbeddingCache(LRUCache(10), "model-a")
+
+        first = asyncio.run(_embed_query("retirement plan", embedder, cache))
+        second = asyncio.run(_embed_query("Retirement  plan", embedder, cache))
+
+        assert embedder.encode_async.call_count == 1
+        np.testing.assert_array_equal(first, second)
+
+    def test_cache_failure_falls_back_to_embedder(self):
+        """Test a broken shared backend doesn't fail the search"""
+        client = MagicMock()
+        client.get.side_effect = ConnectionError("redis down")
+        client.set.side_effect = ConnectionError("redis down")
+        embedder = MagicMock()
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.ones(384)))
+        cache = QueryEmbeddingCache(RedisCache(client), "model-a")
+
+        result = asyncio.run(_embed_query("rmd", embedder, cache))
+
+        np.testing.assert_array_equal(result, np.ones(384))
+
+
+@pytest.mark.unit
+class TestSearchResultCache:
+    """Test search result caching and write-driven invalidation"""
+
+    def setup_method(self):
+        search_result_cache.clear()
+
+    def test_generation_bump_hides_old_entries(self):
+        """Test invalidating one tenant leaves other tenants cached"""
+        cache = SearchResultCache(10)
+        cache.put(1, cache.generation(1), ("rmd",), ["a"])
+        cache.put(2, cache.generation(2), ("rmd",), ["b"])
+
+        cache.invalidate(1)
+
+        assert cache.get(1, cache.generation(1), ("rmd",)) is None
+        assert cache.get(2, cache.generation(2), ("rmd",)) == ["b"]
+
+    def test_disabled_cache_never_stores(self):
+        """Test size 0 disables caching"""
+        cache = SearchResultCache(0)
+        cache.put(1, 0, ("rmd",), ["a"])
+        assert cache.get(1, 0, ("rmd",)) is None
+
+    def _search(self, backend, *queries):
+        embedder = MagicMock()
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.zeros(384)))
+        app.dependency_overrides = {
+            get_db: lambda: MagicMock(),
+            get_embedder_service: lambda: embedder,
+            get_query_cache: lambda: None,
+        }
+        try:
+            with patch.dict(SEARCH_BACKENDS, {settings.search_mode: backend}):
+                client = TestClient(app)
+                return [client.get("/search", params=params) for params in queries]
+        finally:
+            app.dependency_overrides = {}
+
+    def test_repeated_search_served_from_cache(self):
+        """Test identical searches hit the database once until a write"""
+        backend = MagicMock(return_value=SearchSnapshot([]))
+
+        responses = self._search(backend, {"q": "Roth conversion"}, {"q": "roth  conversion"}, {"q": "rmd"})
+        assert all(r.status_code == 200 for r in responses)
+        assert backend.call_count == 2
+        assert responses[1].json()["query"] == "roth  conversion"
+
+        search_result_cache.invalidate(settings.tenant_id)
+        self._search(backend, {"q": "Roth conversion"})
+        assert backend.call_count == 3
+
+    def test_ranking_params_are_part_of_key(self):
+        """Test a different type filter or ef_search misses the cache"""
+        backend = MagicMock(return_value=SearchSnapshot([]))
+
+        self._search(backend, {"q": "rmd"}, {"q": "rmd", "type": "note"}, {"q": "rmd", "ef_search": 100})
+
+        assert backend.call_count == 3
+
+    def test_bulk_ingest_invalidates_tenant(self):
+        """Test a successful bulk upload bumps the tenant generation"""
+        embedder = MagicMock()
+        embedder.encode_batch.side_effect = lambda texts: np.zeros((len(texts), 384))
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = [7]
+        app.dependency_overrides = {
+            get_db: lambda: db,
+            get_embedder_service: lambda: embedder,
+            get_summarizer_service: lambda: MagicMock(batch_size=1),
+        }
+        before = search_result_cache.generation(settings.tenant_id)
+        try:
+            with patch("src.api.bulk.validate_client_exists"):
+                TestClient(app).post("/clients/1/notes:bulk", json=[{"content": "first"}])
+        finally:
+            app.dependency_overrides = {}
+
+        assert search_result_cache.generation(settings.tenant_id) == before + 1
+
+
+@pytest.mark.unit
+class TestChunking:
+    """Test passage chunking, chunk embedding and pooling back to parents"""
+
+    def test_short_text_is_one_chunk(self):
+        """Test texts under the window size are not split"""
+        assert chunk_text("Roth conversion timing. RMD starts at 73.", max_words=50) == [
+            "Roth conversion timing. RMD starts at 73."
+        ]
+
+    def test_windows_are_bounded_and_overlap(self):
+        """Test windows respect max words and repeat trailing sentences"""
+        text = " ".join(f"Sentence {i} talks about bonds." for i in range(40))
+
+        chunks = chunk_text(text, max_words=30, overlap_words=10)
+
+        assert len(chunks) > 1
+        assert all(len(chunk.split()) <= 30 for chunk in chunks)
+        # 10 overlap words carry the last two 5-word sentences into the next window
+        assert chunks[1].startswith(" ".join(chunks[0].split()[-10:]))
+        assert "Sentence 39" in chunks[-1]
+
+    def test_long_sentence_split_on_words(self):
+        """Test a run-on sentence longer than a window is still covered"""
+        chunks = chunk_text("word " * 100, max_words=30, overlap_words=5)
+
+        assert all(len(chunk.split()) <= 30 for chunk in chunks)
+        assert len(chunks) >= 4
+
+    def test_batch_embeds_all_chunks_in_one_call(self):
+        """Test chunks of several texts share one model call and pool per text"""
+        embedder = MagicMock()
+        embedder.encode_batch.side_effect = lambda texts: np.eye(len(texts), 384)
+
+        with patch.object(settings, "chunk_max_words", 10), patch.object(settings, "chunk_overlap_words", 0):
+            results = embed_chunks_batch(embedder, ["Short note.", "One two three four five. Six seven eight nine ten."])
+
+        assert embedder.encode_batch.call_count == 1
+        assert [len(chunks) for chunks, _, _ in results] == [1, 1]
+        with patch.object(settings, "chunk_max_words", 5), patch.object(settings, "chunk_overlap_words", 0):
+            (chunks, vectors, pooled), = embed_chunks_batch(embedder, ["One two three four five. Six seven eight."])
+        assert len(chunks) == 2 and vectors.shape == (2, 384)
+        assert np.isclose(np.linalg.norm(pooled), 1.0)
+
+    def test_max_and_sum_pooling(self):
+        """Test max favors the best passage, sum favors many matching passages"""
+        hits = [(1, 0.9), (2, 0.6), (2, 0.5), (1, 0.1)]
+
+        assert pool_chunk_scores(hits, "max") == [(1, 0.9), (2, 0.6)]
+        assert [item_id for item_id, _ in pool_chunk_scores(hits, "sum")] == [2, 1]
+        with pytest.raises(ValueError):
+            pool_chunk_scores(hits, "mean")
+
+    def test_chunk_vector_candidates(self):
+        """Test Python mode retrieves chunks and pools them to parent ids"""
+        db = MagicMock()
+        db.execute.return_value = [SimpleNamespace(id=7, distance=0.1), SimpleNamespace(id=7, distance=0.2),
+                                   SimpleNamespace(id=3, distance=0.3)]
+
+        with patch.object(settings, "vector_granularity", "chunk"), patch.object(settings, "chunk_pooling", "max"):
+            candidates = _vector_candidates(db, "note", np.zeros(384))
+
+        assert [item_id for item_id, _ in candidates] == [7, 3]
+        statement, params = db.execute.call_args.args
+        assert "note_chunks" in str(statement)
+        assert params["limit"] == 50 * settings.chunk_candidate_multiplier
+
+    def test_sql_mode_uses_chunk_statement(self):
+        """Test SQL mode pools chunk hits inside the single statement"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+
+        with patch.object(settings, "vector_granularity", "chunk"), patch.object(settings, "chunk_pooling", "sum"):
+            _run_sql_search(db, "rmd", None, np.zeros(384))
+
+        statement, params = db.execute.call_args.args
+        assert "document_chunks" in str(statement) and "sum(1 - distance)" in str(statement)
+        assert params["chunk_candidates"] > params["candidates"]
+
+
+class _FakeTokenizer:
+    """Whitespace tokenizer with the slice of the HF tokenizer API BARTSummarizer uses"""
+
+    def __init__(self):
+        self.vocab = {}
+        self.words = []
+
+    def _id(self, word):
+        if word not in self.vocab:
+            self.vocab[word] = len(self.words)
+            self.words.append(word)
+        return self.vocab[word]
+
+    def __call__(self, texts, add_special_tokens=False):
+        if isinstance(texts, str):
+            return {"input_ids": [self._id(w) for w in texts.split()]}
+        return {"input_ids": [[self._id(w) for w in text.split()] for text in texts]}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(self.words[i] for i in ids)
+
+
+class _FakeBartPipeline:
+    """Records batched calls and 'summarizes' each input to its first five words"""
+
+    def __init__(self):
+        self.tokenizer = _FakeTokenizer()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, inputs, batch_size=1, max_length=None, min_length=None, do_sample=False, truncation=True):
+        with self.lock:
+            self.calls.append((list(inputs), max_length))
+        return [{"summary_text": " ".join(text.split()[:5]) + "."} for text in inputs]
+
+
+@pytest.mark.unit
+class TestBartMapReduce:
+    """Test hierarchical BART summarization with a fake pipeline"""
+
+    def setup_method(self):
+        self._cached = BARTSummarizer._model_cache
+        BARTSummarizer._model_cache = _FakeBartPipeline()
+        self.summarizer = BARTSummarizer()
+        self.pipeline = BARTSummarizer._model_cache
+
+    def teardown_method(self):
+        BARTSummarizer._model_cache = self._cached
+
+    @staticmethod
+    def _text(sentences):
+        return " ".join(f"Sentence {i} covers the client's retirement accounts today." for i in range(sentences))
+
+    def test_short_text_single_call(self):
+        """Test inputs that fit one chunk are summarized once"""
+        summary = self.summarizer.summarize(self._text(3))
+
+        assert len(self.pipeline.calls) == 1
+        assert summary.startswith("Sentence 0")
+
+    def test_long_text_is_mapped_then_reduced(self):
+        """Test every chunk is read, in batches, before the final summary"""
+        with patch.object(settings, "bart_chunk_tokens", 40), patch.object(settings, "bart_batch_size", 3):
+            self.summarizer.summarize(self._text(40))
+
+        map_calls = self.pipeline.calls[:-1]
+        assert all(len(inputs) <= 3 for inputs, _ in map_calls)
+        mapped = [text for inputs, _ in map_calls for text in inputs]
+        assert any("Sentence 39" in text for text in mapped)
+        assert all(len(text.split()) <= 40 for text in mapped)
+        final_inputs, _ = self.pipeline.calls[-1]
+        assert len(final_inputs) == 1
+
+    def test_token_cap_bounds_work(self):
+        """Test text beyond the token cap is never sent to the model"""
+        with patch.object(settings, "bart_chunk_tokens", 40), patch.object(settings, "bart_max_input_tokens", 80):
+            self.summarizer.summarize(self._text(100))
+
+        first_round = self.pipeline.calls[0][0]
+        assert sum(len(text.split()) for text in first_round) <= 80
+        assert not any("Sentence 20" in text for inputs, _ in self.pipeline.calls for text in inputs)
+
+    def test_concurrent_map_keeps_order(self):
+        """Test parallel map workers return partial summaries in chunk order"""
+        with patch.object(settings, "bart_batch_size", 1), patch.object(settings, "bart_map_workers", 4):
+            partials = self.summarizer._generate(["a b c", "d e f", "g h i", "j k l"], max_length=50, min_length=5)
+
+        assert partials == ["a b c.", "d e f.", "g h i.", "j k l."]
+
+
+@pytest.mark.unit
+class TestOnnxEmbedder:
+    """Test the ONNX Runtime embedder provider"""
+
+    PARITY_TEXTS = [
+        "Client wants to discuss Roth conversion timing before year end.",
+        "Quarterly statement: equities returned 7.2% against a 6.1% benchmark.",
+        "Required minimum distributions start at 73 for this beneficiary IRA.",
+        "Estate plan review with the trust attorney scheduled for March.",
+    ]
+
+    def test_mean_pool_ignores_padding(self):
+        """Test padded positions don't shift the pooled vector"""
+        tokens = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+
+        pooled = mean_pool(tokens, mask)
+
+        np.testing.assert_allclose(pooled, [[1.0, 0.0]])
+
+    def test_factory_selects_quantization(self):
+        """Test EMBEDDINGS_PROVIDER names map to fp32 and int8 variants"""
+        with patch.object(OnnxEmbedder, "__init__", return_value=None) as init:
+            assert isinstance(get_embedder("onnx"), OnnxEmbedder)
+            assert isinstance(get_embedder("onnx_int8"), OnnxEmbedder)
+
+        assert init.call_args_list[0].kwargs == {}
+        assert init.call_args_list[1].kwargs == {"quantize": True}
+
+    @pytest.mark.parametrize("quantize,threshold", [(False, 0.999), (True, 0.98)])
+    def test_parity_with_torch(self, quantize, threshold):
+        """Test ONNX vectors match the PyTorch model within a cosine threshold"""
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("sentence_transformers")
+        try:
+            reference = LocalEmbedder()
+            candidate = OnnxEmbedder(quantize=quantize)
+        except Exception as e:
+            pytest.skip(f"Model files unavailable: {e}")
+
+        expected = reference.encode_batch(self.PARITY_TEXTS)
+        actual = candidate.encode_batch(self.PARITY_TEXTS)
+
+        similarities = np.sum(expected * actual, axis=1)
+        assert similarities.min() > threshold
+        np.testing.assert_allclose(np.linalg.norm(actual, axis=1), 1.0, rtol=1e-5)
+
+
+@pytest.mark.unit
+class TestAppProfiles:
+    """Test the search-only deployment profile"""
+
+    def test_search_profile_mounts_only_search(self):
+        """Test the search app serves /search, /health and /metrics without ingestion routes"""
+        from src.app import create_app
+
+        paths = set(create_app("search").openapi()["paths"])
+
+        assert paths == {"/search", "/health", "/metrics"}
+        assert any(path.startswith("/clients") for path in app.openapi()["paths"])
+
+    def test_unknown_profile_rejected(self):
+        """Test a typo in the profile name fails loudly"""
+        from src.app import create_app
+
+        with pytest.raises(ValueError):
+            create_app("ingest")
+
+    def test_registry_ready_without_summarizer(self):
+        """Test search processes are ready once the embedder loads"""
+        registry = ServiceRegistry()
+
+        with patch("src.services.get_embedder", return_value=MagicMock()), patch(
+            "src.services.get_summarizer"
+        ) as mock_summarizer:
+            registry.startup(load_summarizer=False)
+
+        mock_summarizer.assert_not_called()
+        assert registry.ready
+        assert registry.status() == {"embedder": "ready"}
+        registry.shutdown()
+
+    def test_search_entrypoint_skips_heavy_imports(self):
+        """Test importing the search app loads no torch or summarization library"""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, src.search_main; "
+            "print(','.join(m for m in sys.modules if m.split('.')[0] in "
+            "('torch', 'transformers', 'sentence_transformers', 'nltk', 'sumy') or m == 'src.utils.gemini'))"
+        )
+        root = os.path.join(os.path.dirname(__file__), "..")
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, timeout=120)
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == ""
+
+
+@pytest.mark.unit
+class TestConnectionPool:
+    """Test pool configuration, pool metrics and PgBouncer mode"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_engine_options_from_settings(self):
+        """Test pool knobs and the statement timeout startup parameter come from Settings"""
+        config = settings.model_copy(update={"db_pool_size": 7, "db_max_overflow": 3, "db_statement_timeout_ms": 1500})
+
+        options = engine_options(config)
+
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert (options["pool_size"], options["max_overflow"]) == (7, 3)
+        assert options["pool_pre_ping"] is True
+        assert options["connect_args"]["options"] == "-c statement_timeout=1500"
+        assert options["connect_args"]["application_name"] == settings.db_application_name
+
+    def test_pgbouncer_mode_uses_transaction_local_defaults(self):
+        """Test PgBouncer mode sends no startup options and sets defaults per transaction"""
+        config = settings.model_copy(update={"db_pgbouncer": True, "db_statement_timeout_ms": 1500})
+
+        options = engine_options(config)
+        statement = _transaction_defaults_sql(config)
+
+        assert "options" not in options["connect_args"]
+        assert "set_config('statement_timeout', '1500', true)" in statement
+        assert f"set_config('hnsw.ef_search', '{settings.hnsw_ef_search}', true)" in statement
+
+    def test_pool_reports_usage_and_timeouts(self):
+        """Test checkout wait, in-use connections and checkout timeouts are recorded"""
+        pool = InstrumentedQueuePool(MagicMock, pool_size=1, max_overflow=0, timeout=0.05)
+
+        connection = pool.connect()
+        assert metrics.snapshot()["gauges"]["db_pool_in_use"] == 1
+        with pytest.raises(PoolTimeoutError):
+            pool.connect()
+        connection.close()
+
+        snapshot = metrics.snapshot()
+        assert snapshot["gauges"]["db_pool_in_use"] == 0
+        assert snapshot["counters"]["db_pool_checkout_timeouts"] == 1
+        assert snapshot["summaries"]["db_pool_checkout_wait_seconds"]["count"] == 2
+        assert snapshot["summaries"]["db_pool_checkout_wait_seconds"]["max"] >= 0.05
+
+    def test_search_releases_connection_on_error(self):
+        """Test the search transaction ends even when the backend fails"""
+        db = MagicMock()
+
+        def failing_backend(db, *args):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            _search_and_release(failing_backend, db, "q")
+        db.rollback.assert_called_once()
+
+
+@pytest.mark.unit
+class TestPreparedStatements:
+    """Test statement reuse, prepared statement settings and binary vector parameters"""
+
+    def test_python_search_reuses_module_statements(self):
+        """Test every statement a search runs is a module-level construct, so its SQL text is stable"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [SimpleNamespace(id=3, score=0.5)]
+        db.execute.return_value.__iter__.return_value = iter([])
+        module_statements = {
+            id(statement)
+            for queries in (FTS_SEARCH_QUERIES, VECTOR_SEARCH_QUERIES, HYDRATE_QUERIES)
+            for statement in queries.values()
+        }
+
+        with patch.object(settings, "vector_granularity", "document"):
+            _run_search(db, "retirement", None, np.zeros(384, dtype=np.float32))
+
+        executed = [call.args[0] for call in db.execute.call_args_list]
+        assert len(executed) == 6
+        assert all(id(statement) in module_statements for statement in executed)
+
+    def test_prepare_threshold_off_behind_pgbouncer(self):
+        """Test psycopg prepares statements unless PgBouncer transaction pooling is on"""
+        assert engine_options()["connect_args"]["prepare_threshold"] == settings.db_prepare_threshold
+        config = settings.model_copy(update={"db_pgbouncer": True})
+        assert engine_options(config)["connect_args"]["prepare_threshold"] is None
+
+    def test_plain_urls_use_psycopg3(self):
+        """Test postgresql:// URLs are routed to the psycopg 3 dialect"""
+        assert driver_url("postgresql://u:p@db/x") == "postgresql+psycopg://u:p@db/x"
+        assert driver_url("postgresql+psycopg://u:p@db/x") == "postgresql+psycopg://u:p@db/x"
+
+    def test_embedding_bound_as_binary_vector(self):
+        """Test the query embedding reaches psycopg as float32 and is dumped in pgvector's binary format"""
+        psycopg = pytest.importorskip("psycopg")
+        from psycopg.adapt import AdaptersMap, PyFormat, Transformer
+
+        value = BinaryVector(384).bind_processor(None)([0.25] * 384)
+        assert isinstance(value, np.ndarray) and value.dtype == np.float32
+
+        context = SimpleNamespace(adapters=AdaptersMap(psycopg.adapters), connection=None)
+        register_numpy_vector_codecs(context.adapters, 16500)
+        dumper = Transformer(context).get_dumper(value, PyFormat.AUTO)
+
+        assert dumper.format == psycopg.pq.Format.BINARY and dumper.oid == 16500
+        assert bytes(dumper.dump(value))[:4] == b"\x01\x80\x00\x00"  # dim 384, then the big-endian floats
+
+
+@pytest.mark.unit
+class TestVectorCodec:
+    """Test pgvector binary transport and binary COPY"""
+
+    def test_binary_round_trip_matches_pgvector(self):
+        """Test the numpy codec is byte-compatible with pgvector's and returns native float32"""
+        from pgvector import Vector
+
+        vector = np.random.default_rng(0).standard_normal(384).astype(np.float32)
+
+        encoded = dump_vector_binary(vector)
+        decoded = load_vector_binary(memoryview(encoded))
+
+        assert encoded == Vector(vector).to_binary()
+        assert decoded.dtype == np.float32 and decoded.dtype.isnative
+        np.testing.assert_array_equal(decoded, vector)
+
+    def test_text_results_parsed_to_arrays(self):
+        """Test text-format vectors and processor fallbacks load as float32 arrays"""
+        processor = BinaryVector(3).result_processor(None, None)
+
+        np.testing.assert_allclose(load_vector_text(b"[0.5,-1,2.25]"), [0.5, -1.0, 2.25])
+        np.testing.assert_allclose(processor("[1,2,3]"), [1.0, 2.0, 3.0])
+        array = np.ones(3, dtype=np.float32)
+        assert processor(array) is array
+
+    def test_copy_rows_writes_binary_rows(self):
+        """Test rows stream through a binary COPY on the session's connection"""
+        db = MagicMock()
+        cursor = db.connection.return_value.connection.driver_connection.cursor.return_value.__enter__.return_value
+        copy = cursor.copy.return_value.__enter__.return_value
+
+        count = copy_rows(db, "note_chunks", ("tenant_id", "note_id"), ("int4", "int4"), iter([(1, 5), (1, 6)]))
+
+        assert count == 2
+        assert cursor.copy.call_args.args[0] == "COPY note_chunks (tenant_id, note_id) FROM STDIN (FORMAT BINARY)"
+        copy.set_types.assert_called_once_with(("int4", "int4"))
+        assert [c.args[0] for c in copy.write_row.call_args_list] == [(1, 5), (1, 6)]
+
+    def test_copy_errors_raise_sqlalchemy_errors(self):
+        """Test driver errors surface as SQLAlchemyError so bulk ingest rolls back the chunk"""
+        psycopg = pytest.importorskip("psycopg")
+        db = MagicMock()
+        cursor = db.connection.return_value.connection.driver_connection.cursor.return_value.__enter__.return_value
+        cursor.copy.side_effect = psycopg.Error("invalid input")
+
+        with pytest.raises(SQLAlchemyError):
+            copy_rows(db, "note_chunks", ("tenant_id",), ("int4",), [(1,)])
+
+
+@pytest.mark.unit
+class TestVectorQuantization:
+    """Test halfvec and binary-quantized nearest-neighbour statements"""
+
+    def test_halfvec_orders_by_indexed_expression(self):
+        """Test halfvec search casts both sides so the halfvec expression index is used"""
+        sql = _nearest_sql("documents", "id", "content_embedding", "<=>", "true", ":limit", "halfvec")
+
+        assert "content_embedding::halfvec(384) <=> CAST(:embedding AS halfvec(384))" in sql
+        assert "ORDER BY distance LIMIT :limit" in sql
+
+    def test_binary_reranks_hamming_candidates(self):
+        """Test binary search over-fetches by Hamming distance, then re-ranks with the float32 vectors"""
+        sql = _nearest_sql("note_chunks", "note_id", "embedding", "<#>", "tenant_id = :tenant_id", ":limit", "binary",
+                           id_alias="id")
+
+        assert "binary_quantize(embedding)::bit(384) <~> binary_quantize(:embedding)" in sql
+        assert "LIMIT CAST(:limit AS int) * :rerank_multiplier" in sql
+        assert "SELECT note_id AS id, embedding <#> :embedding AS distance" in sql
+        assert sql.rstrip().endswith("ORDER BY distance LIMIT :limit")
+
+    def test_unknown_quantization_rejected(self):
+        """Test a misconfigured quantization fails loudly instead of running an unindexed query"""
+        with pytest.raises(ValueError):
+            _nearest_sql("documents", "id", "content_embedding", "<=>", "true", ":limit", "pq")
+
+    def test_candidates_use_configured_quantization(self):
+        """Test Python mode picks the statement for VECTOR_QUANTIZATION and passes the re-rank multiplier"""
+        db = MagicMock()
+        db.execute.return_value = [SimpleNamespace(id=4, distance=0.2)]
+
+        with patch.object(settings, "vector_granularity", "document"), \
+                patch.object(settings, "vector_quantization", "binary"):
+            candidates = _vector_candidates(db, "document", np.zeros(384, dtype=np.float32))
+
+        statement, params = db.execute.call_args.args
+        assert candidates == [(4, pytest.approx(_vector_similarity(0.2)))]
+        assert statement is VECTOR_SEARCH_QUERIES[("document", settings.vector_metric, "binary")]
+        assert params["rerank_multiplier"] == settings.binary_rerank_multiplier
+
+    def test_sql_mode_uses_quantized_statement(self):
+        """Test SQL mode runs the chunk statement built for the configured quantization"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+
+        with patch.object(settings, "vector_granularity", "chunk"), patch.object(settings, "chunk_pooling", "max"), \
+                patch.object(settings, "vector_quantization", "halfvec"):
+            _run_sql_search(db, "rmd", None, np.zeros(384, dtype=np.float32))
+
+        statement, _ = db.execute.call_args.args
+        assert statement is CHUNK_HYBRID_SEARCH_QUERIES[(settings.vector_metric, "max", "halfvec")]
+        assert "embedding::halfvec(384)" in str(statement)
+
+
+@pytest.mark.unit
+class TestTenantScoping:
+    """Test per-request tenant resolution and tenant-scoped (partition-pruned) statements"""
+
+    def _search(self, backend, headers=None):
+        embedder = MagicMock()
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.zeros(384)))
+        app.dependency_overrides = {
+            get_db: lambda: MagicMock(),
+            get_embedder_service: lambda: embedder,
+            get_query_cache: lambda: None,
+        }
+        try:
+            with patch.dict(SEARCH_BACKENDS, {settings.search_mode: backend}):
+                return TestClient(app).get("/search", params={"q": "tenant scoped rmd"}, headers=headers or {})
+        finally:
+            app.dependency_overrides = {}
+
+    def test_header_selects_tenant(self):
+        """Test X-Tenant-ID reaches the search backend and falls back to the configured tenant"""
+        backend = MagicMock(return_value=SearchSnapshot([]))
+
+        assert self._search(backend, {"X-Tenant-ID": "42"}).status_code == 200
+        assert backend.call_args.args[5] == 42
+        assert self._search(backend).status_code == 200
+        assert backend.call_args.args[5] == settings.tenant_id
+
+    def test_invalid_or_missing_header_rejected(self):
+        """Test a malformed tenant is a 422, and a missing one a 400 when the header is required"""
+        backend = MagicMock(return_value=SearchSnapshot([]))
+
+        assert self._search(backend, {"X-Tenant-ID": "0"}).status_code == 422
+        with patch.object(settings, "require_tenant_header", True):
+            response = self._search(backend)
+            with pytest.raises(HTTPException):
+                get_tenant_id(None)
+        assert response.status_code == 400
+        backend.assert_not_called()
+
+    def test_every_python_mode_statement_filters_on_tenant(self):
+        """Test FTS, vector and hydration statements all bind the request's tenant"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [SimpleNamespace(id=3, score=0.5)]
+        db.execute.return_value.__iter__.return_value = iter([])
+
+        with patch.object(settings, "vector_granularity", "document"):
+            _run_search(db, "rmd", None, np.zeros(384, dtype=np.float32), None, 42)
+
+        for call in db.execute.call_args_list:
+            statement, params = call.args
+            assert "tenant_id = :tenant_id" in str(statement)
+            assert params["tenant_id"] == 42
+
+    def test_sql_mode_hydration_pruned_to_tenant(self):
+        """Test the single-statement search joins items on the tenant key, not just the id"""
+        sql = str(HYBRID_SEARCH_QUERIES[("cosine", "none")])
+
+        assert "d.tenant_id = :tenant_id AND d.id = f.id" in sql
+        assert "n.tenant_id = :tenant_id AND n.id = f.id" in sql
+
+    def test_client_validated_against_request_tenant(self):
+        """Test uploads look the client up within the request's tenant"""
+        db = MagicMock()
+        query = db.query.return_value.filter
+        query.return_value.first.return_value = None
+
+        with pytest.raises(HTTPException) as error:
+            validate_client_exists(7, db, 42)
+
+        assert error.value.status_code == 404
+        assert "42" in str(query.call_args.args[1].compile(compile_kwargs={"literal_binds": True}))
+
+
+@pytest.mark.unit
+class TestSearchFilters:
+    """Test client and date filters, exact-search fallback and iterative index scans"""
+
+    FILTERS = SearchFilters(client_id=7, created_after=datetime(2024, 1, 1))
+
+    def test_filters_reach_item_and_chunk_statements(self):
+        """Test item statements filter directly and chunk statements through their parent item"""
+        item = str(_vector_search_query("document", "cosine", "none", "document", self.FILTERS.columns))
+        chunk = str(_vector_search_query("note", "cosine", "none", "chunk", self.FILTERS.columns))
+
+        assert "tenant_id = :tenant_id AND client_id = :client_id AND created_at >= :created_after" in item
+        assert "note_id IN (SELECT id FROM meeting_notes WHERE tenant_id = :tenant_id AND client_id" in chunk
+        assert self.FILTERS.params() == {"client_id": 7, "created_after": datetime(2024, 1, 1)}
+
+    def test_statements_memoized_per_filter_combination(self):
+        """Test a filter combination always maps to the same statement, and no filters to the module one"""
+        columns = self.FILTERS.columns
+
+        assert _vector_search_query("note", "cosine", "none", "document", columns) is _vector_search_query(
+            "note", "cosine", "none", "document", SearchFilters(client_id=9, created_after=datetime(2023, 5, 1)).columns
+        )
+        assert _vector_search_query("note", "cosine", "none", "document", ()) is VECTOR_SEARCH_QUERIES[
+            ("note", "cosine", "none")
+        ]
+
+    def test_exact_statement_bypasses_vector_index(self):
+        """Test exact search sorts a materialized filtered set instead of ordering by the index"""
+        sql = str(_vector_search_query("document", "cosine", "exact", "document", ("client_id",)))
+
+        assert "WITH filtered AS MATERIALIZED" in sql
+        assert "FROM filtered\n            ORDER BY distance LIMIT :limit" in sql
+
+    def test_small_filtered_sets_searched_exactly(self):
+        """Test item types under the threshold are searched exactly, others with an iterative scan"""
+        db = MagicMock()
+        db.execute.return_value.one.return_value = SimpleNamespace(document=120, note=2000)
+
+        with patch.object(settings, "exact_search_threshold", 2000), \
+                patch.object(settings, "vector_iterative_scan", "relaxed_order"), \
+                patch.object(settings, "vector_index", "hnsw"):
+            exact_kinds = _plan_filtered_search(db, 1, self.FILTERS)
+
+        assert exact_kinds == {"document"}
+        count_params = db.execute.call_args_list[0].args[1]
+        assert count_params["threshold"] == 2000 and count_params["client_id"] == 7
+        assert db.execute.call_args_list[1].args[1] == {"name": "hnsw.iterative_scan", "value": "relaxed_order"}
+
+    def test_unfiltered_search_plans_nothing(self):
+        """Test a search without filters runs no count and keeps the session's scan settings"""
+        db = MagicMock()
+
+        assert _plan_filtered_search(db, 1, SearchFilters()) == frozenset()
+        db.execute.assert_not_called()
+
+    def test_candidates_reordered_after_relaxed_scan(self):
+        """Test item candidates are returned closest first even if the index scan was out of order"""
+        db = MagicMock()
+        db.execute.return_value = [SimpleNamespace(id=1, distance=0.3), SimpleNamespace(id=2, distance=0.1)]
+
+        with patch.object(settings, "vector_granularity", "document"), \
+                patch.object(settings, "vector_metric", "cosine"):
+            candidates = _vector_candidates(db, "document", np.zeros(384, dtype=np.float32), 1, self.FILTERS, True)
+
+        statement, params = db.execute.call_args.args
+        assert [item_id for item_id, _ in candidates] == [2, 1]
+        assert "MATERIALIZED" in str(statement) and params["client_id"] == 7
+
+    def _search(self, backend, *queries):
+        embedder = MagicMock()
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.zeros(384)))
+        app.dependency_overrides = {
+            get_db: lambda: MagicMock(),
+            get_embedder_service: lambda: embedder,
+            get_query_cache: lambda: None,
+        }
+        try:
+            with patch.dict(SEARCH_BACKENDS, {settings.search_mode: backend}):
+                client = TestClient(app)
+                return [client.get("/search", params=params) for params in queries]
+        finally:
+            app.dependency_overrides = {}
+
+    def test_endpoint_passes_filters_and_keys_cache(self):
+        """Test the filters reach the backend and different filters miss the result cache"""
+        backend = MagicMock(return_value=SearchSnapshot([]))
+
+        responses = self._search(
+            backend,
+            {"q": "filtered rmd", "client_id": 7, "created_after": "2024-01-01T00:00:00"},
+            {"q": "filtered rmd", "client_id": 8, "created_after": "2024-01-01T00:00:00"},
+        )
+
+        assert all(r.status_code == 200 for r in responses)
+        assert backend.call_count == 2
+        assert backend.call_args_list[0].args[6] == self.FILTERS
+
+    def test_inverted_date_range_rejected(self):
+        """Test created_after must precede created_before"""
+        backend = MagicMock(return_value=SearchSnapshot([]))
+
+        (response,) = self._search(
+            backend, {"q": "rmd", "created_after": "2024-02-01T00:00:00", "created_before": "2024-01-01T00:00:00"}
+        )
+
+        assert response.status_code == 400
+        backend.assert_not_called()
+
+
+def _search_result(key: str, score: float = 0.1) -> SearchResult:
+    result_type, item_id = ("document", key[4:]) if key.startswith("doc_") else ("note", key[5:])
+    return SearchResult(
+        id=int(item_id), type=result_type, client_id=1, content="c", created_at=datetime(2024, 1, 1), score=score
+    )
+
+
+@pytest.mark.unit
+class TestSearchPagination:
+    """Test page size, candidate depth and cursor pagination over cached search snapshots"""
+
+    KEYS = ["doc_1", "note_2", "doc_3", "note_4", "doc_5"]
+
+    def setup_method(self):
+        search_result_cache.clear()
+
+    def _snapshot(self, hydrated: int) -> SearchSnapshot:
+        snapshot = SearchSnapshot([(key, 1.0 / position) for position, key in enumerate(self.KEYS, 1)])
+        snapshot.add([_search_result(key) for key in self.KEYS[:hydrated]])
+        return snapshot
+
+    def test_snapshot_pages_after_key(self):
+        """Test a page continues after the cursor's key and unknown keys are rejected"""
+        snapshot = self._snapshot(0)
+
+        assert [key for key, _ in snapshot.page(None, 2)] == ["doc_1", "note_2"]
+        assert [key for key, _ in snapshot.page("note_2", 2)] == ["doc_3", "note_4"]
+        assert [key for key, _ in snapshot.page("note_4", 2)] == ["doc_5"]
+        with pytest.raises(KeyError):
+            snapshot.page("doc_99", 2)
+
+    def test_python_search_uses_depth_and_hydrates_first_page(self):
+        """Test candidate_depth sets the retriever limits and only the first page is hydrated"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [SimpleNamespace(id=i, score=1.0 / i) for i in (1, 2, 3)]
+        db.execute.return_value.__iter__.return_value = iter([])
+
+        with patch.object(settings, "vector_granularity", "document"), \
+                patch("src.api.search._hydrate", return_value=[]) as hydrate:
+            snapshot = _run_search(
+                db, "rmd", "document", np.zeros(384, dtype=np.float32), SearchOptions(candidate_depth=7), None, None, 2
+            )
+
+        assert [key for key, _ in snapshot.ranking] == ["doc_1", "doc_2", "doc_3"]
+        assert [key for key, _ in hydrate.call_args.args[1]] == ["doc_1", "doc_2"]
+        assert {call.args[1]["limit"] for call in db.execute.call_args_list} == {7}
+
+    def test_sql_search_keeps_unhydrated_ranking(self):
+        """Test SQL mode returns the whole fused ranking but hydrates only the first page"""
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(
+                type="document", id=1, score=0.03, client_id=1, title="T", content="c", snippet=None, summary=None,
+                summary_status="ready", created_at=datetime(2024, 1, 1),
+            ),
+            SimpleNamespace(
+                type="note", id=2, score=0.02, client_id=None, title=None, content=None, snippet=None, summary=None,
+                summary_status=None, created_at=None,
+            ),
+        ]
+
+        snapshot = _run_sql_search(db, "rmd", None, np.zeros(384), SearchOptions(candidate_depth=9), None, None, 1)
+
+        params = db.execute.call_args.args[1]
+        assert params["candidates"] == 9 and params["limit"] == 1
+        assert [key for key, _ in snapshot.ranking] == ["doc_1", "note_2"]
+        assert set(snapshot.results) == {"doc_1"}
+        assert "NOT f.first_page" in str(HYBRID_SEARCH_QUERIES[("cosine", "none")])
+
+    def _search(self, backend, *queries, hydrate=None):
+        embedder = MagicMock()
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.zeros(384)))
+        app.dependency_overrides = {
+            get_db: lambda: MagicMock(),
+            get_embedder_service: lambda: embedder,
+            get_query_cache: lambda: None,
+        }
+        hydrate = hydrate or MagicMock(side_effect=lambda db, ranked, *args: [_search_result(k) for k, _ in ranked])
+        try:
+            with patch.dict(SEARCH_BACKENDS, {settings.search_mode: backend}), \
+                    patch("src.api.search._hydrate", hydrate):
+                client = TestClient(app)
+                return [client.get("/search", params=params) for params in queries]
+        finally:
+            app.dependency_overrides = {}
+
+    def _pages(self, backend, hydrate, params):
+        """Follow next_cursor to the last page, including a write between pages"""
+        pages = []
+        cursor = None
+        while True:
+            (response,) = self._search(backend, {**params, **({"cursor": cursor} if cursor else {})}, hydrate=hydrate)
+            assert response.status_code == 200
+            pages.append([(r["type"], r["id"]) for r in response.json()["results"]])
+            cursor = response.json()["next_cursor"]
+            search_result_cache.invalidate(settings.tenant_id)
+            if cursor is None:
+                return pages
+
+    def test_later_pages_served_from_snapshot(self):
+        """Test later pages skip retrieval, hydrate only their rows and survive writes"""
+        backend = MagicMock(return_value=self._snapshot(2))
+        hydrate = MagicMock(side_effect=lambda db, ranked, *args: [_search_result(k) for k, _ in ranked])
+
+        pages = self._pages(backend, hydrate, {"q": "rmd", "limit": 2})
+
+        assert pages == [[("document", 1), ("note", 2)], [("document", 3), ("note", 4)], [("document", 5)]]
+        assert backend.call_count == 1
+        assert backend.call_args.args[7] == 2
+        assert [[key for key, _ in call.args[1]] for call in hydrate.call_args_list] == [["doc_3", "note_4"], ["doc_5"]]
+
+    def test_candidate_depth_keys_snapshot(self):
+        """Test a different candidate_depth runs a new search while a different limit reuses the snapshot"""
+        backend = MagicMock(return_value=self._snapshot(5))
+
+        responses = self._search(
+            backend, {"q": "rmd", "limit": 2}, {"q": "rmd", "limit": 5}, {"q": "rmd", "candidate_depth": 200}
+        )
+
+        assert [len(r.json()["results"]) for r in responses] == [2, 5, 5]
+        assert backend.call_count == 2
+        assert backend.call_args.args[4] == SearchOptions(candidate_depth=200)
+
+    def test_cursor_bound_to_its_search(self):
+        """Test malformed cursors and cursors from another query are rejected"""
+        backend = MagicMock(return_value=self._snapshot(5))
+
+        (first,) = self._search(backend, {"q": "rmd", "limit": 2})
+        responses = self._search(
+            backend,
+            {"q": "roth", "limit": 2, "cursor": first.json()["next_cursor"]},
+            {"q": "rmd", "limit": 2, "cursor": "not-a-cursor"},
+            {"q": "rmd", "limit": 0},
+        )
+
+        assert [r.status_code for r in responses] == [400, 400, 422]
+
+    def test_expired_snapshot_reruns_search(self):
+        """Test a cursor outliving its snapshot continues from a fresh ranking, or 410 if its position is gone"""
+        backend = MagicMock(return_value=self._snapshot(5))
+        (first,) = self._search(backend, {"q": "rmd", "limit": 2})
+        cursor = first.json()["next_cursor"]
+
+        search_result_cache.clear()
+        (resumed,) = self._search(backend, {"q": "rmd", "limit": 2, "cursor": cursor})
+        search_result_cache.clear()
+        backend.return_value = SearchSnapshot([("doc_9", 1.0)])
+        (gone,) = self._search(backend, {"q": "rmd", "limit": 2, "cursor": cursor})
+
+        assert [(r["type"], r["id"]) for r in resumed.json()["results"]] == [("document", 3), ("note", 4)]
+        assert gone.status_code == 410
+
+
+@pytest.mark.unit
+class TestSearchProjection:
+    """Test ?fields= projection, ts_headline snippets and NDJSON streaming"""
+
+    KEYS = [f"doc_{i}" for i in range(1, 13)]
+
+    def setup_method(self):
+        search_result_cache.clear()
+
+    def test_hydration_reads_only_requested_columns(self):
+        """Test content and snippets are only selected when requested"""
+        snippet_only = str(_hydrate_query("note", ("snippet",)))
+
+        assert _hydrate_query("document", ("content",)) is HYDRATE_QUERIES["document"]
+        assert "ts_headline" not in str(HYDRATE_QUERIES["document"])
+        assert "NULL::text AS content" in snippet_only
+        assert "ts_headline(translate(content, :snippet_markers, ''), plainto_tsquery(:query), :snippet_options)" in (
+            snippet_only
+        )
+
+    def test_sql_search_projects_first_page(self):
+        """Test SQL mode hydrates the first page with the requested columns"""
+        sql = str(_hybrid_search_query("cosine", "none", None, (), frozenset(), ("snippet",)))
+
+        assert "translate(d.content" in sql and "translate(n.content" in sql
+        assert "d.content AS content" not in sql
+
+    def test_snippet_escapes_uploaded_markup(self):
+        """Test markup in stored content is escaped and only ts_headline's markers become <mark> tags"""
+        db = MagicMock()
+        db.execute.return_value = [
+            SimpleNamespace(
+                id=1,
+                client_id=1,
+                title="T",
+                content=None,
+                snippet='<script>alert(1)</script> \ue000rmd\ue001 due <mark onclick="x()">soon</mark>',
+                summary=None,
+                summary_status="ready",
+                created_at=datetime(2024, 1, 1),
+            )
+        ]
+
+        [result] = _hydrate(db, [("doc_1", 0.5)], 1, ("snippet",), "rmd")
+
+        assert result.snippet == (
+            "&lt;script&gt;alert(1)&lt;/script&gt; <mark>rmd</mark> due "
+            "&lt;mark onclick=&quot;x()&quot;&gt;soon&lt;/mark&gt;"
+        )
+        params = db.execute.call_args.args[1]
+        assert params["snippet_markers"] == "\ue000\ue001"
+        assert params["snippet_options"].endswith('StartSel="\ue000", StopSel="\ue001"')
+
+    def test_snapshot_merges_columns(self):
+        """Test hydrating a snippet keeps the content an earlier request loaded"""
+        snapshot = SearchSnapshot([("doc_1", 0.5)])
+        snapshot.add([_search_result("doc_1")])
+        assert not snapshot.has("doc_1", ("snippet",))
+
+        snapshot.add([_search_result("doc_1").model_copy(update={"content": None, "snippet": "<mark>rmd</mark>"})])
+
+        assert snapshot.has("doc_1", ("content", "snippet"))
+        assert snapshot.results["doc_1"].content == "c"
+
+    def _search(self, backend, params, headers=None, hydrate=None):
+        embedder = MagicMock()
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.zeros(384)))
+        app.dependency_overrides = {
+            get_db: lambda: MagicMock(),
+            get_embedder_service: lambda: embedder,
+            get_query_cache: lambda: None,
+        }
+        try:
+            with patch.dict(SEARCH_BACKENDS, {settings.search_mode: backend}), \
+                    patch("src.api.search._hydrate", hydrate or MagicMock(return_value=[])):
+                return TestClient(app).get("/search", params=params, headers=headers or {})
+        finally:
+            app.dependency_overrides = {}
+
+    def _snapshot(self, hydrated: int, **columns) -> SearchSnapshot:
+        snapshot = SearchSnapshot([(key, 0.5) for key in self.KEYS])
+        snapshot.add([_search_result(key).model_copy(update=columns) for key in self.KEYS[:hydrated]])
+        return snapshot
+
+    def test_fields_project_response(self):
+        """Test only the requested fields (plus id and type) are returned and hydrated"""
+        backend = MagicMock(return_value=self._snapshot(2, content=None, snippet="<mark>rmd</mark>"))
+
+        response = self._search(backend, {"q": "rmd", "limit": 2, "fields": "title,snippet"})
+
+        assert response.status_code == 200
+        assert set(response.json()["results"][0]) == {"id", "type", "title", "snippet"}
+        assert "next_cursor" in response.json()
+        assert backend.call_args.args[8] == ("snippet",)
+
+    def test_unknown_field_rejected(self):
+        """Test a typo in ?fields= is a client error, not an empty projection"""
+        backend = MagicMock(return_value=self._snapshot(0))
+
+        response = self._search(backend, {"q": "rmd", "fields": "title,embedding"})
+
+        assert response.status_code == 400
+        backend.assert_not_called()
+
+    def test_ndjson_streams_in_hydrated_batches(self):
+        """Test NDJSON sends a header line, then results hydrated a batch at a time after the first"""
+        backend = MagicMock(return_value=self._snapshot(5))
+        hydrate = MagicMock(side_effect=lambda db, ranked, *args: [_search_result(k) for k, _ in ranked])
+
+        response = self._search(
+            backend, {"q": "rmd", "limit": 12, "fields": "score"}, {"Accept": "application/x-ndjson"}, hydrate
+        )
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert lines[0] == {"query": "rmd", "type": None, "next_cursor": None}
+        assert [line["id"] for line in lines[1:]] == list(range(1, 13))
+        assert set(lines[1]) == {"id", "type", "score"}
+        assert backend.call_args.args[7] == 5
+        assert [len(call.args[1]) for call in hydrate.call_args_list] == [5, 2]
+
+
+class _FlakySummarizer(Summarizer):
+    """Provider stand-in that falls back to extractive summaries when told to fail"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    def summarize(self, text: str, content_type: str = "document") -> str:
+        self.calls += 1
+        if self.fail:
+            return _extractive_fallback(text, content_type)
+        return f"summary of {len(text)} chars"
+
+    def cache_identity(self):
+        return "flaky", "flaky-1", "2"
+
+
+@pytest.mark.unit
+class TestContentCache:
+    """Test the content-hash cache of summaries and chunk embeddings"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_hash_ignores_whitespace_layout(self):
+        """Test re-uploads differing only in line breaks and Unicode form share a hash"""
+        assert content_hash("Roth  conversion.\n\nNext steps: caf\u00e9") == content_hash(
+            " Roth conversion. Next steps: cafe\u0301 "
+        )
+        assert content_hash("Roth conversion.") != content_hash("roth conversion.")
+
+    def test_keys_cover_model_prompt_and_chunking(self):
+        """Test the summary key separates content types and the embedding key carries chunking parameters"""
+        summarizer = _FlakySummarizer()
+        embedder = MagicMock(model_id="minilm")
+
+        assert summary_key(summarizer, "note") == ("summary", "flaky", "flaky-1", "2:note")
+        assert summary_key(summarizer, "note") != summary_key(summarizer, "document")
+        with patch.object(settings, "chunk_max_words", 99):
+            assert embedding_key(embedder).version.startswith("chunks=99/")
+
+    def test_embedding_hit_skips_embedder(self):
+        """Test cached chunk vectors are reused and the avoided cost is counted"""
+        vectors = np.ones((1, 384), dtype=np.float32)
+        db = MagicMock()
+        db.execute.return_value.first.return_value = SimpleNamespace(value=vectors.tobytes(), cost_seconds=0.25)
+        embedder = MagicMock(model_id="minilm")
+
+        with patch.object(settings, "content_cache_max_bytes", 1024):
+            chunks, chunk_vectors, embedding = asyncio.run(embed_chunks_cached(db, embedder, 1, "Short note."))
+
+        embedder.encode_async.assert_not_called()
+        assert chunks == ["Short note."]
+        np.testing.assert_array_equal(chunk_vectors, vectors)
+        assert metrics.counter("content_cache_embedding_hits") == 1
+        assert metrics.counter("content_cache_embedding_seconds_saved") == 0.25
+
+    def test_embedding_miss_stores_vectors(self):
+        """Test a miss embeds the content and stores the float32 chunk vectors"""
+        db = MagicMock()
+        db.execute.return_value.first.return_value = None
+        embedder = MagicMock(model_id="minilm")
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.ones(384)))
+
+        with patch.object(settings, "content_cache_max_bytes", 1024):
+            asyncio.run(embed_chunks_cached(db, embedder, 1, "Short note."))
+
+        params = db.execute.call_args_list[-1].args[1]
+        assert params["kind"] == "embedding" and params["model"] == "minilm"
+        assert params["size_bytes"] == 384 * 4
+        assert metrics.counter("content_cache_embedding_misses") == 1
+
+    def test_summary_hit_and_store(self):
+        """Test a cached summary skips the summarizer and a new one is stored"""
+        db = MagicMock()
+        db.execute.return_value.first.return_value = SimpleNamespace(value=b"cached summary", cost_seconds=2.0)
+        summarizer = _FlakySummarizer()
+
+        with patch.object(settings, "content_cache_max_bytes", 1024):
+            assert asyncio.run(summarize_cached(db, summarizer, 1, "Long statement.", "document")) == "cached summary"
+            db.execute.return_value.first.return_value = None
+            summary = asyncio.run(summarize_cached(db, summarizer, 1, "Other statement.", "document"))
+
+        assert summarizer.calls == 1
+        assert db.execute.call_args_list[-1].args[1]["value"] == summary.encode("utf-8")
+        assert metrics.counter("content_cache_summary_seconds_saved") == 2.0
+
+    def test_fallback_summary_not_cached(self):
+        """Test an extractive fallback after a provider failure is returned but not stored"""
+        db = MagicMock()
+        db.execute.return_value.first.return_value = None
+
+        with patch.object(settings, "content_cache_max_bytes", 1024), \
+                patch("src.utils.summarizer._fallback_summarizer") as extractive:
+            extractive.return_value.summarize.return_value = "Fallback summary"
+            summary = asyncio.run(summarize_cached(db, _FlakySummarizer(fail=True), 1, "Statement.", "note"))
+
+        assert summary == "Fallback summary"
+        assert db.execute.call_count == 1  # the lookup only
+
+    def test_disabled_cache_skips_database(self):
+        """Test CONTENT_CACHE_MAX_BYTES=0 calls the summarizer without touching the cache table"""
+        db = MagicMock()
+
+        with patch.object(settings, "content_cache_max_bytes", 0):
+            asyncio.run(summarize_cached(db, _FlakySummarizer(), 1, "Statement.", "note"))
+
+        db.execute.assert_not_called()
+
+    def test_eviction_runs_every_n_stores(self):
+        """Test stores trim the table to the byte budget periodically, not on every insert"""
+        db = MagicMock()
+        db.execute.return_value.rowcount = 3
+        key = summary_key(_FlakySummarizer(), "note")
+
+        with patch.object(settings, "content_cache_evict_every", 2), \
+                patch.object(settings, "content_cache_max_bytes", 4096), \
+                patch("src.utils.content_cache._stores", iter(range(1, 5))):
+            for _ in range(4):
+                store(db, 1, b"digest", key, b"summary", 1.0)
+
+        evictions = [call for call in db.execute.call_args_list if "DELETE FROM content_cache" in str(call.args[0])]
+        assert len(evictions) == 2
+        assert evictions[0].args[1] == {"max_bytes": 4096}
+        assert metrics.counter("content_cache_evictions") == 6
+
+
+def _note_row(note_id: int, content: str, idempotency_key=None) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=note_id,
+        client_id=1,
+        content=content,
+        summary="s",
+        summary_status="ready",
+        created_at=datetime(2024, 1, 1),
+        idempotency_key=idempotency_key,
+    )
+
+
+@pytest.mark.unit
+class TestUploadDeduplication:
+    """Test Idempotency-Key and content-hash deduplication of uploads, and near-duplicate search collapse"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_key_match_returned_before_content_match(self):
+        """Test the row created with the Idempotency-Key wins, and a reused key must carry the same content"""
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = [
+            _note_row(7, "Same text."),
+            _note_row(8, "Same  text.", idempotency_key="crm-42"),
+        ]
+
+        assert find_duplicate(db, MeetingNote, 1, 1, content_hash("Same text."), "crm-42").id == 8
+        assert metrics.counter("upload_duplicates_idempotency_key") == 1
+        with pytest.raises(HTTPException) as exc_info:
+            find_duplicate(db, MeetingNote, 1, 1, content_hash("Edited text."), "crm-42")
+        assert exc_info.value.status_code == 422
+
+    def test_document_hash_covers_title(self):
+        """Test the same document content under a new title is not a duplicate, and a keyed retry must keep the title"""
+        assert upload_hash("Trust deed.", "Family trust") == upload_hash("Trust  deed.", "Family  trust")
+        assert upload_hash("Trust deed.", "Family trust") != upload_hash("Trust deed.", "Amended trust")
+        assert upload_hash("Trust deed.") == content_hash("Trust deed.")
+
+        db = MagicMock()
+        keyed = SimpleNamespace(id=3, title="Family trust", content="Trust deed.", idempotency_key="crm-7")
+        db.execute.return_value.scalars.return_value.all.return_value = [keyed]
+        assert find_duplicate(db, MeetingNote, 1, 1, upload_hash("Trust deed.", "Family trust"), "crm-7").id == 3
+        with pytest.raises(HTTPException):
+            find_duplicate(db, MeetingNote, 1, 1, upload_hash("Trust deed.", "Amended trust"), "crm-7")
+
+    def test_dedupe_disabled_without_key_skips_lookup(self):
+        """Test DEDUPE_UPLOADS=false makes the lookup a no-op unless a key is sent"""
+        db = MagicMock()
+
+        with patch.object(settings, "dedupe_uploads", False):
+            assert find_duplicate(db, MeetingNote, 1, 1, content_hash("Text.")) is None
+
+        db.execute.assert_not_called()
+
+    def test_retried_upload_returns_existing_row(self):
+        """Test a duplicate upload answers 200 with the existing row without embedding or summarizing"""
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = [_note_row(7, "Quarterly review.")]
+        embedder, summarizer = MagicMock(), MagicMock()
+        app.dependency_overrides = {
+            get_db: lambda: db,
+            get_embedder_service: lambda: embedder,
+            get_summarizer_service: lambda: summarizer,
+        }
+        try:
+            response = TestClient(app).post(
+                "/clients/1/notes", json={"content": "Quarterly review."}, headers={"Idempotency-Key": "crm-1"}
+            )
+        finally:
+            app.dependency_overrides = {}
+
+        assert response.status_code == 200
+        assert response.headers[REPLAYED_HEADER] == "true"
+        assert response.json()["id"] == 7
+        embedder.encode_async.assert_not_called()
+        summarizer.summarize.assert_not_called()
+
+    def test_concurrent_duplicate_returns_winning_row(self):
+        """Test an insert losing the unique-index race returns the row committed first"""
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = [_note_row(9, "Text.")]
+        instance = MeetingNote(tenant_id=1, client_id=1, content="Text.")
+        save = MagicMock(side_effect=IntegrityError("INSERT", {}, Exception("duplicate key")))
+
+        row, created = save_unique(db, instance, save, digest=content_hash("Text."))
+
+        assert (row.id, created) == (9, False)
+        db.rollback.assert_called_once()
+
+        db.execute.return_value.scalars.return_value.all.return_value = []
+        with pytest.raises(IntegrityError):
+            save_unique(db, instance, save, digest=content_hash("Text."))
+
+    def test_bulk_skips_existing_and_repeated_content(self):
+        """Test bulk items the client already has, or repeated within the request, skip the models"""
+        embedder = MagicMock()
+        embedder.encode_batch.side_effect = lambda texts: np.zeros((len(texts), 384))
+        summarizer = MagicMock(batch_size=1)
+        summarizer.summarize.side_effect = lambda text, content_type: text
+        inserted = MagicMock()
+        inserted.scalars.return_value.all.return_value = [101]
+        db = MagicMock()
+        db.execute.side_effect = [[SimpleNamespace(content_hash=content_hash("one"), id=50)], inserted]
+        items = [{"content": "one"}, {"content": "two"}, {"content": " two"}]
+
+        with patch("src.utils.bulk.copy_rows"):
+            results = bulk_ingest(db, embedder, summarizer, 1, "note", items)
+
+        assert [(r.status, r.id) for r in results] == [("duplicate", 50), ("created", 101), ("duplicate", 101)]
+        assert embedder.encode_batch.call_args.args[0] == ["two"]
+        assert db.execute.call_args_list[1].args[1][0]["content_hash"] == content_hash("two")
+
+    def test_bulk_concurrent_duplicate_fails_only_that_item(self):
+        """Test content inserted by a concurrent upload after the lookup is reported as duplicate, the rest retried"""
+        embedder = MagicMock()
+        embedder.encode_batch.side_effect = lambda texts: np.zeros((len(texts), 384))
+        summarizer = MagicMock(batch_size=1)
+        summarizer.summarize.side_effect = lambda text, content_type: text
+        inserted = MagicMock()
+        inserted.scalars.return_value.all.return_value = [101]
+        db = MagicMock()
+        db.execute.side_effect = [
+            [],  # duplicate lookup: nothing yet
+            IntegrityError("INSERT", {}, Exception("uq_notes_content_hash")),
+            [SimpleNamespace(content_hash=content_hash("two"), id=77)],  # re-check after the failed insert
+            inserted,
+        ]
+
+        with patch("src.utils.bulk.copy_rows"):
+            results = bulk_ingest(db, embedder, summarizer, 1, "note", [{"content": "one"}, {"content": "two"}])
+
+        assert [(r.status, r.id) for r in results] == [("created", 101), ("duplicate", 77)]
+        assert [row["content"] for row in db.execute.call_args_list[3].args[1]] == ["one"]
+        db.rollback.assert_called_once()
+
+    def test_collapse_keeps_best_ranked_copy(self):
+        """Test hits nearly identical to a better-ranked hit are dropped; hits without embeddings stay"""
+        first, other = np.zeros(384, dtype=np.float32), np.zeros(384, dtype=np.float32)
+        first[0], other[1] = 1.0, 1.0
+        near_copy = first.copy()
+        near_copy[1] = 0.1
+        db = MagicMock()
+        db.execute.side_effect = [
+            [SimpleNamespace(id=1, content_embedding=first), SimpleNamespace(id=3, content_embedding=other)],
+            [SimpleNamespace(id=2, content_embedding=near_copy)],
+        ]
+        ranked = [("doc_1", 0.9), ("note_2", 0.8), ("doc_3", 0.7), ("doc_4", 0.6)]
+
+        assert _collapse_near_duplicates(db, ranked, 1) == [("doc_1", 0.9), ("doc_3", 0.7), ("doc_4", 0.6)]
+        assert metrics.counter("search_duplicates_collapsed") == 1
+
+    def test_collapse_option_reaches_backend(self):
+        """Test ?collapse_duplicates=true is part of the search options (and so of the cache key)"""
+        search_result_cache.clear()
+        backend = MagicMock(return_value=SearchSnapshot([]))
+        embedder = MagicMock()
+        embedder.encode_async = MagicMock(side_effect=lambda q: asyncio.sleep(0, result=np.zeros(384)))
+        app.dependency_overrides = {
+            get_db: lambda: MagicMock(),
+            get_embedder_service: lambda: embedder,
+            get_query_cache: lambda: None,
+        }
+        try:
+            with patch.dict(SEARCH_BACKENDS, {settings.search_mode: backend}):
+                response = TestClient(app).get("/search", params={"q": "rmd", "collapse_duplicates": "true"})
+        finally:
+            app.dependency_overrides = {}
+
+        assert response.status_code == 200
+        assert backend.call_args.args[4].collapse_duplicates is True
+
+
+def _gemini_answer(text: str) -> dict:
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+class _FakeGeminiHandler(BaseHTTPRequestHandler):
+    """generateContent stand-in: answers with the server's scripted (status, payload, headers, delay) replies"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(
+            SimpleNamespace(path=self.path, port=self.client_address[1], key=self.headers["x-goog-api-key"], body=body)
+        )
+        status, payload, headers, delay = (
+            self.server.script.pop(0) if self.server.script else (200, _gemini_answer("Summary."), {}, 0)
+        )
+        time.sleep(delay)
+        data = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            for name, value in {**headers, "Content-Type": "application/json"}.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            pass  # the client timed out and closed the connection
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.unit
+class TestGeminiClient:
+    """Test the pooled Gemini REST client against a local fake server"""
+
+    def setup_method(self):
+        metrics.reset()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeGeminiHandler)
+        self.server.daemon_threads = True
+        self.server.requests, self.server.script = [], []
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.clients = []
+
+    def teardown_method(self):
+        for client in self.clients:
+            client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _client(self, **kwargs) -> GeminiClient:
+        kwargs.setdefault("bucket", TokenBucket(0, 1))
+        kwargs.setdefault("backoff_seconds", 0.01)
+        client = GeminiClient("test-key", base_url=f"http://127.0.0.1:{self.server.server_port}", **kwargs)
+        self.clients.append(client)
+        return client
+
+    def test_requests_reuse_one_connection(self):
+        """Test sequential calls share a keep-alive connection and send the key as a header"""
+        client = self._client()
+
+        assert [client.generate(f"Prompt {i}") for i in range(3)] == ["Summary."] * 3
+
+        requests = self.server.requests
+        assert len({request.port for request in requests}) == 1
+        assert requests[0].path == f"/v1beta/models/{settings.gemini_model}:generateContent"
+        assert requests[0].key == "test-key"
+        assert requests[0].body["contents"][0]["parts"][0]["text"] == "Prompt 0"
+
+    def test_retryable_status_is_retried(self):
+        """Test 503s are retried with backoff, honouring Retry-After, while a 400 fails at once"""
+        client = self._client()
+        self.server.script = [(503, {}, {"Retry-After": "0"}, 0), (200, _gemini_answer("Recovered."), {}, 0)]
+
+        assert client.generate("Prompt") == "Recovered."
+        assert metrics.counter("gemini_retries") == 1
+        with patch.object(settings, "gemini_backoff_max_seconds", 1.0):
+            assert client._backoff(1, 2.0) == 2.0  # the cap never shortens Retry-After
+            self.server.script = [(429, {}, {"Retry-After": "120"}, 0)]
+            with pytest.raises(GeminiUnavailable, match="Retry-After 120s"):
+                client.generate("Prompt")
+        assert client.breaker.failures == 1
+        client.breaker.record_success()
+
+        self.server.script = [(400, {"error": {"message": "bad request"}}, {}, 0)]
+        with pytest.raises(GeminiRequestError, match="HTTP 400"):
+            client.generate("Prompt")
+        assert len(self.server.requests) == 4
+        assert client.breaker.state == "closed"
+
+    def test_timeouts_open_circuit_and_fall_back(self):
+        """Test timed-out calls trip the breaker, after which summaries fall back without calling the API"""
+        client = self._client(timeout_seconds=0.1, max_retries=1, breaker=CircuitBreaker(2, 60.0))
+        self.server.script = [(200, _gemini_answer("Too late."), {}, 0.3)] * 4
+        summarizer = GeminiSummarizer(client=client)
+
+        with patch("src.utils.summarizer._fallback_summarizer") as extractive:
+            extractive.return_value.summarize.return_value = "Fallback summary"
+            summaries = [summarizer.summarize("Statement.", "note") for _ in range(3)]
+
+        assert summaries == ["Fallback summary"] * 3
+        assert len(self.server.requests) == 4  # two attempts for each of the first two calls
+        assert client.breaker.state == "open"
+        assert metrics.counter("gemini_short_circuited") == 1
+        assert metrics.counter("summarizer_fallbacks") == 3
+
+    def test_circuit_half_open_probe(self):
+        """Test an open circuit lets one probe through after the reset time and closes on its success"""
+        now = [0.0]
+        breaker = CircuitBreaker(2, 30.0, clock=lambda: now[0])
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open" and not breaker.allow()
+
+        now[0] = 30.0
+        assert breaker.allow()
+        assert not breaker.allow()  # one probe at a time
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        now[0] = 60.0
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed" and breaker.allow()
+        assert metrics.counter("gemini_circuit_opened") == 1
+
+    def test_unexpected_error_ends_probe(self):
+        """Test an error outside the client's own types still settles a half-open probe"""
+        now = [0.0]
+        client = self._client(breaker=CircuitBreaker(1, 30.0, clock=lambda: now[0]))
+        client.breaker.record_failure()
+        now[0] = 30.0
+
+        with patch.object(client.http, "post", side_effect=httpx.DecodingError("bad gzip")):
+            with pytest.raises(httpx.DecodingError):
+                client.generate("Prompt")
+        assert client.breaker.state == "open"
+
+        now[0] = 60.0
+        assert client.generate("Prompt") == "Summary."
+        assert client.breaker.state == "closed"
+
+    def test_token_bucket_limits_rate(self):
+        """Test the bucket allows a burst, then refills at the configured rate"""
+        now = [0.0]
+        bucket = TokenBucket(1.0, 2, clock=lambda: now[0])
+
+        assert bucket.acquire(0) and bucket.acquire(0)
+        assert not bucket.acquire(0.5)
+        now[0] = 1.0
+        assert bucket.acquire(0)
+
+        client = self._client(bucket=TokenBucket(0.001, 1), timeout_seconds=0.1)
+        client.generate("Prompt")
+        with pytest.raises(RateLimitExceeded):
+            client.generate("Prompt")
+        assert len(self.server.requests) == 1
+        assert client.breaker.state == "closed"
+
+    def test_batch_summarized_in_one_request(self):
+        """Test a batch is one JSON-mode call, and an answer of the wrong shape falls back to single calls"""
+        summarizer = GeminiSummarizer(client=self._client())
+        self.server.script = [(200, _gemini_answer(json.dumps(["A.", "B.", "C."])), {}, 0)]
+
+        assert summarizer.summarize_batch(["one", "two", "three"], "note") == ["A.", "B.", "C."]
+        request = self.server.requests[0]
+        assert request.body["generationConfig"]["responseMimeType"] == "application/json"
+        assert '<item index="3">' in request.body["contents"][0]["parts"][0]["text"]
+        assert metrics.counter("gemini_batched_summaries") == 3
+
+        self.server.script = [(200, _gemini_answer(json.dumps(["Only one."])), {}, 0)]
+        assert summarizer.summarize_batch(["one", "two"], "note") == ["Summary.", "Summary."]
+        assert len(self.server.requests) == 4